@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+"""
+Concurrent chat sessions: asyncio integration vs. one thread per session.
+
+Starts benchmarks/fake_ollama.py in a subprocess (it also fakes the OpenMCP
+tool endpoints), then runs --sessions conversations of --turns streamed
+turns each. Every turn makes a tool call, so each turn is two LLM calls plus
+one tool execution.
+
+"sessions/core" is sessions / (client CPU seconds / wall seconds): how many
+conversations at this pace one fully busy core could keep going.
+
+Usage:
+    uv run python benchmarks/async_sessions_bench.py --sessions 1000 --turns 3
+    uv run python benchmarks/async_sessions_bench.py --mode threads --sessions 200
+"""
+
+import argparse
+import asyncio
+import math
+import threading
+import time
+
+import httpx
+import ollama
+
+from common import start_fake_ollama
+
+from openmcp.core.ollama_async import AsyncClientPool, AsyncOllamaIntegration
+from openmcp.core.ollama_integration import OllamaConfig, OllamaIntegration
+
+
+def run_async(args, base_url: str):
+    """All sessions as tasks on one event loop; returns per-turn latencies"""
+    latencies = []
+
+    async def session(pool, config):
+        client, http = pool.next()
+        chat = AsyncOllamaIntegration(config, openmcp_base=base_url, client=client, http=http)
+        await chat.discover_tools()
+        for turn in range(args.turns):
+            start = time.perf_counter()
+            async for _ in chat.chat_stream(f"What is 2 plus 3? (turn {turn})"):
+                pass
+            latencies.append(time.perf_counter() - start)
+
+    async def main():
+        pool = AsyncClientPool(base_url, size=math.ceil(args.sessions / args.sessions_per_client))
+        config = OllamaConfig(host=base_url)
+        await asyncio.gather(*(session(pool, config) for _ in range(args.sessions)))
+        await pool.aclose()
+
+    asyncio.run(main())
+    return latencies
+
+
+def run_threads(args, base_url: str):
+    """One OllamaIntegration per thread, as the synchronous client requires"""
+    latencies = []
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    client = ollama.Client(host=base_url, limits=limits)
+    config = OllamaConfig(host=base_url)
+
+    def session():
+        chat = OllamaIntegration(config, openmcp_base=base_url, client=client)
+        chat.discover_tools()
+        for turn in range(args.turns):
+            start = time.perf_counter()
+            for _ in chat.chat_stream(f"What is 2 plus 3? (turn {turn})"):
+                pass
+            latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=session) for _ in range(args.sessions)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mode', choices=['async', 'threads'], default='async')
+    parser.add_argument('--sessions', type=int, default=500)
+    parser.add_argument('--turns', type=int, default=3)
+    parser.add_argument('--token-delay', type=float, default=0.005, help='Fake generation time per token')
+    parser.add_argument('--answer-tokens', type=int, default=20)
+    parser.add_argument('--sessions-per-client', type=int, default=32,
+                        help='Async mode: sessions sharing one HTTP client (see AsyncClientPool)')
+    args = parser.parse_args()
+
+    server = start_fake_ollama(token_delay=args.token_delay, answer_tokens=args.answer_tokens)
+    try:
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        runner = run_async if args.mode == 'async' else run_threads
+        latencies = sorted(runner(args, server.base_url))
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+    finally:
+        server.terminate()
+        server.wait()
+
+    turns = len(latencies)
+    p50 = latencies[math.ceil(0.50 * turns) - 1] if turns else 0.0
+    p99 = latencies[math.ceil(0.99 * turns) - 1] if turns else 0.0
+    print(f"mode:           {args.mode}")
+    print(f"sessions:       {args.sessions} x {args.turns} turns ({turns} completed)")
+    print(f"wall time:      {wall:.2f}s")
+    print(f"client CPU:     {cpu:.2f}s ({cpu / wall * 100:.0f}% of one core)")
+    print(f"turns/s:        {turns / wall:.1f}")
+    print(f"turn latency:   p50 {p50 * 1000:.0f}ms  p99 {p99 * 1000:.0f}ms")
+    print(f"sessions/core:  {args.sessions * wall / cpu:.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+"""
+Cost of tool calling on a model without native tool support, with and
+without the capability cache.
+
+Starts benchmarks/fake_ollama.py with --no-tools, so native tool requests are
+rejected the way Ollama rejects them. Without capability information every
+turn first tries native tools and then retries prompt-based; with the cache
+the model is probed once and later turns go straight to the prompt-based path.
+
+Usage:
+    uv run python benchmarks/capabilities_bench.py --turns 50 --prompt-rate 2000
+"""
+
+import argparse
+import statistics
+import time
+
+import ollama
+import requests
+
+from common import start_fake_ollama
+
+from openmcp.core.capabilities import CapabilityCache, ModelCapabilities
+from openmcp.core.ollama_tools import OllamaToolClient
+
+
+class NoCapabilities(CapabilityCache):
+    """Never knows anything: the client behaves as it did before probing existed"""
+
+    def __init__(self):
+        super().__init__(path=None)
+
+    def get_or_probe(self, client, model):
+        return ModelCapabilities(host='', model=model)
+
+    def record(self, host, model, **features):
+        pass
+
+
+def run(args, base_url: str, capabilities: CapabilityCache):
+    """Returns (LLM requests per turn, per-turn latencies)"""
+    client = OllamaToolClient(model='fake', openmcp_base=base_url, client=ollama.Client(host=base_url),
+                              capabilities=capabilities)
+    client.discover_and_register_tools()
+    before = requests.get(f"{base_url}/api/stats").json()['chat_requests']
+    latencies = []
+    for turn in range(args.turns):
+        start = time.perf_counter()
+        client.chat_with_tools(f"What is 2 plus 3? (turn {turn})")
+        latencies.append(time.perf_counter() - start)
+    requests_made = requests.get(f"{base_url}/api/stats").json()['chat_requests'] - before
+    return requests_made / args.turns, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--turns', type=int, default=50)
+    parser.add_argument('--prompt-rate', type=float, default=2000, help='Simulated prompt tokens per second')
+    parser.add_argument('--token-delay', type=float, default=0.005)
+    args = parser.parse_args()
+
+    server = start_fake_ollama(no_tools=True, prompt_rate=args.prompt_rate, token_delay=args.token_delay)
+    try:
+        for label, capabilities in [('no capability info', NoCapabilities()),
+                                    ('capability cache', CapabilityCache(path=None))]:
+            per_turn, latencies = run(args, server.base_url, capabilities)
+            print(f"{label:>20}: {per_turn:.2f} LLM requests/turn, "
+                  f"turn p50 {statistics.median(latencies) * 1000:.1f} ms, "
+                  f"first turn {latencies[0] * 1000:.1f} ms")
+    finally:
+        server.kill()
+
+
+if __name__ == '__main__':
+    main()
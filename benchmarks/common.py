@@ -0,0 +1,81 @@
+"""
+Shared helpers for the in-process benchmarks.
+"""
+
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import yaml
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+sys.path.append(os.path.join(ROOT_DIR, 'examples'))
+
+CALCULATOR_SPEC = os.path.join(ROOT_DIR, 'specs', 'calculator-api.yaml')
+
+
+def start_calculator(port: int = 0):
+    """Serve the calculator example on a background thread; returns (server, base_url)"""
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    import calculator_api
+
+    class KeepAliveHandler(WSGIRequestHandler):
+        # HTTP/1.1 keeps upstream connections open so connect churn doesn't swamp results
+        protocol_version = 'HTTP/1.1'
+
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server('127.0.0.1', port, calculator_api.app, threaded=True, request_handler=KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def spec_for_upstream(upstream_url: str, spec_path: str = CALCULATOR_SPEC) -> str:
+    """Write a copy of a spec whose server URL points at `upstream_url`"""
+    with open(spec_path) as f:
+        spec = yaml.safe_load(f)
+    spec['servers'] = [{'url': upstream_url}]
+    tmp = tempfile.NamedTemporaryFile('w', suffix='.yaml', delete=False)
+    yaml.safe_dump(spec, tmp)
+    tmp.close()
+    return tmp.name
+
+
+def find_tool(tools, suffix: str) -> str:
+    """Return the name of the first tool ending in `suffix`"""
+    return next(t['name'] for t in tools if t['name'].endswith(suffix))
+
+
+def start_fake_ollama(**options) -> subprocess.Popen:
+    """Run benchmarks/fake_ollama.py in a subprocess; its URL is on `.base_url`
+
+    Keyword options become command-line flags (token_delay=0.01 -> --token-delay 0.01,
+    no_tools=True -> --no-tools).
+    """
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    command = [sys.executable, os.path.join(ROOT_DIR, 'benchmarks', 'fake_ollama.py'), '--port', str(port)]
+    for key, value in options.items():
+        flag = f"--{key.replace('_', '-')}"
+        if value is True:
+            command.append(flag)
+        elif value is not False:
+            command += [flag, str(value)]
+    proc = subprocess.Popen(command)
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            proc.base_url = f"http://127.0.0.1:{port}"
+            return proc
+        except OSError:
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError('fake Ollama server did not start')
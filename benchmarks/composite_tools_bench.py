@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+"""
+Latency of the composite tools in specs/example-api.yaml against one call per
+step, as a model chaining the steps itself would make them.
+
+A local upstream fakes the example API with --latency seconds per request.
+`chained` runs the steps as separate execute calls (the upstream time of a
+model-driven chain, before any LLM turn between the steps); `serial` and
+`parallel` run the composite with max_parallel_steps 1 and 8.
+
+Usage:
+    uv run python benchmarks/composite_tools_bench.py --latency 0.05 --runs 20
+"""
+
+import argparse
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from common import ROOT_DIR, spec_for_upstream
+
+from openmcp.core.executor import ToolExecutor
+from openmcp.core.openapi_parser import tool_name
+from openmcp.core.registry import ToolRegistry
+
+SPEC = f"{ROOT_DIR}/specs/example-api.yaml"
+
+
+def start_upstream(latency: float):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Headers and body in one write; separate small writes stall on delayed ACKs
+        wbufsize = -1
+
+        def _answer(self, data):
+            time.sleep(latency)
+            body = json.dumps(data).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path.startswith('/products/search'):
+                self._answer({'products': [{'id': 'p-1', 'name': 'Widget', 'price': 9.5}], 'total': 1})
+            else:
+                user_id = self.path.rsplit('/', 1)[-1]
+                self._answer({'id': user_id, 'name': 'Ada', 'email': 'ada@example.com'})
+
+        def do_PUT(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            self._answer({'message': 'Preferences updated', 'updated_at': '2024-01-01T00:00:00Z'})
+
+        def do_POST(self):
+            order = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            self._answer({'orderId': 'o-1', 'status': 'pending', 'total': 9.5 * order['items'][0]['quantity']})
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def chained(executor: ToolExecutor, base: str, composite: str, arguments):
+    """The steps one after another, IDs copied between them by hand"""
+    user = executor.execute(tool_name('GET', f"{base}/users/{{userId}}"), {'userId': arguments['userId']},
+                            shape=False).envelope['data']
+    if composite == 'update_user_preferences_checked':
+        return executor.execute(tool_name('PUT', f"{base}/users/{{userId}}/preferences"),
+                                {'userId': user['id'], 'theme': arguments['theme']}).envelope
+    product = executor.execute(tool_name('GET', f"{base}/products/search"), {'query': arguments['query'], 'limit': 1},
+                               shape=False).envelope['data']
+    return executor.execute(tool_name('POST', f"{base}/orders"), {
+        'customerId': user['id'],
+        'items': [{'productId': product['products'][0]['id'], 'quantity': arguments['quantity']}]
+    }).envelope
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.05, help='Upstream seconds per request')
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    upstream, base = start_upstream(args.latency)
+    registry = ToolRegistry()
+    registry.register_spec(spec_for_upstream(base, SPEC))
+    cases = {
+        'update_user_preferences_checked': {'userId': 'u-1', 'theme': 'dark'},
+        'order_first_match': {'userId': 'u-1', 'query': 'widget', 'quantity': 2}
+    }
+    try:
+        print(f"{'composite':34s} {'steps':>5s} {'chained ms':>11s} {'serial ms':>10s} {'parallel ms':>12s}")
+        for name, arguments in cases.items():
+            steps = len(registry.get(name)['composite']['steps'])
+            times = {}
+            for label, workers in (('chained', 8), ('serial', 1), ('parallel', 8)):
+                executor = ToolExecutor(registry, max_parallel_steps=workers)
+                samples = []
+                for _ in range(args.runs):
+                    start = time.perf_counter()
+                    if label == 'chained':
+                        envelope = chained(executor, base, name, arguments)
+                    else:
+                        envelope = executor.execute(name, arguments).envelope
+                    samples.append((time.perf_counter() - start) * 1000)
+                    assert envelope.get('success'), envelope
+                times[label] = statistics.median(samples)
+            print(f"{name:34s} {steps:5d} {times['chained']:11.1f} {times['serial']:10.1f} {times['parallel']:12.1f}")
+        print("\nA model chaining the steps also pays one LLM turn per step beyond the first.")
+    finally:
+        upstream.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python
+"""
+A tiny fake Ollama (plus OpenMCP tools) server for client-side benchmarks.
+
+Speaks just enough HTTP/1.1 for ollama-python and httpx: POST /api/chat
+(streamed NDJSON or a single JSON body), POST /api/show, GET /api/ps,
+GET /api/tools/list and POST /api/tools/execute. Generation is simulated with
+a fixed delay per token and prompt evaluation with a delay per prompt token,
+so client overhead can be measured without a GPU.
+
+Replies follow a fixed script so tool calling is exercised every turn:
+  - a user message with native `tools` -> a `tool_calls` response
+  - a user message in prompt-based mode -> {"tool": ..., "parameters": ...}
+    for the first tool listed in the system prompt
+  - anything after a tool result -> a plain answer
+With --no-tools the model rejects native `tools` like Ollama does for models
+without tool support. --max-concurrent queues requests past a number of
+parallel generations, and --load-delay/--max-loaded simulate a server that
+swaps models in and out of memory.
+
+Usage:
+    python benchmarks/fake_ollama.py --port 11435 --token-delay 0.005
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import time
+from collections import OrderedDict
+
+TOOL = {
+    'name': 'post_fake_calculate_add',
+    'description': 'Add two numbers',
+    'parameters': {
+        'type': 'object',
+        'properties': {'a': {'type': 'number'}, 'b': {'type': 'number'}},
+        'required': ['a', 'b']
+    },
+    'endpoint': {'method': 'POST', 'url': 'http://fake/calculate/add'}
+}
+
+
+class FakeOllama:
+    def __init__(self, token_delay: float, answer_tokens: int, prompt_rate: float, tools: bool = True,
+                 max_concurrent: int = 0, load_delay: float = 0.0, max_loaded: int = 0):
+        self.token_delay = token_delay
+        self.answer_tokens = answer_tokens
+        self.prompt_rate = prompt_rate  # prompt tokens evaluated per second; 0 = instant
+        self.tools = tools
+        self.max_concurrent = max_concurrent  # 0 = unlimited
+        self.load_delay = load_delay  # seconds to load a model that isn't in memory
+        self.max_loaded = max_loaded  # models kept in memory; 0 = unlimited
+        self.loaded: 'OrderedDict[str, None]' = OrderedDict()
+        self.model_loads = 0
+        self.chat_requests = 0
+        self._slots = None
+
+    async def load(self, model: str) -> float:
+        """Seconds spent loading `model`"""
+        if model in self.loaded:
+            self.loaded.move_to_end(model)
+            return 0.0
+        self.loaded[model] = None
+        self.model_loads += 1
+        while self.max_loaded and len(self.loaded) > self.max_loaded:
+            self.loaded.popitem(last=False)
+        if self.load_delay:
+            await asyncio.sleep(self.load_delay)
+        return self.load_delay
+
+    def script(self, request):
+        """Return (content, tool_calls) for a chat request"""
+        messages = request.get('messages', [])
+        last = messages[-1] if messages else {}
+        after_tool = last.get('role') == 'tool' or str(last.get('content', '')).startswith('Tool result')
+        if after_tool:
+            words = ['The', ' answer', ' is', ' 5.'] + [' More'] * max(0, self.answer_tokens - 4)
+            return words, None
+        if request.get('tools'):
+            name = request['tools'][0]['function']['name']
+            return [], [{'function': {'name': name, 'arguments': {'a': 2, 'b': 3}}}]
+        # The first tool listed in the system prompt ("- name(a: number, ...)")
+        system = next((str(m.get('content', '')) for m in messages if m.get('role') == 'system'), '')
+        listed = re.search(r'^- ([\w:{}.-]+)\(', system, re.MULTILINE)
+        call = json.dumps({'tool': listed.group(1) if listed else TOOL['name'], 'parameters': {'a': 2, 'b': 3}})
+        return [call[i:i + 4] for i in range(0, len(call), 4)], None
+
+    def prompt_tokens(self, request) -> int:
+        # Roughly four characters per token
+        return sum(len(str(m.get('content', ''))) for m in request.get('messages', [])) // 4
+
+    async def chat(self, request, write_chunk):
+        if not self.max_concurrent:
+            return await self.generate(request, write_chunk)
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+        async with self._slots:
+            await self.generate(request, write_chunk)
+
+    async def generate(self, request, write_chunk):
+        model = request.get('model', 'fake')
+        load_seconds = await self.load(model)
+        prompt_tokens = self.prompt_tokens(request)
+        prompt_seconds = prompt_tokens / self.prompt_rate if self.prompt_rate else 0.0
+        if prompt_seconds:
+            await asyncio.sleep(prompt_seconds)
+
+        tokens, tool_calls = self.script(request)
+        num_predict = (request.get('options') or {}).get('num_predict')
+        if num_predict:
+            tokens = tokens[:num_predict]
+        stream = request.get('stream', True)
+        start = time.perf_counter()
+        for token in tokens:
+            await asyncio.sleep(self.token_delay)
+            if stream:
+                await write_chunk({'model': model, 'message': {'role': 'assistant', 'content': token}, 'done': False})
+        if tool_calls:
+            await asyncio.sleep(self.token_delay)
+        final = {
+            'model': model,
+            'message': {'role': 'assistant', 'content': '' if stream else ''.join(tokens)},
+            'done': True,
+            'done_reason': 'stop',
+            'load_duration': int(load_seconds * 1e9),
+            'prompt_eval_count': prompt_tokens,
+            'prompt_eval_duration': int(prompt_seconds * 1e9),
+            'eval_count': max(1, len(tokens)),
+            'eval_duration': int((time.perf_counter() - start) * 1e9)
+        }
+        if tool_calls:
+            final['message']['tool_calls'] = tool_calls
+        await write_chunk(final)
+
+
+async def handle(reader, writer, fake: FakeOllama):
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            method, path, _ = request_line.decode().split(' ', 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                key, _, value = line.decode().partition(':')
+                headers[key.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get('content-length', 0)))
+            request = json.loads(body) if body else {}
+
+            if path == '/api/chat':
+                fake.chat_requests += 1
+                streaming = request.get('stream', True)
+                if request.get('tools') and not fake.tools:
+                    respond(writer, {'error': f"{request.get('model')} does not support tools"},
+                            status='400 Bad Request')
+                elif streaming:
+                    writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\n'
+                                 b'Transfer-Encoding: chunked\r\n\r\n')
+
+                    async def write_chunk(obj):
+                        data = (json.dumps(obj) + '\n').encode()
+                        writer.write(b'%x\r\n%s\r\n' % (len(data), data))
+                        await writer.drain()
+
+                    await fake.chat(request, write_chunk)
+                    writer.write(b'0\r\n\r\n')
+                else:
+                    collected = []
+
+                    async def write_chunk(obj):
+                        collected.append(obj)
+
+                    await fake.chat(request, write_chunk)
+                    respond(writer, collected[-1])
+            elif path == '/api/show':
+                capabilities = ['completion', 'tools'] if fake.tools else ['completion']
+                respond(writer, {'capabilities': capabilities, 'details': {'family': 'fake'}, 'model_info': {}})
+            elif path == '/api/stats':
+                respond(writer, {'chat_requests': fake.chat_requests, 'model_loads': fake.model_loads})
+            elif path == '/api/ps':
+                respond(writer, {'models': [{'name': m, 'model': m} for m in fake.loaded]})
+            elif path == '/api/tools/list':
+                respond(writer, {'tools': [TOOL], 'count': 1})
+            elif path == '/api/tools/execute':
+                params = request.get('parameters', {})
+                respond(writer, {'success': True, 'status_code': 200,
+                                 'data': {'result': params.get('a', 0) + params.get('b', 0)}})
+            else:
+                respond(writer, {'error': 'not found'}, status='404 Not Found')
+            await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+def respond(writer, obj, status='200 OK'):
+    data = json.dumps(obj).encode()
+    writer.write(b'HTTP/1.1 %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n%s'
+                 % (status.encode(), len(data), data))
+
+
+async def serve(port: int, fake: FakeOllama):
+    server = await asyncio.start_server(lambda r, w: handle(r, w, fake), '127.0.0.1', port, backlog=4096)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=11435)
+    parser.add_argument('--token-delay', type=float, default=0.005, help='Seconds per generated token')
+    parser.add_argument('--answer-tokens', type=int, default=20)
+    parser.add_argument('--prompt-rate', type=float, default=0, help='Prompt tokens per second (0 = instant)')
+    parser.add_argument('--no-tools', action='store_true', help='Reject native tool calls')
+    parser.add_argument('--max-concurrent', type=int, default=0, help='Parallel generations (0 = unlimited)')
+    parser.add_argument('--load-delay', type=float, default=0, help='Seconds to load a model into memory')
+    parser.add_argument('--max-loaded', type=int, default=0, help='Models kept in memory (0 = unlimited)')
+    args = parser.parse_args()
+    fake = FakeOllama(args.token_delay, args.answer_tokens, args.prompt_rate, tools=not args.no_tools,
+                      max_concurrent=args.max_concurrent, load_delay=args.load_delay, max_loaded=args.max_loaded)
+    asyncio.run(serve(args.port, fake))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+"""
+Turn latency for calculator questions with and without the fast-path router.
+
+Tools come from specs/calculator-api.yaml (with its x-ai-patterns) pointed at
+the calculator example served in-process; the model is
+benchmarks/fake_ollama.py. A share of the messages (--trivial) are plain
+arithmetic the patterns answer; the rest need the model. Without the router
+every message costs the model's tool call plus its follow-up answer.
+
+Usage:
+    uv run python benchmarks/fast_path_bench.py --turns 40 --trivial 0.7
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from common import spec_for_upstream, start_calculator, start_fake_ollama
+
+from openmcp.core.executor import ToolExecutor
+from openmcp.core.fast_path import FastPathRouter
+from openmcp.core.ollama_integration import OllamaConfig, OllamaIntegration
+from openmcp.core.registry import ToolRegistry
+
+TRIVIAL = ["What is {a} plus {b}?", "{a} - {b}", "multiply {a} by {b}", "what's {a} divided by {b}"]
+OTHER = ["Which is bigger, the sum of {a} and {b} or their product?", "Explain what {a} percent of {b} means"]
+
+
+def messages(count: int, trivial: float, seed: int = 7):
+    rng = random.Random(seed)
+    for _ in range(count):
+        templates = TRIVIAL if rng.random() < trivial else OTHER
+        yield rng.choice(templates).format(a=rng.randint(1, 999), b=rng.randint(1, 99))
+
+
+def run(args, base_url: str, executor: ToolExecutor, router):
+    """Returns per-turn (answered by the fast path, seconds)"""
+    chat = OllamaIntegration(OllamaConfig(host=base_url), executor=executor, fast_path=router)
+    chat.discover_tools()
+    turns = []
+    for message in messages(args.turns, args.trivial):
+        chat.reset_conversation()
+        start = time.perf_counter()
+        chat.chat(message)
+        turns.append((chat.last_turn_stats.fast_path is not None, time.perf_counter() - start))
+    return turns
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--turns', type=int, default=40)
+    parser.add_argument('--trivial', type=float, default=0.7, help='Share of plain arithmetic messages')
+    parser.add_argument('--token-delay', type=float, default=0.01, help='Simulated seconds per generated token')
+    args = parser.parse_args()
+
+    calculator, upstream_url = start_calculator()
+    server = start_fake_ollama(token_delay=args.token_delay)
+    try:
+        registry = ToolRegistry()
+        registry.register_spec(spec_for_upstream(upstream_url))
+        executor = ToolExecutor(registry)
+
+        print(f"{'run':10s} {'turns':>6s} {'fast':>5s} {'mean ms':>8s} {'p50 ms':>7s} {'fast ms':>8s} {'model ms':>9s}")
+        router = FastPathRouter(registry)
+        for label, fast_path in (('model', None), ('fast-path', router)):
+            turns = run(args, server.base_url, executor, fast_path)
+            seconds = [t[1] * 1000 for t in turns]
+            fast = [t[1] * 1000 for t in turns if t[0]]
+            slow = [t[1] * 1000 for t in turns if not t[0]]
+            print(f"{label:10s} {len(turns):6d} {len(fast):5d} {statistics.mean(seconds):8.1f} "
+                  f"{statistics.median(seconds):7.1f} {statistics.mean(fast) if fast else 0:8.1f} "
+                  f"{statistics.mean(slow) if slow else 0:9.1f}")
+
+        stats = router.stats()
+        print(f"\nRouter: {stats['hits']}/{stats['messages']} hits ({stats['hit_rate']:.0%}), "
+              f"fallbacks {stats['fallbacks']}, LLM turn baseline {stats['llm_turn_ms'] or 0:.0f} ms, "
+              f"~{stats['latency_saved_ms']:.0f} ms saved")
+        for name, route in stats['routes'].items():
+            if route['hits']:
+                print(f"  {name:28s} {route['hits']:4d} hits {route['mean_ms']:7.2f} ms "
+                      f"{route['latency_saved_ms']:8.0f} ms saved")
+    finally:
+        server.kill()
+        calculator.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+"""
+Prompt-evaluation time per turn over a long conversation, with and without a
+history token budget.
+
+Starts benchmarks/fake_ollama.py in a subprocess with a simulated prompt
+evaluation rate, so the time the model spends reading the prompt grows with
+the prompt like it does on a real server. Each turn makes a prompt-based tool
+call (two LLM calls). The budgeted run uses HistoryManager with its default
+extractive summarizer, which needs no model.
+
+Usage:
+    uv run python benchmarks/history_bench.py --turns 200 --budget 2048
+"""
+
+import argparse
+import statistics
+import time
+
+from common import start_fake_ollama
+
+from openmcp.core.history import HistoryManager
+from openmcp.core.ollama_integration import OllamaConfig, OllamaIntegration
+
+
+def run(args, base_url: str, history):
+    """Run one conversation; returns per-turn (prompt tokens, prompt eval seconds, history length)"""
+    chat = OllamaIntegration(OllamaConfig(host=base_url), openmcp_base=base_url, history=history)
+    chat.discover_tools()
+    turns = []
+    for turn in range(args.turns):
+        for _ in chat.chat_stream(f"What is 2 plus 3? (turn {turn})"):
+            pass
+        stats = chat.last_turn_stats
+        turns.append((stats.prompt_tokens, stats.prompt_eval_time, len(chat.conversation_history)))
+    if history is not None:
+        history.wait()
+    return turns
+
+
+def report(label: str, turns, wall: float):
+    checkpoints = sorted({1, *range(50, len(turns) + 1, 50), len(turns)})
+    print(f"\n{label}")
+    print(f"  {'turn':>6} {'prompt tokens':>14} {'prompt eval ms':>15} {'history msgs':>13}")
+    for turn in checkpoints:
+        tokens, seconds, length = turns[turn - 1]
+        print(f"  {turn:>6} {tokens:>14} {seconds * 1000:>15.1f} {length:>13}")
+    eval_times = [seconds for _, seconds, _ in turns]
+    print(f"  mean prompt eval/turn {statistics.mean(eval_times) * 1000:.1f} ms, "
+          f"total {sum(eval_times):.1f} s, wall {wall:.1f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--turns', type=int, default=200)
+    parser.add_argument('--budget', type=int, default=2048, help='History budget in tokens')
+    parser.add_argument('--prompt-rate', type=float, default=20000, help='Simulated prompt tokens per second')
+    parser.add_argument('--answer-tokens', type=int, default=60, help='Tokens in each final answer')
+    args = parser.parse_args()
+
+    server = start_fake_ollama(token_delay=0, answer_tokens=args.answer_tokens, prompt_rate=args.prompt_rate)
+    try:
+        for label, history in [
+            ('full history', None),
+            (f'budget {args.budget} tokens', HistoryManager(args.budget))
+        ]:
+            start = time.perf_counter()
+            turns = run(args, server.base_url, history)
+            report(label, turns, time.perf_counter() - start)
+    finally:
+        server.kill()
+
+
+if __name__ == '__main__':
+    main()
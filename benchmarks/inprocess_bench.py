@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+"""
+Per-call overhead of executing a tool in-process vs. over HTTP.
+
+Three ways to run the same calculator tool, one after another:
+  direct      plain HTTP call to the calculator upstream (baseline)
+  in-process  ToolExecutor.execute(), as OllamaIntegration(executor=...) does
+  http        POST /api/tools/execute to an OpenMCP server on a local port
+
+Overhead is each mode's latency minus the direct baseline.
+
+Usage:
+    uv run python benchmarks/inprocess_bench.py --calls 2000
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+from common import start_calculator, spec_for_upstream, find_tool
+
+from openmcp.app import create_app
+from openmcp.api.tools_api import executor
+from openmcp.utils import logging as openmcp_logging
+
+
+def start_openmcp(app):
+    """Serve the app on a background thread with keep-alive; returns its base URL"""
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class KeepAliveHandler(WSGIRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+def measure(call, calls: int):
+    """Latencies in microseconds for `calls` sequential invocations"""
+    for _ in range(min(100, calls)):
+        call()  # warm up connections and caches
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=2000)
+    args = parser.parse_args()
+
+    # Keep log files out of the repo and console output off the terminal
+    os.chdir(tempfile.mkdtemp(prefix='openmcp-inproc-'))
+    real_stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+
+    os.environ.setdefault('DEBUG', 'False')
+    os.environ['SLOW_CALL_THRESHOLD_MS'] = '0'
+    _, upstream_url = start_calculator()
+    app = create_app()
+    base_url = start_openmcp(app)
+    executor.registry.register_spec(spec_for_upstream(upstream_url))
+    tool_name = find_tool(executor.registry.summaries(), '_calculate_multiply')
+    parameters = {'a': 6, 'b': 7}
+
+    direct_session = requests.Session()
+    http_session = requests.Session()
+    url = executor.registry.get(tool_name)['endpoint']['url']
+    modes = {
+        'direct': lambda: direct_session.post(url, json=parameters).json(),
+        'in-process': lambda: executor.execute(tool_name, parameters).envelope,
+        'http': lambda: http_session.post(
+            f"{base_url}/api/tools/execute", json={'tool_name': tool_name, 'parameters': parameters}
+        ).json()
+    }
+    results = {mode: measure(call, args.calls) for mode, call in modes.items()}
+    openmcp_logging.shutdown_logging()
+
+    sys.stdout = real_stdout
+    baseline = statistics.median(results['direct'])
+    print(f"In-process vs HTTP tool execution: {args.calls} sequential calls per mode\n")
+    print(f"{'mode':<12}{'p50 us':>10}{'p99 us':>10}{'overhead us':>14}")
+    for mode, samples in results.items():
+        p50 = statistics.median(samples)
+        p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+        print(f"{mode:<12}{p50:>10.0f}{p99:>10.0f}{p50 - baseline:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
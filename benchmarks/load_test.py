@@ -0,0 +1,358 @@
+#!/usr/bin/env python
+"""
+Load generator for end-to-end tool execution through OpenMCP.
+
+Starts OpenMCP and the calculator example as local subprocesses, registers
+the calculator spec and drives /api/tools/execute with either a fixed number
+of concurrent clients (closed loop) or a fixed request rate (open loop).
+
+Examples:
+    uv run python benchmarks/load_test.py --concurrency 16 --duration 30
+    uv run python benchmarks/load_test.py --rate 200 --mix add=3,divide=1
+    uv run python benchmarks/load_test.py --no-start --openmcp-url http://localhost:8000
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import math
+import random
+import subprocess
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import requests
+import yaml
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SPEC = os.path.join(ROOT_DIR, 'specs', 'calculator-api.yaml')
+
+
+@dataclass
+class CallResult:
+    """Outcome of a single execute call"""
+    tool: str
+    latency_ms: float
+    upstream_ms: Optional[float]
+    error: Optional[str] = None
+
+
+@dataclass
+class LoadReport:
+    """Aggregated results of a load run"""
+    results: List[CallResult] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    def add(self, result: CallResult):
+        self.results.append(result)
+
+
+def parse_server_timing(header: str) -> Dict[str, float]:
+    """Parse a Server-Timing header into {metric: duration_ms}"""
+    timings = {}
+    for entry in header.split(','):
+        parts = [p.strip() for p in entry.split(';')]
+        if not parts[0]:
+            continue
+        for part in parts[1:]:
+            if part.startswith('dur='):
+                try:
+                    timings[parts[0]] = float(part[4:])
+                except ValueError:
+                    pass
+    return timings
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(pct / 100 * len(sorted_values)) - 1
+    return sorted_values[max(0, min(len(sorted_values) - 1, rank))]
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """Parse 'add=3,multiply=1' into a weight mapping"""
+    weights = {}
+    for item in mix.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, weight = item.partition('=')
+        weights[name.strip()] = float(weight) if weight else 1.0
+    return weights
+
+
+def resolve_mix(weights: Dict[str, float], tools: List[Dict]) -> List[Tuple[Dict, float]]:
+    """Match mix keys against registered tool names (exact or '_<key>' suffix)"""
+    resolved = []
+    for key, weight in weights.items():
+        matches = [t for t in tools if t['name'] == key or t['name'].endswith(f'_{key}')]
+        if not matches:
+            raise SystemExit(f"No registered tool matches '{key}'")
+        resolved.append((matches[0], weight))
+    return resolved
+
+
+def sample_parameters(tool: Dict) -> Dict:
+    """Generate call parameters from a tool's JSON schema"""
+    params = {}
+    for name, schema in tool.get('parameters', {}).get('properties', {}).items():
+        param_type = schema.get('type')
+        if param_type in ('number', 'integer'):
+            value = random.randint(1, 1000)
+            params[name] = value if param_type == 'integer' else value / 10
+        elif param_type == 'boolean':
+            params[name] = random.choice([True, False])
+        elif 'example' in schema:
+            params[name] = schema['example']
+        else:
+            params[name] = 'test'
+    return params
+
+
+def wait_for(url: str, timeout: float = 15.0):
+    """Poll a URL until it answers 200"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(url, timeout=1).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise SystemExit(f"Service did not become ready: {url}")
+
+
+def start_services(openmcp_port: int, upstream_port: int) -> List[subprocess.Popen]:
+    """Start the calculator upstream and OpenMCP as subprocesses"""
+    env = dict(os.environ, DEBUG='False', API_PORT=str(openmcp_port), PYTHONPATH=ROOT_DIR)
+    upstream = subprocess.Popen(
+        [sys.executable, '-c',
+         'import sys; sys.path.insert(0, "examples"); import calculator_api; '
+         f'calculator_api.app.run(host="127.0.0.1", port={upstream_port}, threaded=True)'],
+        cwd=ROOT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    openmcp = subprocess.Popen(
+        [sys.executable, '-m', 'openmcp.app'],
+        cwd=ROOT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    return [upstream, openmcp]
+
+
+def register_spec(openmcp_url: str, spec_path: str, upstream_url: Optional[str]) -> List[Dict]:
+    """Register the spec (rewriting its server URL if needed) and return the tools"""
+    if upstream_url:
+        with open(spec_path) as f:
+            spec = yaml.safe_load(f)
+        spec['servers'] = [{'url': upstream_url}]
+        tmp = tempfile.NamedTemporaryFile('w', suffix='.yaml', delete=False)
+        yaml.safe_dump(spec, tmp)
+        tmp.close()
+        spec_path = tmp.name
+
+    response = requests.post(f"{openmcp_url}/api/discovery/register", json={'spec_path': spec_path})
+    response.raise_for_status()
+    return requests.get(f"{openmcp_url}/api/tools/list").json()['tools']
+
+
+def execute_once(session: requests.Session, openmcp_url: str, tool: Dict,
+                 scheduled: Optional[float] = None) -> CallResult:
+    """Execute one tool call; latency counts from the scheduled time if given"""
+    start = scheduled if scheduled is not None else time.perf_counter()
+    try:
+        response = session.post(
+            f"{openmcp_url}/api/tools/execute",
+            json={'tool_name': tool['name'], 'parameters': sample_parameters(tool)}
+        )
+        latency_ms = (time.perf_counter() - start) * 1000
+        upstream_ms = parse_server_timing(response.headers.get('Server-Timing', '')).get('upstream')
+
+        error = None
+        if response.status_code != 200:
+            error = f"http_{response.status_code}"
+        else:
+            body = response.json()
+            if not body.get('success'):
+                error = f"upstream_{body.get('status_code', 'error')}"
+        return CallResult(tool['name'], latency_ms, upstream_ms, error)
+    except requests.RequestException as e:
+        latency_ms = (time.perf_counter() - start) * 1000
+        return CallResult(tool['name'], latency_ms, None, type(e).__name__)
+
+
+def run_closed_loop(openmcp_url: str, mix: List[Tuple[Dict, float]],
+                    concurrency: int, duration: float) -> LoadReport:
+    """Each of `concurrency` workers issues its next call as soon as the previous returns"""
+    report = LoadReport()
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+    tools = [t for t, _ in mix]
+    weights = [w for _, w in mix]
+
+    def worker():
+        session = requests.Session()
+        local = []
+        while time.perf_counter() < deadline:
+            tool = random.choices(tools, weights)[0]
+            local.append(execute_once(session, openmcp_url, tool))
+        with lock:
+            report.results.extend(local)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    report.elapsed = time.perf_counter() - start
+    return report
+
+
+def run_open_loop(openmcp_url: str, mix: List[Tuple[Dict, float]],
+                  rate: float, duration: float, max_workers: int) -> LoadReport:
+    """Issue calls on a fixed schedule regardless of how fast they complete.
+
+    Latency is measured from each call's scheduled start, so queueing in the
+    client pool shows up in the numbers instead of being hidden.
+    """
+    report = LoadReport()
+    lock = threading.Lock()
+    tools = [t for t, _ in mix]
+    weights = [w for _, w in mix]
+    sessions = threading.local()
+
+    def fire(tool, scheduled):
+        if not hasattr(sessions, 'session'):
+            sessions.session = requests.Session()
+        result = execute_once(sessions.session, openmcp_url, tool, scheduled)
+        with lock:
+            report.add(result)
+
+    interval = 1.0 / rate
+    total = int(rate * duration)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for i in range(total):
+            scheduled = start + i * interval
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(fire, random.choices(tools, weights)[0], scheduled)
+    report.elapsed = time.perf_counter() - start
+    return report
+
+
+def summarize(report: LoadReport) -> Dict:
+    """Compute throughput, latency percentiles and the error breakdown"""
+    results = report.results
+    ok = [r for r in results if r.error is None]
+    latencies = sorted(r.latency_ms for r in ok)
+    timed = [r for r in ok if r.upstream_ms is not None]
+    upstream = sorted(r.upstream_ms for r in timed)
+    overhead = sorted(r.latency_ms - r.upstream_ms for r in timed)
+
+    def dist(values):
+        return {
+            'mean': sum(values) / len(values) if values else 0.0,
+            'p50': percentile(values, 50),
+            'p90': percentile(values, 90),
+            'p99': percentile(values, 99),
+            'p99.9': percentile(values, 99.9),
+            'max': values[-1] if values else 0.0
+        }
+
+    return {
+        'requests': len(results),
+        'succeeded': len(ok),
+        'elapsed_s': report.elapsed,
+        'throughput_rps': len(results) / report.elapsed if report.elapsed else 0.0,
+        'latency_ms': dist(latencies),
+        'upstream_ms': dist(upstream),
+        'openmcp_overhead_ms': dist(overhead),
+        'errors': dict(Counter(r.error for r in results if r.error)),
+        'per_tool': dict(Counter(r.tool for r in results))
+    }
+
+
+def print_summary(summary: Dict):
+    """Render the summary as a plain-text table"""
+    print(f"\nRequests:    {summary['requests']} ({summary['succeeded']} ok) in {summary['elapsed_s']:.1f}s")
+    print(f"Throughput:  {summary['throughput_rps']:.1f} req/s")
+    print(f"\n{'latency (ms)':<22}{'mean':>9}{'p50':>9}{'p90':>9}{'p99':>9}{'p99.9':>9}{'max':>9}")
+    for label, key in [('end-to-end', 'latency_ms'), ('upstream', 'upstream_ms'),
+                       ('openmcp overhead', 'openmcp_overhead_ms')]:
+        d = summary[key]
+        print(f"{label:<22}" + "".join(f"{d[k]:>9.2f}" for k in ['mean', 'p50', 'p90', 'p99', 'p99.9', 'max']))
+    print("\nTool mix:")
+    for tool, count in summary['per_tool'].items():
+        print(f"  {tool}: {count}")
+    if summary['errors']:
+        print("\nErrors:")
+        for error, count in sorted(summary['errors'].items(), key=lambda e: -e[1]):
+            print(f"  {error}: {count}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--openmcp-url', help='Use an already running OpenMCP instead of starting one')
+    parser.add_argument('--openmcp-port', type=int, default=5105)
+    parser.add_argument('--upstream-port', type=int, default=5101)
+    parser.add_argument('--no-start', action='store_true', help='Do not start any services')
+    parser.add_argument('--spec', default=DEFAULT_SPEC)
+    parser.add_argument('--mix', default='add=1,subtract=1,multiply=1,divide=1',
+                        help='Comma-separated tool=weight pairs (tool name or suffix)')
+    parser.add_argument('--concurrency', type=int, default=8, help='Closed-loop worker count')
+    parser.add_argument('--rate', type=float, help='Open-loop request rate (req/s); overrides --concurrency')
+    parser.add_argument('--max-workers', type=int, default=256, help='Open-loop client pool size')
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--warmup', type=float, default=1.0)
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    args = parser.parse_args()
+
+    openmcp_url = args.openmcp_url or f"http://127.0.0.1:{args.openmcp_port}"
+    upstream_url = None
+    processes = []
+
+    try:
+        if not args.no_start and not args.openmcp_url:
+            processes = start_services(args.openmcp_port, args.upstream_port)
+            upstream_url = f"http://127.0.0.1:{args.upstream_port}"
+            wait_for(f"{upstream_url}/health")
+        wait_for(f"{openmcp_url}/health")
+
+        tools = register_spec(openmcp_url, args.spec, upstream_url)
+        mix = resolve_mix(parse_mix(args.mix), tools)
+
+        if args.warmup > 0:
+            run_closed_loop(openmcp_url, mix, min(args.concurrency, 4), args.warmup)
+
+        if args.rate:
+            report = run_open_loop(openmcp_url, mix, args.rate, args.duration, args.max_workers)
+        else:
+            report = run_closed_loop(openmcp_url, mix, args.concurrency, args.duration)
+
+        summary = summarize(report)
+        if args.json:
+            print(json.dumps(summary, indent=2))
+        else:
+            mode = f"open loop @ {args.rate:g} req/s" if args.rate else f"closed loop x{args.concurrency}"
+            print(f"OpenMCP load test: {mode}, {args.duration:g}s")
+            print_summary(summary)
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait(timeout=5)
+
+
+if __name__ == "__main__":
+    main()
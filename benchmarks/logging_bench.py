@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+"""
+Compare the legacy synchronous logging setup with the queue-based pipeline.
+
+Two measurements per mode:
+  1. /api/tools/execute throughput against the calculator example
+  2. raw cost of a log call on the request path, from several threads
+
+The queue pipeline moves formatting and file I/O to a writer thread, so the
+caller-side cost drops; end-to-end throughput gains depend on having spare
+cores and on how slow the log disk is.
+
+Usage:
+    uv run python benchmarks/logging_bench.py --threads 8 --duration 5
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+
+from common import start_calculator, spec_for_upstream, find_tool
+
+from openmcp.app import create_app
+from openmcp.utils import logging as openmcp_logging
+
+
+def legacy_setup_logging(app):
+    """The synchronous setup OpenMCP used before the queue pipeline"""
+    file_handler = RotatingFileHandler('logs/openmcp.log', maxBytes=10240000, backupCount=10)
+    file_handler.setFormatter(logging.Formatter('[%(asctime)s] %(levelname)s in %(module)s: %(message)s'))
+    file_handler.setLevel(logging.INFO)
+
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
+    console_handler.setLevel(logging.INFO)
+
+    app.logger.addHandler(file_handler)
+    app.logger.addHandler(console_handler)
+    app.logger.setLevel(logging.INFO)
+    werkzeug_logger = logging.getLogger('werkzeug')
+    werkzeug_logger.addHandler(file_handler)
+    werkzeug_logger.addHandler(console_handler)
+    werkzeug_logger.setLevel(logging.WARNING)
+    return [file_handler, console_handler]
+
+
+def configure(app, mode: str):
+    """Switch the app between 'legacy' and 'queue' logging"""
+    openmcp_logging.shutdown_logging()
+    for handler in list(app.logger.handlers):
+        app.logger.removeHandler(handler)
+        handler.close()
+    if mode == 'legacy':
+        legacy_setup_logging(app)
+    else:
+        openmcp_logging.setup_logging(app)
+
+
+def run_threads(threads: int, duration: float, work) -> int:
+    """Run `work()` in a loop on each thread until the deadline; return total iterations"""
+    deadline = time.perf_counter() + duration
+    counts = [0] * threads
+
+    def worker(index):
+        while time.perf_counter() < deadline:
+            work()
+            counts[index] += 1
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return sum(counts)
+
+
+def bench_log_calls(app, threads: int, duration: float) -> float:
+    """Microseconds per log call as seen by the calling thread"""
+    extra = {'tool': 'bench_tool', 'latency_ms': 1.234, 'outcome': 'success'}
+    calls = run_threads(threads, duration, lambda: app.logger.info('Tool executed', extra=extra))
+    return duration * threads / calls * 1e6
+
+
+def bench_execute(app, tool_name: str, threads: int, duration: float) -> float:
+    """Execute requests per second"""
+    local = threading.local()
+
+    def call():
+        if not hasattr(local, 'client'):
+            local.client = app.test_client()
+        local.client.post('/api/tools/execute', json={'tool_name': tool_name, 'parameters': {'a': 6, 'b': 7}})
+
+    return run_threads(threads, duration, call) / duration
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--rounds', type=int, default=3, help='Alternating rounds per mode; medians are reported')
+    args = parser.parse_args()
+
+    # Keep log files out of the repo and console output off the terminal
+    os.chdir(tempfile.mkdtemp(prefix='openmcp-logbench-'))
+    real_stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+
+    os.environ.setdefault('DEBUG', 'False')
+    os.environ['SLOW_CALL_THRESHOLD_MS'] = '0'
+    _, upstream_url = start_calculator()
+    app = create_app()
+    client = app.test_client()
+    client.post('/api/discovery/register', json={'spec_path': spec_for_upstream(upstream_url)})
+    tool_name = find_tool(client.get('/api/tools/list').json['tools'], '_calculate_multiply')
+
+    # Alternate modes so machine noise hits both equally
+    samples = {'legacy': [], 'queue': []}
+    for _ in range(args.rounds):
+        for mode in samples:
+            configure(app, mode)
+            bench_execute(app, tool_name, args.threads, 0.5)  # warm up
+            # Execute first: the log-call burst leaves a backlog in the queue
+            # that would otherwise drain during the execute measurement
+            rps = bench_execute(app, tool_name, args.threads, args.duration)
+            samples[mode].append((bench_log_calls(app, args.threads, args.duration), rps))
+    openmcp_logging.shutdown_logging()
+
+    sys.stdout = real_stdout
+    print(f"Logging benchmark: {args.threads} threads, {args.duration:g}s x {args.rounds} rounds (medians)\n")
+    print(f"{'mode':<10}{'us/log call':>14}{'execute req/s':>16}")
+    for mode, runs in samples.items():
+        per_call = statistics.median(r[0] for r in runs)
+        rps = statistics.median(r[1] for r in runs)
+        print(f"{mode:<10}{per_call:>14.2f}{rps:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
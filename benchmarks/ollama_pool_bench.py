@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+"""
+Round-robin versus the least-loaded, model-affine OllamaPool.
+
+Starts several benchmarks/fake_ollama.py servers that each run a limited
+number of generations at once and hold one model in memory, so sending a
+model to a host that has another one loaded costs a simulated model load.
+Worker threads chat with a random model from --models; the same request mix
+is sent once spread round-robin over the hosts and once through the pool.
+With --dead-host one extra host that refuses connections is added to both.
+
+Usage:
+    uv run python benchmarks/ollama_pool_bench.py --hosts 3 --workers 6 --requests 120 --dead-host
+"""
+
+import argparse
+import itertools
+import random
+import socket
+import statistics
+import threading
+import time
+
+import ollama
+import requests
+
+from common import start_fake_ollama
+
+from openmcp.core.ollama_pool import OllamaPool
+
+MESSAGES = [{'role': 'user', 'content': 'What is 2 plus 3?'}]
+
+
+class RoundRobin:
+    """The baseline: each request goes to the next host in turn"""
+
+    def __init__(self, hosts):
+        self.clients = [ollama.Client(host=host) for host in hosts]
+        self._next = itertools.cycle(self.clients)
+        self._lock = threading.Lock()
+
+    def chat(self, **request):
+        with self._lock:
+            client = next(self._next)
+        return client.chat(**request)
+
+
+def unused_url() -> str:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return f"http://127.0.0.1:{s.getsockname()[1]}"
+
+
+def run(args, client, models):
+    """Returns (wall seconds, latencies, errors)"""
+    plan = [models[i % len(models)] for i in range(args.requests)]
+    random.Random(args.seed).shuffle(plan)
+    plan_lock = threading.Lock()
+    latencies, errors = [], []
+
+    def worker():
+        while True:
+            with plan_lock:
+                if not plan:
+                    return
+                model = plan.pop()
+            start = time.perf_counter()
+            try:
+                client.chat(model=model, messages=MESSAGES)
+                latencies.append(time.perf_counter() - start)
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(args.workers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, latencies, errors
+
+
+def model_loads(servers) -> int:
+    return sum(requests.get(f"{s.base_url}/api/stats").json()['model_loads'] for s in servers)
+
+
+def report(label, wall, latencies, errors, loads):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0.0
+    print(f"{label:12s} {len(latencies) / wall:8.1f} {statistics.median(latencies) * 1000:9.0f} "
+          f"{p95 * 1000:9.0f} {loads:6d} {len(errors):7d}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--hosts', type=int, default=3)
+    parser.add_argument('--models', type=int, default=2, help='Distinct models in the request mix')
+    parser.add_argument('--workers', type=int, default=6)
+    parser.add_argument('--requests', type=int, default=120)
+    parser.add_argument('--max-concurrent', type=int, default=2, help='Generations per host at once')
+    parser.add_argument('--load-delay', type=float, default=0.5, help='Seconds to swap a model in')
+    parser.add_argument('--token-delay', type=float, default=0.005)
+    parser.add_argument('--dead-host', action='store_true', help='Add a host that refuses connections')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    models = [f"model-{i}" for i in range(args.models)]
+    print(f"{args.hosts} hosts x {args.max_concurrent} slots, {args.models} models, "
+          f"{args.workers} workers, {args.requests} requests"
+          + (', plus one dead host' if args.dead_host else ''))
+    print(f"{'routing':12s} {'req/s':>8s} {'p50 ms':>9s} {'p95 ms':>9s} {'loads':>6s} {'errors':>7s}")
+    for label in ('round-robin', 'pool'):
+        servers = [start_fake_ollama(token_delay=args.token_delay, max_concurrent=args.max_concurrent,
+                                     load_delay=args.load_delay, max_loaded=1)
+                   for _ in range(args.hosts)]
+        hosts = [server.base_url for server in servers] + ([unused_url()] if args.dead_host else [])
+        try:
+            if label == 'pool':
+                client = OllamaPool(hosts, max_concurrency=args.max_concurrent, health_interval=1)
+            else:
+                client = RoundRobin(hosts)
+            wall, latencies, errors = run(args, client, models)
+            report(label, wall, latencies, errors, model_loads(servers))
+            if label == 'pool':
+                for backend in client.stats():
+                    print(f"  {backend['host']}: {backend['requests']} requests, "
+                          f"models {backend['loaded_models']}, healthy={backend['healthy']}")
+        finally:
+            for server in servers:
+                server.kill()
+
+
+if __name__ == "__main__":
+    main()
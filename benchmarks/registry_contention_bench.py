@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+"""
+Registry reads under a steady writer: copy-on-write snapshots against a
+dict guarded by one lock, and against a bare dict.
+
+--readers threads loop over a mix of reads for --seconds: a tool lookup
+(what /execute does) and, every --list-every reads, a walk over the whole
+catalog (what /list and /discovery/tools do). One writer replaces a tool
+every --write-interval seconds. `locked` holds a global lock for every
+read and write, as a thread-safe plain dict would have to; `unlocked`
+takes none and counts the reads that fail with "dictionary changed size
+during iteration". Snapshots also keep the walked catalog (the summaries)
+per version, so walks between writes cost a list copy.
+
+Usage:
+    uv run python benchmarks/registry_contention_bench.py --tools 2000 --readers 16 --seconds 5
+"""
+
+import argparse
+import statistics
+import threading
+import time
+
+from tool_discovery_bench import synthetic_tool
+
+from openmcp.core.registry import ToolRegistry, summary
+
+
+class LockedRegistry:
+    """The alternative to snapshots: one lock around a mutable dict"""
+
+    def __init__(self, locking: bool = True):
+        self.tools = {}
+        self.lock = threading.Lock() if locking else None
+
+    def store(self, tool_def):
+        if self.lock is None:
+            self.tools[tool_def['name']] = tool_def
+            return
+        with self.lock:
+            self.tools[tool_def['name']] = tool_def
+
+    def get(self, name):
+        if self.lock is None:
+            return self.tools.get(name)
+        with self.lock:
+            return self.tools.get(name)
+
+    def summaries(self):
+        if self.lock is None:
+            return [summary(name, tool) for name, tool in self.tools.items()]
+        with self.lock:
+            return [summary(name, tool) for name, tool in self.tools.items()]
+
+
+def run(registry, args, names):
+    stop = threading.Event()
+    reads = [0] * args.readers
+    errors = [0] * args.readers
+    write_seconds = []
+
+    def reader(index):
+        count = 0
+        while not stop.is_set():
+            count += 1
+            try:
+                if count % args.list_every == 0:
+                    registry.summaries()
+                else:
+                    registry.get(names[count % len(names)])
+            except RuntimeError:
+                errors[index] += 1
+        reads[index] = count
+
+    def writer():
+        revision = 0
+        while not stop.is_set():
+            revision += 1
+            # Add a tool and replace one, so the catalog changes size
+            tool = synthetic_tool(args.tools + revision % 2, revision)
+            start = time.perf_counter()
+            registry.store(tool)
+            write_seconds.append(time.perf_counter() - start)
+            time.sleep(args.write_interval)
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(args.readers)]
+    threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    write_seconds.sort()
+    return (sum(reads) / args.seconds, sum(errors), len(write_seconds),
+            statistics.median(write_seconds) * 1000, write_seconds[int(len(write_seconds) * 0.99)] * 1000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tools', type=int, default=2000)
+    parser.add_argument('--readers', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--list-every', type=int, default=50, help='One catalog walk per N reads')
+    parser.add_argument('--write-interval', type=float, default=0.01)
+    args = parser.parse_args()
+
+    tools = [synthetic_tool(i) for i in range(args.tools)]
+    names = [tool['name'] for tool in tools]
+    print(f"{args.tools} tools, {args.readers} readers, one write every {args.write_interval * 1000:g} ms\n")
+    print(f"{'registry':10s} {'reads/s':>10s} {'errors':>7s} {'writes':>7s} {'write p50 ms':>13s} {'write p99 ms':>13s}")
+    for label, registry in (('snapshots', ToolRegistry()), ('locked', LockedRegistry()),
+                            ('unlocked', LockedRegistry(locking=False))):
+        for tool in tools:
+            registry.store(tool)
+        reads_per_second, errors, writes, p50, p99 = run(registry, args, names)
+        print(f"{label:10s} {reads_per_second:10.0f} {errors:7d} {writes:7d} {p50:13.3f} {p99:13.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+"""
+Replaying an evaluation suite with the exact-match response cache.
+
+Starts benchmarks/fake_ollama.py and runs --prompts distinct one-shot
+questions (each makes a prompt-based tool call) --passes times through
+OllamaIntegration at temperature 0 with a ResponseCache. The first pass fills
+the cache, later passes are answered from it. With --path the cache is kept in
+SQLite and a fresh cache instance is used for every pass, as separate
+evaluation runs would.
+
+Usage:
+    uv run python benchmarks/response_cache_bench.py --prompts 50 --passes 3
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from common import start_fake_ollama
+
+from openmcp.core.ollama_integration import OllamaConfig, OllamaIntegration
+from openmcp.core.response_cache import ResponseCache
+
+
+def run_pass(args, base_url: str, cache: ResponseCache, temperature: float) -> float:
+    config = OllamaConfig(host=base_url, temperature=temperature)
+    start = time.perf_counter()
+    for i in range(args.prompts):
+        # A fresh conversation per question, like an eval harness
+        chat = OllamaIntegration(config, openmcp_base=base_url, response_cache=cache)
+        chat.discover_tools()
+        if args.stream:
+            for _ in chat.chat_stream(f"What is 2 plus {i}?"):
+                pass
+        else:
+            chat.chat(f"What is 2 plus {i}?")
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--prompts', type=int, default=50)
+    parser.add_argument('--passes', type=int, default=3)
+    parser.add_argument('--stream', action='store_true')
+    parser.add_argument('--persist', action='store_true', help='SQLite-backed cache, new instance per pass')
+    parser.add_argument('--token-delay', type=float, default=0.005)
+    parser.add_argument('--prompt-rate', type=float, default=2000)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'llm_cache.sqlite') if args.persist else None
+    server = start_fake_ollama(token_delay=args.token_delay, prompt_rate=args.prompt_rate)
+    try:
+        cache = ResponseCache(path=path)
+        seconds = run_pass(args, server.base_url, ResponseCache(), temperature=0.7)
+        print(f"temperature 0.7 (bypassed): {seconds / args.prompts * 1000:7.1f} ms/question")
+        for n in range(args.passes):
+            if path:
+                cache = ResponseCache(path=path)
+            seconds = run_pass(args, server.base_url, cache, temperature=0)
+            stats = cache.stats()
+            print(f"temperature 0, pass {n + 1}:   {seconds / args.prompts * 1000:7.1f} ms/question, "
+                  f"hit rate {stats['hit_rate']:.0%} ({stats['hits']} hits, {stats['misses']} misses)")
+    finally:
+        server.kill()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+"""
+Bytes on the wire and encode time of /api/tools/list for a large catalog,
+per JSON codec, body format and content coding.
+
+The catalog holds --tools synthetic tools. `encode` rows time turning the
+catalog into a body (serialize, then compress); `served` rows time whole
+requests through the Flask test client, where the first request at a
+catalog version builds the body and later ones reuse it. zstd and msgpack
+rows only appear when zstandard and msgpack are installed.
+
+Usage:
+    uv run python benchmarks/response_encoding_bench.py --tools 10000 --runs 10
+"""
+
+import argparse
+import json
+import os
+import statistics
+import time
+
+from tool_discovery_bench import synthetic_tool
+
+from openmcp.app import create_app
+from openmcp.core.registry import registry
+from openmcp.utils.encoding import JSON_CODECS, compress, msgpack, zstandard
+
+
+def timed(function, runs: int):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = function()
+        samples.append((time.perf_counter() - start) * 1000)
+    return result, statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tools', type=int, default=10000)
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    # The synthetic tools point at hosts that don't exist; keep the health probes from hiding them
+    os.environ.setdefault('UPSTREAM_HEALTH_CHECKS', 'False')
+    app = create_app()
+    registry.store_many([synthetic_tool(i) for i in range(args.tools)])
+    summaries = registry.summaries()
+    catalog = {'tools': summaries, 'count': len(summaries), 'catalog_version': registry.version}
+
+    rows = []
+    # What jsonify sent before: indented in debug mode
+    body, ms = timed(lambda: json.dumps(catalog, indent=2).encode(), args.runs)
+    rows.append(('encode', 'json, indented', len(body), ms))
+    bodies = {}
+    for name, (dumps, _) in JSON_CODECS.items():
+        bodies[name], ms = timed(lambda: dumps(catalog, app.json.default), args.runs)
+        rows.append(('encode', f'{name}, compact', len(bodies[name]), ms))
+    fastest = app.json.codec_name
+    if msgpack is not None:
+        bodies['msgpack'], ms = timed(lambda: msgpack.packb(catalog), args.runs)
+        rows.append(('encode', 'msgpack', len(bodies['msgpack']), ms))
+
+    formats = [fastest] + (['msgpack'] if msgpack is not None else [])
+    codings = [('gzip', 1), ('gzip', 6)] + ([('zstd', 3)] if zstandard is not None else [])
+    for fmt in formats:
+        for coding, level in codings:
+            def encode():
+                raw = bodies[fmt] if fmt == 'msgpack' else JSON_CODECS[fmt][0](catalog, app.json.default)
+                return compress(raw, coding, gzip_level=level, zstd_level=level)
+            body, ms = timed(encode, args.runs)
+            rows.append(('encode', f'{fmt} + {coding}-{level}', len(body), ms))
+
+    client = app.test_client()
+    cases = [('identity', {})]
+    cases += [(coding, {'Accept-Encoding': coding}) for coding in ('gzip', 'zstd')
+              if coding == 'gzip' or zstandard is not None]
+    if msgpack is not None:
+        cases.append(('msgpack + gzip', {'Accept': 'application/msgpack', 'Accept-Encoding': 'gzip'}))
+    for label, headers in cases:
+        # A new version: the first request builds and caches the body
+        registry.store(synthetic_tool(0, registry.version))
+        response, first = timed(lambda: client.get('/api/tools/list', headers=headers), 1)
+        response, cached = timed(lambda: client.get('/api/tools/list', headers=headers), args.runs)
+        assert response.status_code == 200
+        rows.append(('served', f'{label}, first', len(response.data), first))
+        rows.append(('served', f'{label}, cached', len(response.data), cached))
+
+    print(f"{args.tools} tools, JSON codec {fastest}\n")
+    print(f"{'':7s} {'representation':28s} {'KiB':>9s} {'ms':>8s}")
+    for kind, label, size, ms in rows:
+        print(f"{kind:7s} {label:28s} {size / 1024:9.1f} {ms:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
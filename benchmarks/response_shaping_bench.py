@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+"""
+Prompt size and turn time when a tool returns a large result, with and
+without response shaping.
+
+A local upstream answers the tool with a search-style JSON document of
+--results items. The model is benchmarks/fake_ollama.py with a simulated
+prompt evaluation rate, so the second LLM call of each turn (the one that
+reads the tool result) costs time in proportion to the result's size. The
+`limits` run only applies the item and token limits; the `fields` run also
+declares `response_shape` fields like `x-ai-response-fields` in a spec would.
+
+Usage:
+    uv run python benchmarks/response_shaping_bench.py --results 500 --prompt-rate 5000
+"""
+
+import argparse
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from common import start_fake_ollama
+
+from openmcp.core.executor import ToolExecutor
+from openmcp.core.history import estimate_tokens
+from openmcp.core.ollama_integration import OllamaConfig, OllamaIntegration
+from openmcp.core.registry import ToolRegistry
+
+# The tool the fake model always calls in prompt-based mode
+TOOL_NAME = 'post_fake_calculate_add'
+
+
+def search_results(count: int):
+    return {
+        'query': 'fake',
+        'total': count,
+        'results': [
+            {
+                'id': i,
+                'title': f"Result {i}",
+                'url': f"https://example.com/{i}",
+                'snippet': 'Lorem ipsum dolor sit amet, consectetur adipiscing elit. ' * 3,
+                'score': 1.0 / (i + 1),
+                'metadata': {'crawled': '2024-01-01T00:00:00Z', 'lang': 'en', 'tags': ['a', 'b', 'c']}
+            }
+            for i in range(count)
+        ]
+    }
+
+
+def start_upstream(body: bytes):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def run(args, base_url: str, executor: ToolExecutor):
+    """Returns per-turn (prompt tokens over both LLM calls, turn seconds)"""
+    chat = OllamaIntegration(OllamaConfig(host=base_url), executor=executor)
+    chat.discover_tools()
+    turns = []
+    for turn in range(args.turns):
+        chat.reset_conversation()
+        start = time.perf_counter()
+        for _ in chat.chat_stream(f"Search for fake things (turn {turn})"):
+            pass
+        turns.append((chat.last_turn_stats.prompt_tokens, time.perf_counter() - start))
+    return turns
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--results', type=int, default=500, help='Items in the upstream result')
+    parser.add_argument('--turns', type=int, default=5)
+    parser.add_argument('--prompt-rate', type=float, default=5000, help='Simulated prompt tokens per second')
+    parser.add_argument('--max-items', type=int, default=50)
+    parser.add_argument('--max-tokens', type=int, default=4000)
+    args = parser.parse_args()
+
+    data = search_results(args.results)
+    body = json.dumps(data).encode()
+    upstream, upstream_url = start_upstream(body)
+    server = start_fake_ollama(prompt_rate=args.prompt_rate, token_delay=0.001)
+    try:
+        print(f"Upstream result: {len(body) / 1024:.0f} KiB, ~{estimate_tokens(json.dumps(data, indent=2))} tokens "
+              f"as indented JSON, ~{estimate_tokens(body.decode())} compact")
+        print(f"{'run':8s} {'prompt tokens':>14s} {'turn ms':>9s} {'shape ms':>9s}")
+        for label in ('raw', 'limits', 'fields'):
+            registry = ToolRegistry()
+            tool = {
+                'name': TOOL_NAME,
+                'description': 'Search for things',
+                'parameters': {'type': 'object', 'properties': {'a': {'type': 'number'}, 'b': {'type': 'number'}}},
+                'endpoint': {'method': 'POST', 'url': f"{upstream_url}/search"}
+            }
+            if label == 'raw':
+                executor = ToolExecutor(registry)
+            else:
+                executor = ToolExecutor(registry, result_max_items=args.max_items, result_max_tokens=args.max_tokens)
+            if label == 'fields':
+                tool['response_shape'] = {'fields': ['/total', '/results/*/title', '/results/*/url']}
+            registry.store(tool)
+
+            shape_times = []
+            for _ in range(args.turns):
+                result = executor.execute(TOOL_NAME, {'a': 2, 'b': 3})
+                shape_times.append(result.timer.as_dict().get('shape', 0.0))
+            turns = run(args, server.base_url, executor)
+            print(f"{label:8s} {statistics.mean(t[0] for t in turns):14.0f} "
+                  f"{statistics.mean(t[1] for t in turns) * 1000:9.0f} {statistics.mean(shape_times):9.2f}")
+    finally:
+        server.kill()
+        upstream.shutdown()
+
+
+if __name__ == "__main__":
+    main()
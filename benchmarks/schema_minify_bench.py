@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+"""
+Prompt tokens spent on tool definitions, full versus minified, for every
+spec in specs/.
+
+"native" is the JSON tool list sent with each native tool-calling request;
+"prompt" is the tool list in the prompt-based system prompt. Tokens are the
+usual four-characters-per-token estimate.
+
+Usage:
+    uv run python benchmarks/schema_minify_bench.py
+"""
+
+import argparse
+import glob
+import json
+import os
+import time
+
+from common import ROOT_DIR
+
+from openmcp.core.history import estimate_tokens
+from openmcp.core.ollama_tools import Tool
+from openmcp.core.registry import ToolRegistry
+from openmcp.core.schema_minifier import PromptCatalog
+
+
+def native_tokens(tools) -> int:
+    return estimate_tokens(json.dumps([tool.to_ollama_format() for tool in tools]))
+
+
+def prompt_tokens(tools) -> int:
+    lines = []
+    for tool in tools:
+        params = tool['parameters'].get('properties', {})
+        param_str = ", ".join(f"{k}: {v.get('type', 'any')}" for k, v in params.items())
+        lines.append(f"- {tool['name']}({param_str}): {tool['description']}")
+    return estimate_tokens('\n'.join(lines))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--specs', default=os.path.join(ROOT_DIR, 'specs', '*.yaml'))
+    args = parser.parse_args()
+
+    print(f"{'spec':28s} {'tools':>5s} {'native full':>11s} {'minified':>9s} {'saved':>6s} "
+          f"{'prompt full':>11s} {'minified':>9s} {'saved':>6s} {'build ms':>9s}")
+    totals = [0, 0, 0, 0]
+    for path in sorted(glob.glob(args.specs)):
+        registry = ToolRegistry()
+        registry.register_spec(path)
+        summaries = registry.summaries()
+        start = time.perf_counter()
+        catalog = PromptCatalog.build(summaries)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        full = [Tool(t['name'], t['description'], t['parameters']) for t in summaries]
+        minified = [Tool(t['name'], t['description'], t['parameters']) for t in catalog.tools]
+        row = [native_tokens(full), native_tokens(minified), prompt_tokens(summaries), prompt_tokens(catalog.tools)]
+        totals = [total + value for total, value in zip(totals, row)]
+        print(f"{os.path.basename(path):28s} {len(summaries):5d} {row[0]:11d} {row[1]:9d} "
+              f"{1 - row[1] / row[0]:6.0%} {row[2]:11d} {row[3]:9d} {1 - row[3] / row[2]:6.0%} {build_ms:9.2f}")
+    print(f"{'total':28s} {'':5s} {totals[0]:11d} {totals[1]:9d} {1 - totals[1] / totals[0]:6.0%} "
+          f"{totals[2]:11d} {totals[3]:9d} {1 - totals[3] / totals[2]:6.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+"""
+Cost of re-discovering tools: full list downloads against the conditional
+list and the change feed, with a large catalog.
+
+The OpenMCP app is served in-process with --tools synthetic tools. Each
+round either changes nothing or replaces one tool, then a client
+re-discovers: `full` downloads /api/tools/list, `etag` sends If-None-Match
+(304 when nothing changed), `mirror` syncs a ToolMirror from
+/api/tools/changes.
+
+Usage:
+    uv run python benchmarks/tool_discovery_bench.py --tools 2000 --rounds 50
+"""
+
+import argparse
+import os
+import statistics
+import threading
+import time
+
+import requests
+from werkzeug.serving import make_server
+
+import common  # noqa: F401  (puts the repo on sys.path)
+
+from openmcp.app import create_app
+from openmcp.core.registry import registry
+from openmcp.core.tool_mirror import ToolMirror
+
+
+def synthetic_tool(i: int, revision: int = 0):
+    return {
+        'name': f"get_http:__api.example.com_v1_items_{i}",
+        'description': f"Fetch item collection {i} (revision {revision}). " * 3,
+        'parameters': {'type': 'object', 'properties': {
+            'id': {'type': 'string', 'description': 'Item identifier'},
+            'fields': {'type': 'array', 'items': {'type': 'string'}}
+        }, 'required': ['id']},
+        'endpoint': {'url': f"http://api.example.com/v1/items/{i}/{{id}}", 'method': 'GET'}
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tools', type=int, default=2000)
+    parser.add_argument('--rounds', type=int, default=50)
+    parser.add_argument('--change-every', type=int, default=5, help='Replace one tool every N rounds')
+    args = parser.parse_args()
+
+    # The synthetic tools point at hosts that don't exist; keep the health probes from hiding them
+    os.environ.setdefault('UPSTREAM_HEALTH_CHECKS', 'False')
+    app = create_app()
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    registry.store_many([synthetic_tool(i) for i in range(args.tools)])
+
+    session = requests.Session()
+    mirror = ToolMirror(base)
+    mirror.sync(session)
+    etag = session.get(f"{base}/api/tools/list").headers['ETag']
+    results = {'full': [], 'etag': [], 'mirror': []}
+    try:
+        for round_number in range(args.rounds):
+            if round_number % args.change_every == 0:
+                registry.store(synthetic_tool(round_number % args.tools, round_number))
+
+            start = time.perf_counter()
+            response = session.get(f"{base}/api/tools/list")
+            response.json()
+            results['full'].append((time.perf_counter() - start, len(response.content)))
+
+            start = time.perf_counter()
+            response = session.get(f"{base}/api/tools/list", headers={'If-None-Match': etag})
+            if response.status_code == 200:
+                response.json()
+                etag = response.headers['ETag']
+            results['etag'].append((time.perf_counter() - start, len(response.content)))
+
+            start = time.perf_counter()
+            before = mirror.version
+            mirror.sync(session)
+            # The feed's own size: fetch it again for the byte count, outside the timing
+            elapsed = time.perf_counter() - start
+            size = len(session.get(f"{base}/api/tools/changes", params={'since': before}).content)
+            results['mirror'].append((elapsed, size))
+
+        assert [t['name'] for t in mirror.summaries()] == [t['name'] for t in registry.summaries()]
+        print(f"{args.tools} tools, one replaced every {args.change_every} rounds\n")
+        print(f"{'client':8s} {'mean ms':>8s} {'p50 ms':>7s} {'mean KiB':>9s}")
+        for label, samples in results.items():
+            print(f"{label:8s} {statistics.mean(s[0] for s in samples) * 1000:8.2f} "
+                  f"{statistics.median(s[0] for s in samples) * 1000:7.2f} "
+                  f"{statistics.mean(s[1] for s in samples) / 1024:9.1f}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
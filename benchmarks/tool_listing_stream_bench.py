@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+"""
+Time to first byte, total time and peak memory of listing a large catalog
+as one JSON document, as an NDJSON stream and as cursor pages.
+
+The OpenMCP app is served in-process with --tools synthetic tools; the
+catalog changes before every run, so no run is served from the encoded
+body cache. Times are taken over HTTP. Peak memory is traced in a
+separate pass through the Flask test client, reading and dropping the
+body chunk by chunk, so it covers the server side only (and not the
+development server, which allocates a 10 MB buffer per request).
+
+Usage:
+    uv run python benchmarks/tool_listing_stream_bench.py --tools 10000 --runs 5
+"""
+
+import argparse
+import os
+import statistics
+import threading
+import time
+import tracemalloc
+
+import requests
+from werkzeug.serving import make_server
+
+from tool_discovery_bench import synthetic_tool
+
+from openmcp.app import create_app
+from openmcp.core.registry import registry
+
+
+def read(session: requests.Session, url: str, headers=None, params=None):
+    """(seconds to first byte, response, bytes) reading the body in chunks"""
+    start = time.perf_counter()
+    first = None
+    size = 0
+    with session.get(url, headers=headers, params=params, stream=True) as response:
+        for chunk in response.iter_content(64 * 1024):
+            if first is None:
+                first = time.perf_counter() - start
+            size += len(chunk)
+    return first, response, size
+
+
+def full(session, base, page_size):
+    return read(session, f"{base}/api/tools/list")
+
+
+def ndjson(session, base, page_size):
+    return read(session, f"{base}/api/tools/list", headers={'Accept': 'application/x-ndjson'})
+
+
+def pages(session, base, page_size):
+    params = {'limit': page_size}
+    start = time.perf_counter()
+    page = session.get(f"{base}/api/tools/list", params=params)
+    first, size = time.perf_counter() - start, len(page.content)
+    cursor = page.json()['next_cursor']
+    while cursor:
+        page = session.get(f"{base}/api/tools/list", params={**params, 'cursor': cursor})
+        size += len(page.content)
+        cursor = page.json()['next_cursor']
+    return first, page, size
+
+
+def server_peak(client, label: str, page_size: int) -> int:
+    """Peak bytes allocated while the app produces one listing"""
+    tracemalloc.start()
+    if label == 'pages':
+        cursor = ''
+        while cursor is not None:
+            cursor = client.get('/api/tools/list', query_string={'limit': page_size, 'cursor': cursor}
+                                ).get_json()['next_cursor']
+    else:
+        headers = {'Accept': 'application/x-ndjson'} if label == 'ndjson' else {}
+        response = client.get('/api/tools/list', headers=headers, buffered=False)
+        for _ in response.response:
+            pass
+        response.close()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tools', type=int, default=10000)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--page-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    # The synthetic tools point at hosts that don't exist; keep the health probes from hiding them
+    os.environ.setdefault('UPSTREAM_HEALTH_CHECKS', 'False')
+    app = create_app()
+    registry.store_many([synthetic_tool(i) for i in range(args.tools)])
+    listings = {'full': full, 'ndjson': ndjson, 'pages': pages}
+
+    # Before the server starts, so no request thread of it allocates meanwhile
+    client = app.test_client()
+    peaks = {label: [] for label in listings}
+    for run in range(args.runs):
+        for label in listings:
+            registry.store(synthetic_tool(0, -run - 1))
+            peaks[label].append(server_peak(client, label, args.page_size))
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    session = requests.Session()
+    try:
+        print(f"{args.tools} tools, pages of {args.page_size}\n")
+        print(f"{'listing':8s} {'TTFB ms':>8s} {'total ms':>9s} {'KiB':>8s} {'peak MiB':>9s}")
+        for label, listing in listings.items():
+            firsts, totals = [], []
+            for run in range(args.runs):
+                registry.store(synthetic_tool(0, run + 1))
+                start = time.perf_counter()
+                first, _, size = listing(session, base, args.page_size)
+                totals.append(time.perf_counter() - start)
+                firsts.append(first)
+            print(f"{label:8s} {statistics.median(firsts) * 1000:8.1f} {statistics.median(totals) * 1000:9.1f} "
+                  f"{size / 1024:8.0f} {statistics.median(peaks[label]) / 2 ** 20:9.1f}")
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+"""
+What a tool call to a stalled upstream costs with and without the health
+probes, and how quickly its tools are hidden and restored.
+
+A local upstream answers at once while up; while down it holds every
+request for --stall seconds and then answers 503, like an overloaded or
+half-dead server. Without probes every call waits out the stall. With a
+HealthMonitor running, the tool is marked unavailable after two failed
+probes and calls are refused immediately. The run also reports how long
+the monitor takes to notice the outage and the recovery, and how many
+probes it sends to a steady upstream over --idle seconds as its interval
+backs off.
+
+Usage:
+    uv run python benchmarks/upstream_health_bench.py --calls 5 --stall 3
+"""
+
+import argparse
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import common  # noqa: F401  (puts the repo on sys.path)
+
+from openmcp.core.executor import ToolExecutor
+from openmcp.core.health import HealthMonitor
+from openmcp.core.registry import ToolRegistry
+
+
+def start_upstream(stall: float):
+    state = {'down': False}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        wbufsize = -1
+
+        def do_GET(self):
+            if state['down']:
+                time.sleep(stall)
+                status, data = 503, {'error': 'overloaded'}
+            else:
+                status, data = 200, {'result': 42}
+            body = json.dumps(data).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}", state
+
+
+def call_seconds(executor: ToolExecutor, calls: int):
+    """Median seconds per call and the outcomes seen"""
+    seconds, outcomes = [], set()
+    for _ in range(calls):
+        start = time.perf_counter()
+        outcomes.add(executor.execute('answer', {}).outcome)
+        seconds.append(time.perf_counter() - start)
+    return statistics.median(seconds), ', '.join(sorted(outcomes))
+
+
+def wait_until(condition, limit: float = 120.0) -> float:
+    start = time.perf_counter()
+    while not condition():
+        if time.perf_counter() - start > limit:
+            raise RuntimeError('timed out')
+        time.sleep(0.01)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--calls', type=int, default=5)
+    parser.add_argument('--stall', type=float, default=3.0, help='Seconds a down upstream holds each request')
+    parser.add_argument('--min-interval', type=float, default=1.0)
+    parser.add_argument('--max-interval', type=float, default=16.0)
+    parser.add_argument('--timeout', type=float, default=0.5, help='Probe timeout')
+    parser.add_argument('--idle', type=float, default=30.0, help='Seconds of steady upstream to count probes over')
+    args = parser.parse_args()
+
+    server, base, state = start_upstream(args.stall)
+    registry = ToolRegistry()
+    registry.store({
+        'name': 'answer',
+        'description': 'The answer',
+        'parameters': {'type': 'object', 'properties': {}},
+        'endpoint': {'url': f"{base}/answer", 'method': 'GET'},
+        'health_url': f"{base}/health"
+    })
+    executor = ToolExecutor(registry)
+    available = lambda: not registry.get('answer').get('unavailable')
+    try:
+        state['down'] = True
+        without, outcomes = call_seconds(executor, args.calls)
+        state['down'] = False
+
+        monitor = HealthMonitor(registry, min_interval=args.min_interval, max_interval=args.max_interval,
+                                timeout=args.timeout)
+        executor.health_monitor = monitor
+        monitor.start()
+        wait_until(lambda: monitor.stats() and monitor.stats()[0]['probes'] > 0)
+        state['down'] = True
+        detect = wait_until(lambda: not available())
+        with_probes, probe_outcomes = call_seconds(executor, args.calls)
+        state['down'] = False
+        recover = wait_until(available)
+
+        probes = monitor.stats()[0]['probes']
+        time.sleep(args.idle)
+        idle_probes = monitor.stats()[0]['probes'] - probes
+        monitor.close()
+
+        print(f"upstream down, each request held {args.stall:g} s; probes every {args.min_interval:g}-"
+              f"{args.max_interval:g} s, {args.timeout:g} s timeout\n")
+        print(f"{'':16s} {'ms per call':>12s}  outcome")
+        print(f"{'without probes':16s} {without * 1000:12.1f}  {outcomes}")
+        print(f"{'with probes':16s} {with_probes * 1000:12.3f}  {probe_outcomes}")
+        print(f"\nhidden {detect:.1f} s after the outage, restored {recover:.1f} s after recovery")
+        print(f"{idle_probes} probes in {args.idle:g} s of steady upstream "
+              f"(interval now {monitor.stats()[0]['interval_seconds']:g} s)")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
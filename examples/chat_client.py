@@ -118,6 +118,7 @@ def main():
     config = OllamaConfig(
         model="llama3.2",  # You can change this to any model you have
         temperature=0.7,
+        keep_alive="30m",  # keep the model loaded between messages
         system_prompt="""You are a helpful AI assistant with access to calculation tools through OpenMCP.
 When you need to perform calculations, use the available tools by responding with:
 {"tool": "tool_name", "parameters": {"param1": value1, "param2": value2}}
@@ -137,6 +138,13 @@ Be conversational and explain what you're doing when using tools."""
         console.print("❌ No tools found", style="red")
         return
     
+    # Load the model and its system prompt now rather than on the first message
+    with console.status("Loading model..."):
+        try:
+            console.print(f"✅ Model ready ({ollama_client.preload():.1f}s)", style="green")
+        except Exception as e:
+            console.print(f"⚠️  Could not preload model: {e}", style="yellow")
+    
     # Chat interface
     console.print("\n[bold green]Chat started![/bold green] Type 'exit' or 'quit' to end.\n")
     console.print("[dim]Example: 'What is 42 plus 17?' or 'Calculate 6 times 7'[/dim]\n")
@@ -163,13 +171,21 @@ Be conversational and explain what you're doing when using tools."""
                 console.print("[bold green]Conversation cleared![/bold green]\n")
                 continue
             
-            # Show thinking indicator
-            with console.status("[bold green]Thinking...", spinner="dots"):
-                response = ollama_client.chat(user_input)
-            
-            # Display response
+            # Stream the response into a live panel as tokens arrive
             console.print("\n[bold cyan]Assistant:[/bold cyan]")
-            console.print(Panel(Markdown(response), border_style="cyan"))
+            response = ""
+            with Live(Panel("[bold green]Thinking...", border_style="cyan"),
+                      console=console, refresh_per_second=12) as live:
+                for delta in ollama_client.chat_stream(user_input):
+                    response += delta
+                    live.update(Panel(Markdown(response), border_style="cyan"))
+            
+            stats = ollama_client.last_turn_stats
+            if stats and stats.time_to_first_token is not None:
+                console.print(
+                    f"[dim]first token {stats.time_to_first_token:.2f}s · "
+                    f"{stats.tokens_per_second:.1f} tok/s · {stats.total_time:.2f}s total[/dim]"
+                )
             console.print()
             
         except KeyboardInterrupt:
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+"""
+Thin chat client using OpenMCP's server-side chat sessions.
+
+The conversation, the model connection and tool execution all live in the
+OpenMCP server; this client only sends messages and renders the SSE stream.
+"""
+
+import json
+import os
+import sys
+
+import requests
+from rich.console import Console
+from rich.live import Live
+from rich.markdown import Markdown
+from rich.panel import Panel
+
+OPENMCP_URL = os.getenv("OPENMCP_URL", "http://localhost:5005")
+
+console = Console()
+
+def stream_reply(session_id: str, content: str):
+    """POST a message and yield (event, data) pairs from the SSE response"""
+    with requests.post(
+        f"{OPENMCP_URL}/api/chat/sessions/{session_id}/messages",
+        json={"content": content},
+        headers={"Accept": "text/event-stream"},
+        stream=True
+    ) as r:
+        r.raise_for_status()
+        event = None
+        for line in r.iter_lines(decode_unicode=True):
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                yield event, json.loads(line[len("data: "):])
+
+def main():
+    try:
+        r = requests.post(f"{OPENMCP_URL}/api/chat/sessions", json={"model": os.getenv("OLLAMA_MODEL", "llama3.2")})
+        r.raise_for_status()
+    except requests.RequestException as e:
+        console.print(f"[red]Could not create a chat session at {OPENMCP_URL}: {e}[/red]")
+        sys.exit(1)
+    session_id = r.json()["session_id"]
+    console.print(f"[bold green]Session {session_id} started.[/bold green] Type 'exit' to end.\n")
+
+    try:
+        while True:
+            user_input = console.input("[bold]You:[/bold] ").strip()
+            if not user_input:
+                continue
+            if user_input.lower() in ["exit", "quit", "bye"]:
+                break
+
+            reply, stats = "", None
+            with Live(Panel("[bold green]Thinking...", border_style="cyan"),
+                      console=console, refresh_per_second=12) as live:
+                for event, data in stream_reply(session_id, user_input):
+                    if event == "token":
+                        reply += data["delta"]
+                        live.update(Panel(Markdown(reply), border_style="cyan"))
+                    elif event == "done":
+                        stats = data.get("stats")
+            if stats and stats.get("time_to_first_token") is not None:
+                console.print(
+                    f"[dim]first token {stats['time_to_first_token']:.2f}s · "
+                    f"{stats['tokens_per_second']:.1f} tok/s[/dim]\n"
+                )
+    except (KeyboardInterrupt, EOFError):
+        pass
+    finally:
+        requests.delete(f"{OPENMCP_URL}/api/chat/sessions/{session_id}")
+        console.print("\n[bold blue]Goodbye![/bold blue]")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from dataclasses import asdict
+import json
+import logging
+import math
+import threading
+import ollama
+
+from openmcp.api.tools_api import executor
+from openmcp.core.fast_path import FastPathRouter
+from openmcp.core.history import HistoryManager, llm_summarizer
+from openmcp.core.ollama_integration import OllamaConfig, OllamaIntegration, parse_keep_alive
+from openmcp.core.ollama_pool import OllamaPool
+from openmcp.core.registry import registry
+from openmcp.core.response_cache import ResponseCache
+from openmcp.core.session_store import SessionStore
+from openmcp.utils.metrics import CHAT_SESSIONS, CHAT_SESSION_BYTES
+
+bp = Blueprint('chat', __name__)
+logger = logging.getLogger(__name__)
+
+# Conversations live here rather than in each client process; limits are
+# applied from the app config by init_app()
+store = SessionStore()
+
+# One model client (and connection pool) shared by every session; an
+# OllamaPool when OLLAMA_HOSTS lists several hosts
+model_client = None
+default_config = OllamaConfig()
+history_budget_tokens = 0
+# Answers for deterministic sessions (temperature 0 or a seed); None when disabled
+response_cache = None
+# Answers messages matching a tool's x-ai-patterns without the model; None when disabled
+fast_path = None
+
+CHAT_SESSIONS.set_function(lambda: len(store))
+CHAT_SESSION_BYTES.set_function(lambda: store.total_bytes)
+
+def init_app(app):
+    """Apply chat settings from the app config"""
+    global model_client, default_config, history_budget_tokens, response_cache, fast_path
+    store.max_sessions = app.config['CHAT_MAX_SESSIONS']
+    store.ttl_seconds = app.config['CHAT_SESSION_TTL']
+    store.max_bytes = int(app.config['CHAT_MAX_MEMORY_MB'] * 1024 * 1024)
+    default_config = OllamaConfig(
+        host=app.config['OLLAMA_HOST'],
+        model=app.config['OLLAMA_MODEL'],
+        keep_alive=parse_keep_alive(app.config['OLLAMA_KEEP_ALIVE'])
+    )
+    hosts = [host.strip() for host in app.config['OLLAMA_HOSTS'].split(',') if host.strip()]
+    if hosts:
+        model_client = OllamaPool(hosts, max_concurrency=app.config['OLLAMA_HOST_CONCURRENCY'],
+                                  health_interval=app.config['OLLAMA_HEALTH_INTERVAL'])
+    else:
+        model_client = ollama.Client(host=default_config.host)
+    history_budget_tokens = app.config['CHAT_HISTORY_BUDGET_TOKENS']
+    response_cache = None
+    if app.config['LLM_RESPONSE_CACHE_SIZE'] > 0:
+        response_cache = ResponseCache(app.config['LLM_RESPONSE_CACHE_SIZE'],
+                                       path=app.config['LLM_RESPONSE_CACHE_PATH'] or None)
+    fast_path = FastPathRouter(registry) if app.config['CHAT_FAST_PATH'] else None
+    if app.config['OLLAMA_PRELOAD']:
+        # In the background: startup must not depend on Ollama being up
+        threading.Thread(target=preload_default_model, name='openmcp-model-preload', daemon=True).start()
+
+def preload_default_model():
+    """Load the default model and evaluate the session system prompt once (on every pooled host)"""
+    if isinstance(model_client, OllamaPool):
+        clients = {backend.host: backend.client for backend in model_client.backends}
+    else:
+        clients = {default_config.host: model_client}
+    for host, client in clients.items():
+        chat = OllamaIntegration(default_config, executor=executor, client=client)
+        chat.discover_tools()
+        try:
+            seconds = chat.preload()
+            logger.info(f"Preloaded model {default_config.model} on {host} in {seconds:.2f}s")
+        except Exception as e:
+            logger.warning(f"Could not preload model {default_config.model} on {host}: {e}")
+
+def _stats(chat: OllamaIntegration):
+    stats = chat.last_turn_stats
+    if stats is None:
+        return None
+    return dict(asdict(stats), tokens_per_second=stats.tokens_per_second)
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@bp.route('/sessions', methods=['POST'])
+def create_session():
+    """Create a server-side chat session"""
+    data = request.get_json(silent=True) or {}
+    try:
+        temperature = float(data.get('temperature', default_config.temperature))
+        seed = int(data['seed']) if data.get('seed') is not None else None
+    except (TypeError, ValueError):
+        return jsonify({'error': 'temperature must be a number and seed an integer'}), 400
+    if not math.isfinite(temperature) or temperature < 0:
+        return jsonify({'error': 'temperature must be a non-negative number'}), 400
+    config = OllamaConfig(
+        host=default_config.host,
+        model=data.get('model', default_config.model),
+        temperature=temperature,
+        keep_alive=default_config.keep_alive,
+        seed=seed,
+        system_prompt=data.get('system_prompt', default_config.system_prompt)
+    )
+    # Tools run in-process through the shared executor, no HTTP hop
+    history = None
+    if history_budget_tokens > 0:
+        # Older turns are folded into a model-written summary in the background
+        history = HistoryManager(history_budget_tokens, summarizer=llm_summarizer(
+            model_client, config.model, keep_alive=config.keep_alive))
+    chat = OllamaIntegration(config, executor=executor, client=model_client, history=history,
+                             response_cache=response_cache, fast_path=fast_path)
+    session = store.create(chat)
+    return jsonify(session.info()), 201
+
+@bp.route('/cache', methods=['GET'])
+def cache_stats():
+    """Response cache size and hit rate"""
+    if response_cache is None:
+        return jsonify({'enabled': False})
+    return jsonify(dict(response_cache.stats(), enabled=True))
+
+@bp.route('/fast-path', methods=['GET'])
+def fast_path_stats():
+    """Per-route hit rates and estimated latency saved by the fast-path router"""
+    if fast_path is None:
+        return jsonify({'enabled': False})
+    return jsonify(dict(fast_path.stats(), enabled=True))
+
+@bp.route('/backends', methods=['GET'])
+def backend_stats():
+    """Per-host queue depth, latency and health of the Ollama pool"""
+    if not isinstance(model_client, OllamaPool):
+        return jsonify({'pooled': False, 'backends': [{'host': default_config.host}]})
+    return jsonify({'pooled': True, 'backends': model_client.stats()})
+
+@bp.route('/sessions', methods=['GET'])
+def list_sessions():
+    """List live chat sessions"""
+    sessions = [session.info() for session in store.sessions()]
+    return jsonify({
+        'sessions': sessions,
+        'count': len(sessions),
+        'total_bytes': store.total_bytes
+    })
+
+@bp.route('/sessions/<session_id>', methods=['GET'])
+def get_session(session_id):
+    """Get a session and its history"""
+    session = store.get(session_id)
+    if session is None:
+        return jsonify({'error': f'Session {session_id} not found'}), 404
+    return jsonify(dict(session.info(), history=session.chat.conversation_history))
+
+@bp.route('/sessions/<session_id>', methods=['DELETE'])
+def delete_session(session_id):
+    """End a session"""
+    if not store.delete(session_id):
+        return jsonify({'error': f'Session {session_id} not found'}), 404
+    return jsonify({'message': f'Session {session_id} deleted'})
+
+@bp.route('/sessions/<session_id>/messages', methods=['GET'])
+def get_messages(session_id):
+    """Get the conversation history of a session"""
+    session = store.get(session_id)
+    if session is None:
+        return jsonify({'error': f'Session {session_id} not found'}), 404
+    return jsonify({'messages': session.chat.conversation_history})
+
+@bp.route('/sessions/<session_id>/messages', methods=['POST'])
+def post_message(session_id):
+    """Send a user message; answers with JSON or, if requested, an SSE token stream"""
+    data = request.get_json(silent=True) or {}
+    content = data.get('content')
+    if not content:
+        return jsonify({'error': 'Missing content'}), 400
+
+    session = store.get(session_id)
+    if session is None:
+        return jsonify({'error': f'Session {session_id} not found'}), 404
+    if not session.lock.acquire(blocking=False):
+        return jsonify({'error': 'Session is busy with another message'}), 409
+
+    chat = session.chat
+    try:
+        # Only re-reads the registry when its version changed, so the system
+        # prompt stays the same cached string between turns
+        chat.discover_tools()
+    except Exception:
+        # Don't leave the session busy for good
+        session.lock.release()
+        raise
+    stream = bool(data.get('stream')) or 'text/event-stream' in request.headers.get('Accept', '')
+
+    if not stream:
+        try:
+            reply = chat.chat(content)
+        finally:
+            session.lock.release()
+            store.resize(session)
+        return jsonify({'reply': reply, 'stats': _stats(chat)})
+
+    def events():
+        parts = []
+        for delta in chat.chat_stream(content):
+            parts.append(delta)
+            yield _sse('token', {'delta': delta})
+        yield _sse('done', {'reply': ''.join(parts), 'stats': _stats(chat)})
+
+    def finish():
+        session.lock.release()
+        store.resize(session)
+
+    response = Response(stream_with_context(events()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    # Runs when the server closes the response, even if the client went away
+    # before the stream started
+    response.call_on_close(finish)
+    return response
\ No newline at end of file
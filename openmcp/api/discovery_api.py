@@ -1,11 +1,23 @@
 from flask import Blueprint, jsonify, request, current_app
 from pathlib import Path
 import requests
+import threading
+import time
+from typing import Any, Dict, List, Tuple
 from openmcp.core.openapi_parser import OpenAPIParser
-from openmcp.api.tools_api import registered_tools
+from openmcp.api.tools_api import encode_cursor, page_params
+from openmcp.core.registry import RegistrySnapshot, page_names, registry
+from openmcp.utils.encoding import encoder
+from openmcp.utils.metrics import SPEC_LOAD_SECONDS, SPEC_PARSE_SECONDS
 
 bp = Blueprint('discovery', __name__)
 parser = OpenAPIParser()
+# Bumped whenever a spec is (re)loaded, which changes /tools without
+# necessarily registering anything
+spec_loads = 0
+_spec_loads_lock = threading.Lock()
+# ((registry version, spec loads), tools by name, sorted names) for /tools
+_discovered = None
 
 @bp.route('/register', methods=['POST'])
 def register_spec():
@@ -22,40 +34,63 @@ def register_spec():
     
     try:
         # Load the spec
+        load_start = time.perf_counter()
         if data.get('spec_url'):
             # Fetch spec from URL
             response = requests.get(spec_source)
             response.raise_for_status()
             spec = response.json()
+            SPEC_LOAD_SECONDS.observe(time.perf_counter() - load_start, 'url')
         else:
             # Load from file
             spec = parser.load_spec(spec_source)
+            _count_spec_load()
+            SPEC_LOAD_SECONDS.observe(time.perf_counter() - load_start, 'file')
         
         # Extract AI tools
+        parse_start = time.perf_counter()
         ai_tools = parser.extract_ai_tools(spec)
+        tool_defs = [parser.convert_to_ai_format(endpoint) for endpoint in ai_tools]
+        tool_defs += parser.extract_composites(spec)
+        SPEC_PARSE_SECONDS.observe(time.perf_counter() - parse_start)
         
-        # Convert and register each tool
-        registered_count = 0
-        for endpoint in ai_tools:
-            tool_def = parser.convert_to_ai_format(endpoint)
-            # Register with tools service
-            registered_tools[tool_def['name']] = tool_def
-            registered_count += 1
+        # Composites are checked like /api/tools/register does; the rest go
+        # into the registry in one write
+        discovered_count = len(tool_defs)
+        tool_defs, rejected = registry.check_batch(tool_defs)
+        for name, error in rejected.items():
+            current_app.logger.warning(f"Not registering composite tool {name}: {error}")
+        registry.store_many(tool_defs)
+        registered_count = len(tool_defs)
         
         return jsonify({
             'message': 'OpenAPI spec processed successfully',
             'spec_title': spec.get('info', {}).get('title', 'Unknown'),
-            'tools_discovered': len(ai_tools),
-            'tools_registered': registered_count
+            'tools_discovered': discovered_count,
+            'tools_registered': registered_count,
+            'composites_rejected': rejected
         })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@bp.route('/tools', methods=['GET'])
-def discover_tools():
-    """Discover all available AI tools from registered specs"""
-    all_tools = []
+def _count_spec_load():
+    global spec_loads
+    with _spec_loads_lock:
+        spec_loads += 1
+
+def discovered_tools(snapshot: RegistrySnapshot, loads: int) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+    """The tools /tools lists, by name in listing order, and their names sorted
+    
+    Built once per (catalog version, spec loads). `loads` is read before the
+    specs are, so a body is never cached under a newer count than it saw.
+    """
+    global _discovered
+    state = (snapshot.version, loads)
+    cached = _discovered
+    if cached is not None and cached[0] == state:
+        return cached[1], cached[2]
+    all_tools = {}
     
     # Get tools from all loaded specs
     for spec_id, spec in parser.specs.items():
@@ -63,18 +98,63 @@ def discover_tools():
         for tool in tools:
             tool_info = parser.convert_to_ai_format(tool)
             tool_info['spec_id'] = spec_id
-            all_tools.append(tool_info)
+            all_tools.setdefault(tool_info['name'], tool_info)
     
-    # Include already registered tools
-    for name, tool in registered_tools.items():
-        if not any(t['name'] == name for t in all_tools):
-            all_tools.append(tool)
+    # Include already registered tools, and mark those whose upstream is down
+    for name, tool in snapshot.items():
+        if tool.get('unavailable'):
+            all_tools[name] = {**all_tools.get(name, tool), 'available': False,
+                               'unavailable_reason': tool['unavailable']}
+        else:
+            all_tools.setdefault(name, tool)
     
-    return jsonify({
-        'tools': all_tools,
-        'total': len(all_tools),
-        'specs_loaded': len(parser.specs)
-    })
+    _discovered = (state, all_tools, sorted(all_tools))
+    return all_tools, _discovered[2]
+
+@bp.route('/tools', methods=['GET'])
+def discover_tools():
+    """Discover all available AI tools from registered specs
+    
+    Pages and streams like /api/tools/list (`limit`, `cursor`,
+    `Accept: application/x-ndjson`).
+    """
+    streaming = encoder.wants_ndjson()
+    try:
+        paged, after, limit = page_params(streaming)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    # One snapshot for the body, the cache key and the ETag
+    snapshot, loads = registry.snapshot(), spec_loads
+    version = snapshot.version
+    
+    if streaming or paged:
+        all_tools, names = discovered_tools(snapshot, loads)
+        names, next_after = page_names(names, after, limit)
+        tools = (all_tools[name] for name in names)
+        if streaming:
+            headers = {'X-Specs-Loaded': str(len(parser.specs))}
+            if next_after is not None:
+                headers['X-Next-Cursor'] = encode_cursor(next_after)
+            return encoder.stream(tools, headers=headers)
+        tools_list = list(tools)
+        return encoder.respond({
+            'tools': tools_list,
+            'count': len(tools_list),
+            'total': len(all_tools),
+            'specs_loaded': len(parser.specs),
+            'next_cursor': encode_cursor(next_after)
+        })
+    
+    def discovered():
+        all_tools = list(discovered_tools(snapshot, loads)[0].values())
+        return {
+            'tools': all_tools,
+            'total': len(all_tools),
+            'specs_loaded': len(parser.specs)
+        }
+    
+    return encoder.respond(discovered, cache_key=('discovery', version, loads),
+                           etag=f'discovery-{registry.epoch}-{version}-{loads}')
 
 @bp.route('/specs', methods=['GET'])
 def list_specs():
@@ -113,8 +193,14 @@ def scan_directory():
         for pattern in ['*.yaml', '*.yml', '*.json']:
             for spec_file in specs_dir.glob(pattern):
                 try:
+                    load_start = time.perf_counter()
                     spec = parser.load_spec(str(spec_file))
+                    _count_spec_load()
+                    SPEC_LOAD_SECONDS.observe(time.perf_counter() - load_start, 'file')
+                    
+                    parse_start = time.perf_counter()
                     ai_tools = parser.extract_ai_tools(spec)
+                    SPEC_PARSE_SECONDS.observe(time.perf_counter() - parse_start)
                     
                     discovered_specs.append({
                         'file': str(spec_file),
@@ -0,0 +1,39 @@
+from flask import Blueprint, Response, g, request
+import time
+
+from openmcp.utils.metrics import metrics, HTTP_REQUESTS, HTTP_ERRORS, HTTP_LATENCY, HTTP_IN_FLIGHT
+
+bp = Blueprint('metrics', __name__)
+
+def _endpoint_label() -> str:
+    """Use the matched URL rule so label cardinality stays bounded"""
+    return request.url_rule.rule if request.url_rule else 'unmatched'
+
+@bp.before_app_request
+def start_request_timer():
+    g.metrics_start = time.perf_counter()
+    g.metrics_endpoint = _endpoint_label()
+    HTTP_IN_FLIGHT.inc(g.metrics_endpoint)
+
+@bp.after_app_request
+def record_request(response):
+    start = g.get('metrics_start')
+    if start is not None:
+        endpoint = g.metrics_endpoint
+        status = str(response.status_code)
+        HTTP_LATENCY.observe(time.perf_counter() - start, endpoint)
+        HTTP_REQUESTS.inc(endpoint, request.method, status)
+        if response.status_code >= 400:
+            HTTP_ERRORS.inc(endpoint, status)
+    return response
+
+@bp.teardown_app_request
+def finish_request(exc):
+    endpoint = g.pop('metrics_endpoint', None)
+    if endpoint is not None:
+        HTTP_IN_FLIGHT.dec(endpoint)
+
+@bp.route('/metrics', methods=['GET'])
+def export_metrics():
+    """Expose all metrics in the Prometheus text format"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,65 @@
+from flask import Blueprint, current_app, jsonify, request
+from pathlib import Path
+import math
+
+from openmcp.utils.profiling import (
+    ADMIN_TOKEN_HEADER, check_admin_token, sample_stacks, snapshot_allocations
+)
+
+bp = Blueprint('profiling', __name__)
+
+# Shortest sampling interval; below it the sampler would spin on a CPU
+MIN_INTERVAL_MS = 1.0
+
+@bp.before_request
+def require_admin_token():
+    """All profiling endpoints require the configured admin token"""
+    if not check_admin_token(request.headers.get(ADMIN_TOKEN_HEADER), current_app.config.get('ADMIN_TOKEN')):
+        return jsonify({'error': 'Admin token required'}), 403
+
+def _bounded_seconds(default: float) -> float:
+    seconds = request.args.get('seconds', default, type=float)
+    return max(0.0, min(seconds, current_app.config['PROFILING_MAX_SECONDS']))
+
+@bp.route('/cpu', methods=['POST'])
+def profile_cpu():
+    """Sample all thread stacks for a bounded time window"""
+    interval_ms = request.args.get('interval_ms', 5.0, type=float)
+    if not math.isfinite(interval_ms) or interval_ms <= 0:
+        return jsonify({'error': 'interval_ms must be a positive number'}), 400
+    limit = request.args.get('limit', 20, type=int)
+    if limit <= 0:
+        return jsonify({'error': 'limit must be a positive integer'}), 400
+    result = sample_stacks(
+        seconds=_bounded_seconds(5.0),
+        interval=max(interval_ms, MIN_INTERVAL_MS) / 1000,
+        limit=limit
+    )
+    if result is None:
+        return jsonify({'error': 'Another profiling run is in progress'}), 409
+    return jsonify(result)
+
+@bp.route('/memory', methods=['POST'])
+def profile_memory():
+    """Trace allocations for a bounded time window and return the top sites"""
+    limit = request.args.get('limit', 20, type=int)
+    if limit <= 0:
+        return jsonify({'error': 'limit must be a positive integer'}), 400
+    result = snapshot_allocations(
+        seconds=_bounded_seconds(5.0),
+        limit=limit
+    )
+    if result is None:
+        return jsonify({'error': 'Another profiling run is in progress'}), 409
+    return jsonify(result)
+
+@bp.route('/requests', methods=['GET'])
+def list_request_profiles():
+    """List pstats files written by header-triggered request profiling"""
+    profile_dir = Path(current_app.config['PROFILE_DIR'])
+    files = sorted(profile_dir.glob('*.pstats'), reverse=True) if profile_dir.exists() else []
+    return jsonify({
+        'directory': str(profile_dir),
+        'profiles': [{'file': f.name, 'size_bytes': f.stat().st_size} for f in files],
+        'count': len(files)
+    })
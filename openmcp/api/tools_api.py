@@ -1,16 +1,76 @@
-from flask import Blueprint, jsonify, request
-import requests
-from typing import Dict, Any
-import json
+from flask import Blueprint, current_app, jsonify, request
+from typing import Dict, Any, Optional, Tuple
+import base64
+
+from openmcp.core import composite
+from openmcp.core.executor import ToolExecutor
+from openmcp.core.health import HealthMonitor
+from openmcp.core.registry import registry
+from openmcp.utils.encoding import encoder
+from openmcp.utils.metrics import REGISTRY_SIZE, CATALOG_VERSION, UNAVAILABLE_TOOLS
+from openmcp.utils.timing import PhaseTimer
 
 bp = Blueprint('tools', __name__)
 
-# In-memory storage for registered tools (in production, use a database)
-registered_tools: Dict[str, Any] = {}
+# Executes tools for this endpoint and for in-process clients alike
+executor = ToolExecutor(registry)
+
+# Probes the upstreams behind the tools; started by create_app when enabled
+health_monitor = HealthMonitor(registry)
+
+# Longest a /changes request may wait for a change, in seconds
+MAX_CHANGES_WAIT = 60.0
+
+# Tools per page of a paged listing, by default and at most
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+REGISTRY_SIZE.set_function(lambda: len(registry))
+CATALOG_VERSION.set_function(lambda: registry.version)
+UNAVAILABLE_TOOLS.set_function(lambda: health_monitor.unavailable_tools)
+
+def store_tool(tool_def: Dict[str, Any]):
+    """Add or replace a tool in the registry"""
+    registry.store(tool_def)
+
+def encode_cursor(name: Optional[str]) -> Optional[str]:
+    """An opaque cursor for continuing a listing after the tool `name`"""
+    if name is None:
+        return None
+    return base64.urlsafe_b64encode(name.encode()).decode().rstrip('=')
+
+def page_params(streaming: bool) -> Tuple[bool, Optional[str], Optional[int]]:
+    """(paged, tool name to start after, page size) from `cursor` and `limit`
+    
+    A listing is paged once either is given. Streamed listings have no
+    page size unless one is asked for. Raises ValueError on a bad cursor
+    or limit.
+    """
+    cursor = request.args.get('cursor')
+    limit = request.args.get('limit')
+    after = None
+    if cursor:
+        try:
+            # validate=True: the URL-safe decoder would skip stray characters
+            after = base64.b64decode(cursor + '=' * (-len(cursor) % 4), altchars=b'-_', validate=True).decode()
+        except ValueError:
+            raise ValueError(f'Invalid cursor {cursor!r}')
+    if limit is not None:
+        if not limit.isdigit() or int(limit) < 1:
+            raise ValueError('limit must be a positive integer')
+        limit = int(limit) if streaming else min(int(limit), MAX_PAGE_SIZE)
+    elif cursor and not streaming:
+        limit = DEFAULT_PAGE_SIZE
+    return cursor is not None or limit is not None, after, limit
+
+def check_composite(definition: Dict[str, Any]):
+    """Why a composite definition can't run here, or None if it can"""
+    return composite.check_composite(definition, registry.get)
 
 @bp.route('/execute', methods=['POST'])
 def execute_tool():
     """Execute an AI tool by making the actual HTTP request"""
+    timer = PhaseTimer()
     data = request.json
     
     if not data or 'tool_name' not in data or 'parameters' not in data:
@@ -18,75 +78,108 @@ def execute_tool():
     
     tool_name = data['tool_name']
     parameters = data['parameters']
+    include_timing = bool(data.get('timing')) or request.args.get('timing') == '1'
+    # Callers other than a model can ask for the upstream data untouched
+    raw = bool(data.get('raw')) or request.args.get('raw') == '1'
     
-    # Get tool definition
-    tool = registered_tools.get(tool_name)
-    if not tool:
-        return jsonify({'error': f'Tool {tool_name} not found'}), 404
+    result = executor.execute(tool_name, parameters, timer, shape=not raw)
+    if result.outcome == 'not_found':
+        return jsonify(result.envelope), 404
     
-    try:
-        # Build the request
-        endpoint = tool['endpoint']
-        url = endpoint['url']
-        method = endpoint['method']
-        
-        # Separate path parameters from body/query parameters
-        path_params = {}
-        body_params = {}
-        query_params = {}
-        
-        # Simple parameter routing (in production, use the OpenAPI spec for proper routing)
-        for key, value in parameters.items():
-            if f'{{{key}}}' in url:
-                path_params[key] = value
-            elif method in ['GET', 'DELETE']:
-                query_params[key] = value
-            else:
-                body_params[key] = value
-        
-        # Replace path parameters in URL
-        for key, value in path_params.items():
-            url = url.replace(f'{{{key}}}', str(value))
-        
-        # Make the HTTP request
-        headers = {'Content-Type': 'application/json'}
-        
-        if method == 'GET':
-            response = requests.get(url, params=query_params, headers=headers)
-        elif method == 'POST':
-            response = requests.post(url, json=body_params, headers=headers)
-        elif method == 'PUT':
-            response = requests.put(url, json=body_params, headers=headers)
-        elif method == 'DELETE':
-            response = requests.delete(url, params=query_params, headers=headers)
-        else:
-            return jsonify({'error': f'Unsupported method: {method}'}), 400
+    current_app.logger.info('Tool executed', extra={
+        'tool': tool_name,
+        'outcome': result.outcome,
+        'status_code': result.status_code,
+        'latency_ms': round(timer.total * 1000, 3)
+    })
+    if result.http_status != 200:
+        return jsonify(result.envelope), result.http_status
         
-        # Return the response
-        return jsonify({
-            'success': response.ok,
-            'status_code': response.status_code,
-            'data': response.json() if response.headers.get('content-type', '').startswith('application/json') else response.text
-        })
+    # The envelope can only carry phases up to this point; the header
+    # below also covers encoding the envelope itself
+    envelope = result.envelope
+    if include_timing:
+        envelope['timing'] = timer.as_dict()
         
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    with timer.phase('encode'):
+        response = encoder.respond(envelope)
+    response.headers['Server-Timing'] = timer.as_header()
+    return response
 
 @bp.route('/list', methods=['GET'])
 def list_tools():
-    """List all registered AI tools"""
-    tools_list = []
-    for name, tool in registered_tools.items():
-        tools_list.append({
-            'name': name,
-            'description': tool.get('description', ''),
-            'parameters': tool.get('parameters', {}),
-            'endpoint': tool.get('endpoint', {})
+    """List all registered AI tools
+    
+    `limit` and `cursor` page through the tools in name order, and
+    `Accept: application/x-ndjson` (or `format=ndjson`) streams them one
+    per line.
+    """
+    streaming = encoder.wants_ndjson()
+    try:
+        paged, after, limit = page_params(streaming)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # One catalog version for the whole response, however long it streams
+    snapshot = registry.snapshot()
+    version, epoch = snapshot.version, registry.epoch
+    if streaming or paged:
+        tools, next_after = snapshot.page(after, limit)
+        if streaming:
+            headers = {'X-Catalog-Version': str(version), 'X-Catalog-Epoch': epoch}
+            if next_after is not None:
+                headers['X-Next-Cursor'] = encode_cursor(next_after)
+            return encoder.stream(tools, headers=headers)
+        tools_list = list(tools)
+        return encoder.respond({
+            'tools': tools_list,
+            'count': len(tools_list),
+            'total': len(snapshot),
+            'catalog_version': version,
+            'catalog_epoch': epoch,
+            'next_cursor': encode_cursor(next_after)
         })
     
+    def catalog():
+        tools_list = snapshot.summaries()
+        return {
+            'tools': tools_list,
+            'count': len(tools_list),
+            'catalog_version': version,
+            'catalog_epoch': epoch
+        }
+    
+    # Encoded and compressed once per version and representation; the epoch
+    # keeps ETags from before a restart from matching a different catalog
+    return encoder.respond(catalog, cache_key=('tools', version), etag=f'tools-{epoch}-{version}')
+
+@bp.route('/changes', methods=['GET'])
+def list_changes():
+    """Tools added, replaced or removed since a catalog version
+    
+    With `wait=<seconds>` the request is held until something changes or
+    the time is up (long polling). Pass the `epoch` of the last response
+    so a restarted server answers with a full reset.
+    """
+    try:
+        since = int(request.args.get('since', 0))
+        wait = min(float(request.args.get('wait', 0)), MAX_CHANGES_WAIT)
+    except ValueError:
+        return jsonify({'error': 'since must be an integer and wait a number of seconds'}), 400
+    epoch = request.args.get('epoch')
+    if wait > 0 and registry.version == since and epoch in (None, registry.epoch):
+        registry.wait_for_change(since, wait)
+    return encoder.respond(registry.changes_since(since, epoch))
+
+@bp.route('/health', methods=['GET'])
+def upstream_health():
+    """What the background probes know about each upstream API"""
+    upstreams = health_monitor.stats()
     return jsonify({
-        'tools': tools_list,
-        'count': len(tools_list)
+        'upstreams': upstreams,
+        'unhealthy': sum(1 for upstream in upstreams if not upstream['healthy']),
+        'unavailable_tools': health_monitor.unavailable_tools,
+        'monitoring': health_monitor.running
     })
 
 @bp.route('/register', methods=['POST'])
@@ -98,9 +191,20 @@ def register_tool():
         return jsonify({'error': 'Missing tool name'}), 400
     
     tool_name = tool_data['name']
-    registered_tools[tool_name] = tool_data
+    if 'composite' in tool_data:
+        error = check_composite(tool_data['composite'])
+        if error:
+            return jsonify({'error': f'Invalid composite tool {tool_name}: {error}'}), 400
+    store_tool(tool_data)
     
     return jsonify({
         'message': f'Tool {tool_name} registered successfully',
         'tool': tool_data
-    }), 201
\ No newline at end of file
+    }), 201
+
+@bp.route('/<path:tool_name>', methods=['DELETE'])
+def remove_tool(tool_name):
+    """Unregister a tool"""
+    if not registry.remove(tool_name):
+        return jsonify({'error': f'Tool {tool_name} not found'}), 404
+    return jsonify({'message': f'Tool {tool_name} removed', 'catalog_version': registry.version})
\ No newline at end of file
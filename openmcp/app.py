@@ -1,28 +1,106 @@
-from flask import Flask, jsonify, request
+from flask import Flask, g, jsonify, request
 from flask_cors import CORS
 import os
+import uuid
 from dotenv import load_dotenv
 
-from openmcp.api import tools_api, discovery_api
+from openmcp.api import tools_api, discovery_api, chat_api, metrics_api, profiling_api
 from openmcp.core.openapi_parser import OpenAPIParser
+from openmcp.utils.encoding import FastJSONProvider, encoder
 from openmcp.utils.logging import setup_logging
+from openmcp.utils.metrics import metrics
+from openmcp.utils.profiling import ProfilingMiddleware
 
 load_dotenv()
 
 def create_app(config_name='development'):
     app = Flask(__name__)
     CORS(app)
+    app.json = FastJSONProvider(app, os.getenv('JSON_CODEC', 'auto'))
     
     # Configure app
     app.config['DEBUG'] = os.getenv('DEBUG', 'True').lower() == 'true'
     app.config['OPENAPI_SPECS_DIR'] = os.getenv('OPENAPI_SPECS_DIR', './specs')
+    app.config['METRICS_ENABLED'] = os.getenv('METRICS_ENABLED', 'True').lower() == 'true'
+    app.config['SLOW_CALL_THRESHOLD_MS'] = float(os.getenv('SLOW_CALL_THRESHOLD_MS', '1000'))
+    app.config['TOOL_RESULT_MAX_ITEMS'] = int(os.getenv('TOOL_RESULT_MAX_ITEMS', '50'))
+    app.config['TOOL_RESULT_MAX_TOKENS'] = int(os.getenv('TOOL_RESULT_MAX_TOKENS', '4000'))
+    app.config['TOOL_UPSTREAM_TIMEOUT'] = float(os.getenv('TOOL_UPSTREAM_TIMEOUT', '30'))
+    app.config['LOG_SAMPLE_RATES'] = os.getenv('LOG_SAMPLE_RATES', '')
+    app.config['PROFILING_ENABLED'] = os.getenv('PROFILING_ENABLED', 'False').lower() == 'true'
+    app.config['PROFILING_MAX_SECONDS'] = float(os.getenv('PROFILING_MAX_SECONDS', '60'))
+    app.config['PROFILE_DIR'] = os.getenv('PROFILE_DIR', 'logs/profiles')
+    app.config['ADMIN_TOKEN'] = os.getenv('ADMIN_TOKEN')
+    app.config['OLLAMA_HOST'] = os.getenv('OLLAMA_HOST', 'http://localhost:11434')
+    app.config['OLLAMA_MODEL'] = os.getenv('OLLAMA_MODEL', 'llama3.2')
+    app.config['OLLAMA_KEEP_ALIVE'] = os.getenv('OLLAMA_KEEP_ALIVE', '')
+    app.config['OLLAMA_PRELOAD'] = os.getenv('OLLAMA_PRELOAD', 'False').lower() == 'true'
+    app.config['OLLAMA_HOSTS'] = os.getenv('OLLAMA_HOSTS', '')
+    app.config['OLLAMA_HOST_CONCURRENCY'] = int(os.getenv('OLLAMA_HOST_CONCURRENCY', '2'))
+    app.config['OLLAMA_HEALTH_INTERVAL'] = float(os.getenv('OLLAMA_HEALTH_INTERVAL', '10'))
+    app.config['CHAT_MAX_SESSIONS'] = int(os.getenv('CHAT_MAX_SESSIONS', '1000'))
+    app.config['CHAT_SESSION_TTL'] = float(os.getenv('CHAT_SESSION_TTL', '1800'))
+    app.config['CHAT_MAX_MEMORY_MB'] = float(os.getenv('CHAT_MAX_MEMORY_MB', '64'))
+    app.config['CHAT_HISTORY_BUDGET_TOKENS'] = int(os.getenv('CHAT_HISTORY_BUDGET_TOKENS', '4096'))
+    app.config['LLM_RESPONSE_CACHE_SIZE'] = int(os.getenv('LLM_RESPONSE_CACHE_SIZE', '1024'))
+    app.config['LLM_RESPONSE_CACHE_PATH'] = os.getenv('LLM_RESPONSE_CACHE_PATH', '')
+    app.config['CHAT_FAST_PATH'] = os.getenv('CHAT_FAST_PATH', 'True').lower() == 'true'
+    app.config['JSON_CODEC'] = app.json.codec_name
+    app.config['RESPONSE_COMPRESSION'] = os.getenv('RESPONSE_COMPRESSION', 'True').lower() == 'true'
+    app.config['RESPONSE_COMPRESS_MIN_BYTES'] = int(os.getenv('RESPONSE_COMPRESS_MIN_BYTES', '1024'))
+    app.config['RESPONSE_GZIP_LEVEL'] = int(os.getenv('RESPONSE_GZIP_LEVEL', '6'))
+    app.config['RESPONSE_ZSTD_LEVEL'] = int(os.getenv('RESPONSE_ZSTD_LEVEL', '3'))
+    app.config['UPSTREAM_HEALTH_CHECKS'] = os.getenv('UPSTREAM_HEALTH_CHECKS', 'True').lower() == 'true'
+    app.config['UPSTREAM_HEALTH_MIN_INTERVAL'] = float(os.getenv('UPSTREAM_HEALTH_MIN_INTERVAL', '5'))
+    app.config['UPSTREAM_HEALTH_MAX_INTERVAL'] = float(os.getenv('UPSTREAM_HEALTH_MAX_INTERVAL', '60'))
+    app.config['UPSTREAM_HEALTH_TIMEOUT'] = float(os.getenv('UPSTREAM_HEALTH_TIMEOUT', '2'))
     
     # Setup logging
     setup_logging(app)
     
+    # Request ids for log correlation (honour one set by a proxy)
+    @app.before_request
+    def assign_request_id():
+        g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+    
+    @app.after_request
+    def add_request_id_header(response):
+        if 'request_id' in g:
+            response.headers['X-Request-ID'] = g.request_id
+        return response
+    
+    # Negotiated compression; large catalog bodies are also cached compressed
+    encoder.enabled = app.config['RESPONSE_COMPRESSION']
+    encoder.min_size = app.config['RESPONSE_COMPRESS_MIN_BYTES']
+    encoder.gzip_level = app.config['RESPONSE_GZIP_LEVEL']
+    encoder.zstd_level = app.config['RESPONSE_ZSTD_LEVEL']
+    app.after_request(encoder.compress_response)
+    
     # Register blueprints
+    tools_api.executor.slow_call_threshold_ms = app.config['SLOW_CALL_THRESHOLD_MS']
+    tools_api.executor.result_max_items = app.config['TOOL_RESULT_MAX_ITEMS']
+    tools_api.executor.result_max_tokens = app.config['TOOL_RESULT_MAX_TOKENS']
+    tools_api.executor.timeout = app.config['TOOL_UPSTREAM_TIMEOUT'] or None
+    # Tools of upstreams that stop answering are hidden until they answer again
+    if app.config['UPSTREAM_HEALTH_CHECKS']:
+        monitor = tools_api.health_monitor
+        monitor.min_interval = app.config['UPSTREAM_HEALTH_MIN_INTERVAL']
+        monitor.max_interval = app.config['UPSTREAM_HEALTH_MAX_INTERVAL']
+        monitor.timeout = app.config['UPSTREAM_HEALTH_TIMEOUT']
+        tools_api.executor.health_monitor = monitor
+        monitor.start()
     app.register_blueprint(tools_api.bp, url_prefix='/api/tools')
     app.register_blueprint(discovery_api.bp, url_prefix='/api/discovery')
+    chat_api.init_app(app)
+    app.register_blueprint(chat_api.bp, url_prefix='/api/chat')
+    metrics.enabled = app.config['METRICS_ENABLED']
+    if app.config['METRICS_ENABLED']:
+        app.register_blueprint(metrics_api.bp)
+    
+    # Profiling is only wired in when enabled, so disabled instances pay nothing
+    if app.config['PROFILING_ENABLED']:
+        app.register_blueprint(profiling_api.bp, url_prefix='/admin/profile')
+        app.wsgi_app = ProfilingMiddleware(app.wsgi_app, app.config['PROFILE_DIR'], app.config['ADMIN_TOKEN'])
     
     # Health check endpoint
     @app.route('/health')
@@ -42,7 +120,9 @@ def create_app(config_name='development'):
                 'health': '/health',
                 'discover_tools': '/api/discovery/tools',
                 'register_spec': '/api/discovery/register',
-                'execute_tool': '/api/tools/execute'
+                'execute_tool': '/api/tools/execute',
+                'chat_sessions': '/api/chat/sessions',
+                'metrics': '/metrics'
             }
         })
     
@@ -0,0 +1,229 @@
+"""
+Per-model capability probing (native tool calls, streaming, JSON mode),
+cached in memory and on disk with a TTL.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'openmcp', 'model_capabilities.json')
+
+# Tiny requests used when `show` doesn't list capabilities; each generates one token
+_PROBE_TOOL = {
+    'type': 'function',
+    'function': {
+        'name': 'probe',
+        'description': 'Capability probe',
+        'parameters': {'type': 'object', 'properties': {}}
+    }
+}
+_PROBE_MESSAGES = [{'role': 'user', 'content': 'Hi'}]
+_PROBE_OPTIONS = {'num_predict': 1}
+
+
+@dataclass
+class ModelCapabilities:
+    """What one model on one server supports; None means unknown"""
+    host: str
+    model: str
+    native_tools: Optional[bool] = None
+    streaming: Optional[bool] = None
+    json_mode: Optional[bool] = None
+    probed_at: float = field(default_factory=time.time)
+
+
+def client_host(client: Any) -> str:
+    """Base URL of an ollama Client/AsyncClient, to key capabilities per server"""
+    hosts = getattr(client, 'hosts', None)
+    if hosts:
+        # An OllamaPool: the same models are expected on every host
+        return ','.join(hosts)
+    http = getattr(client, '_client', None)
+    return str(getattr(http, 'base_url', '')).rstrip('/')
+
+
+def is_tools_unsupported(error: Exception) -> bool:
+    """Whether an Ollama error says the model can't take native tools"""
+    return 'does not support tools' in str(error)
+
+
+def _listed_capabilities(show_response: Any) -> Optional[list]:
+    capabilities = getattr(show_response, 'capabilities', None)
+    if capabilities is None and isinstance(show_response, dict):
+        capabilities = show_response.get('capabilities')
+    return capabilities or None
+
+
+def _unsupported_or_unknown(error: Exception) -> Optional[bool]:
+    # A 4xx answer is the server refusing the feature; anything else tells us nothing
+    status = getattr(error, 'status_code', None)
+    return False if status is not None and 400 <= status < 500 else None
+
+
+def probe_capabilities(client: Any, model: str) -> ModelCapabilities:
+    """Find out what `model` supports with a few one-token requests.
+
+    Native tool support comes from the model's `show` capabilities where the
+    server lists them; otherwise each feature is tried once. Errors other
+    than "not supported" (e.g. the server being down) leave a feature unknown.
+    """
+    caps = ModelCapabilities(host=client_host(client), model=model)
+    try:
+        listed = _listed_capabilities(client.show(model))
+        if listed is not None:
+            caps.native_tools = 'tools' in listed
+    except Exception as e:
+        logger.debug(f"show({model}) failed: {e}")
+
+    if caps.native_tools is None:
+        try:
+            client.chat(model=model, messages=_PROBE_MESSAGES, tools=[_PROBE_TOOL], options=_PROBE_OPTIONS)
+            caps.native_tools = True
+        except Exception as e:
+            caps.native_tools = False if is_tools_unsupported(e) else None
+    try:
+        caps.streaming = any(True for _ in client.chat(
+            model=model, messages=_PROBE_MESSAGES, options=_PROBE_OPTIONS, stream=True))
+    except Exception as e:
+        caps.streaming = _unsupported_or_unknown(e)
+    try:
+        client.chat(model=model, messages=_PROBE_MESSAGES, options=_PROBE_OPTIONS, format='json')
+        caps.json_mode = True
+    except Exception as e:
+        caps.json_mode = _unsupported_or_unknown(e)
+    return caps
+
+
+async def aprobe_capabilities(client: Any, model: str) -> ModelCapabilities:
+    """probe_capabilities for an ollama.AsyncClient"""
+    caps = ModelCapabilities(host=client_host(client), model=model)
+    try:
+        listed = _listed_capabilities(await client.show(model))
+        if listed is not None:
+            caps.native_tools = 'tools' in listed
+    except Exception as e:
+        logger.debug(f"show({model}) failed: {e}")
+
+    if caps.native_tools is None:
+        try:
+            await client.chat(model=model, messages=_PROBE_MESSAGES, tools=[_PROBE_TOOL], options=_PROBE_OPTIONS)
+            caps.native_tools = True
+        except Exception as e:
+            caps.native_tools = False if is_tools_unsupported(e) else None
+    try:
+        stream = await client.chat(model=model, messages=_PROBE_MESSAGES, options=_PROBE_OPTIONS, stream=True)
+        caps.streaming = False
+        async for _ in stream:
+            caps.streaming = True
+    except Exception as e:
+        caps.streaming = _unsupported_or_unknown(e)
+    try:
+        await client.chat(model=model, messages=_PROBE_MESSAGES, options=_PROBE_OPTIONS, format='json')
+        caps.json_mode = True
+    except Exception as e:
+        caps.json_mode = _unsupported_or_unknown(e)
+    return caps
+
+
+class CapabilityCache:
+    """Probe results keyed by (server, model), kept in memory and in a JSON file.
+
+    Entries older than `ttl_seconds` are probed again, so a model that gains
+    tool support after an upgrade is picked up. Pass `path=None` to keep the
+    cache in memory only.
+    """
+
+    def __init__(self, path: Optional[str] = DEFAULT_CACHE_PATH, ttl_seconds: float = 24 * 3600):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._entries: Optional[Dict[str, ModelCapabilities]] = None
+        self._lock = threading.Lock()
+
+    def get(self, host: str, model: str) -> Optional[ModelCapabilities]:
+        """A fresh cached entry, or None"""
+        with self._lock:
+            caps = self._load().get(self._key(host, model))
+        if caps is None or time.time() - caps.probed_at > self.ttl_seconds:
+            return None
+        return caps
+
+    def put(self, caps: ModelCapabilities):
+        with self._lock:
+            self._load()[self._key(caps.host, caps.model)] = caps
+            self._save()
+
+    def record(self, host: str, model: str, **features: Optional[bool]):
+        """Update features learned from a real request (e.g. a rejected tool call)"""
+        with self._lock:
+            entries = self._load()
+            caps = entries.get(self._key(host, model)) or ModelCapabilities(host=host, model=model)
+            for name, value in features.items():
+                setattr(caps, name, value)
+            entries[self._key(host, model)] = caps
+            self._save()
+
+    def get_or_probe(self, client: Any, model: str) -> ModelCapabilities:
+        caps = self.get(client_host(client), model)
+        if caps is None:
+            caps = probe_capabilities(client, model)
+            self._store_probe(caps)
+        return caps
+
+    async def aget_or_probe(self, client: Any, model: str) -> ModelCapabilities:
+        caps = self.get(client_host(client), model)
+        if caps is None:
+            caps = await aprobe_capabilities(client, model)
+            self._store_probe(caps)
+        return caps
+
+    def _store_probe(self, caps: ModelCapabilities):
+        logger.info(f"Probed {caps.model}: native_tools={caps.native_tools} "
+                    f"streaming={caps.streaming} json_mode={caps.json_mode}")
+        # Nothing learned (server down?): probe again next time instead of caching that
+        if (caps.native_tools, caps.streaming, caps.json_mode) != (None, None, None):
+            self.put(caps)
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+            self._save()
+
+    @staticmethod
+    def _key(host: str, model: str) -> str:
+        return f"{host}|{model}"
+
+    def _load(self) -> Dict[str, ModelCapabilities]:
+        if self._entries is None:
+            self._entries = {}
+            if self.path and os.path.exists(self.path):
+                try:
+                    with open(self.path) as f:
+                        for key, entry in json.load(f).items():
+                            self._entries[key] = ModelCapabilities(**entry)
+                except (OSError, ValueError, TypeError) as e:
+                    logger.warning(f"Ignoring unreadable capability cache {self.path}: {e}")
+        return self._entries
+
+    def _save(self):
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({key: asdict(caps) for key, caps in self._entries.items()}, f, indent=2)
+            # Atomic, so concurrent processes never read a half-written file
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not write capability cache {self.path}: {e}")
+
+
+# Shared by every client in the process
+capability_cache = CapabilityCache()
@@ -0,0 +1,280 @@
+"""
+Composite tools: a small DAG of registered tools run as one tool call.
+
+A multi-step task such as "look up the user, then update their preferences"
+otherwise costs one LLM turn per step, each spent copying IDs from one
+result into the next call. A composite declares the steps and how their
+arguments come from the composite's own inputs or from earlier results:
+
+    name: lookup_user_and_update_preferences
+    description: Look up a user and update their preferences
+    parameters: {type: object, properties: {userId: {type: string}, theme: {type: string}}}
+    steps:
+      - id: user
+        tool: get_https:__api.example.com_v1_users_{userId}
+        arguments: {userId: $input.userId}
+      - id: preferences
+        tool: put_https:__api.example.com_v1_users_{userId}_preferences
+        arguments: {userId: $steps.user.id, theme: $input.theme}
+    result: {user: $steps.user, preferences: $steps.preferences}
+
+`$input.<name>` is an argument of the composite (left out when the caller
+didn't give it) and `$steps.<id>.<path>` a field of a step's result data,
+with dots between keys and list indexes. A step runs as soon as the steps it
+references (and any listed under `after`) have succeeded, so independent
+steps run in parallel. The first failing step stops the run; steps not yet
+started are skipped.
+"""
+
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+_STEP_ID = re.compile(r'^[A-Za-z0-9_-]+$')
+# Left out of the arguments: an optional input the caller didn't give
+_MISSING = object()
+
+
+class CompositeError(ValueError):
+    """An invalid composite definition, or a reference a run could not resolve"""
+
+
+def parse_reference(value: Any) -> Optional[Tuple[str, List[str]]]:
+    """('input' or 'steps', path) for a `$input.x` / `$steps.id.x` string, else None"""
+    if not isinstance(value, str) or not value.startswith('$'):
+        return None
+    root, _, rest = value[1:].partition('.')
+    if root not in ('input', 'steps'):
+        return None
+    return root, rest.split('.') if rest else []
+
+
+def references(value: Any) -> Iterator[Tuple[str, List[str]]]:
+    """Every reference in an argument template"""
+    if isinstance(value, dict):
+        for item in value.values():
+            yield from references(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from references(item)
+    else:
+        reference = parse_reference(value)
+        if reference is not None:
+            yield reference
+
+
+def _lookup(data: Any, path: List[str], text: str) -> Any:
+    for key in path:
+        if isinstance(data, dict) and key in data:
+            data = data[key]
+        elif isinstance(data, list) and key.lstrip('-').isdigit() and -len(data) <= int(key) < len(data):
+            data = data[int(key)]
+        else:
+            raise CompositeError(f"{text}: no {key!r} in the result")
+    return data
+
+
+def resolve(template: Any, inputs: Dict[str, Any], outputs: Dict[str, Any]) -> Any:
+    """An argument template with its references replaced by values"""
+    if isinstance(template, dict):
+        resolved = {key: resolve(value, inputs, outputs) for key, value in template.items()}
+        return {key: value for key, value in resolved.items() if value is not _MISSING}
+    if isinstance(template, list):
+        return [value for value in (resolve(item, inputs, outputs) for item in template) if value is not _MISSING]
+    reference = parse_reference(template)
+    if reference is None:
+        return template
+    root, path = reference
+    if root == 'input':
+        if not path:
+            return dict(inputs)
+        if path[0] not in inputs:
+            return _MISSING
+        return _lookup(inputs[path[0]], path[1:], template)
+    return _lookup(outputs[path[0]], path[1:], template)
+
+
+@dataclass
+class Step:
+    """One call of a composite: a registered tool and its argument template"""
+    id: str
+    tool: str
+    arguments: Dict[str, Any] = field(default_factory=dict)
+    after: List[str] = field(default_factory=list)  # steps it waits for, referenced or listed
+
+
+@dataclass
+class StepRun:
+    """How one step of a run went"""
+    tool: str
+    outcome: str = 'skipped'
+    status_code: Optional[int] = None
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+    def info(self) -> Dict[str, Any]:
+        info = {'tool': self.tool, 'outcome': self.outcome, 'status_code': self.status_code,
+                'ms': round(self.seconds * 1000, 3)}
+        if self.error:
+            info['error'] = self.error
+        return info
+
+
+@dataclass
+class CompositeRun:
+    """Outputs of a run, and what stopped it if something failed"""
+    outputs: Dict[str, Any]
+    steps: Dict[str, StepRun]
+    failed: Optional[str] = None  # id of the step that failed
+    error: Optional[str] = None
+    result: Any = None
+
+    def fail(self, step_id: Optional[str], error: str):
+        if self.error is None:
+            self.failed, self.error = step_id, error
+
+
+@dataclass
+class CompositePlan:
+    """A validated composite definition"""
+    steps: Dict[str, Step]
+    result: Any = None
+
+    @classmethod
+    def parse(cls, definition: Dict[str, Any]) -> 'CompositePlan':
+        """From the `composite` part of a tool definition; raises CompositeError"""
+        raw_steps = (definition or {}).get('steps')
+        if not isinstance(raw_steps, list) or not raw_steps:
+            raise CompositeError("a composite needs a list of steps")
+        steps: Dict[str, Step] = {}
+        for index, raw in enumerate(raw_steps):
+            if not isinstance(raw, dict):
+                raise CompositeError(f"step {index + 1} is not a mapping")
+            step_id = str(raw.get('id', f"step{index + 1}"))
+            if not _STEP_ID.match(step_id) or step_id in steps:
+                raise CompositeError(f"step ids must be unique names, got {step_id!r}")
+            if not isinstance(raw.get('tool'), str):
+                raise CompositeError(f"step {step_id} names no tool")
+            arguments = raw.get('arguments') or {}
+            if not isinstance(arguments, dict):
+                raise CompositeError(f"step {step_id}: arguments must be a mapping")
+            after = list(raw.get('after') or [])
+            after += [path[0] for root, path in references(arguments) if root == 'steps' and path]
+            steps[step_id] = Step(step_id, raw['tool'], arguments, list(dict.fromkeys(after)))
+
+        for step in steps.values():
+            for root, path in references(step.arguments):
+                if root == 'steps' and not path:
+                    raise CompositeError(f"step {step.id}: $steps needs a step id")
+            for dependency in step.after:
+                if dependency not in steps or dependency == step.id:
+                    raise CompositeError(f"step {step.id} depends on unknown step {dependency!r}")
+        plan = cls(steps, definition.get('result'))
+        plan.order()
+        for root, path in references(plan.result):
+            if root == 'steps' and (not path or path[0] not in steps):
+                raise CompositeError(f"result references unknown step {'.'.join(path)!r}")
+        return plan
+
+    def order(self) -> List[str]:
+        """Step ids in an order that respects dependencies; raises CompositeError on a cycle"""
+        ordered: List[str] = []
+        remaining = dict(self.steps)
+        while remaining:
+            ready = [step_id for step_id, step in remaining.items() if all(d in ordered for d in step.after)]
+            if not ready:
+                raise CompositeError(f"steps {', '.join(remaining)} depend on each other")
+            ordered.extend(ready)
+            for step_id in ready:
+                del remaining[step_id]
+        return ordered
+
+    def tools(self) -> List[str]:
+        return list(dict.fromkeys(step.tool for step in self.steps.values()))
+
+    def run(self, inputs: Dict[str, Any], call: Callable[[str, Dict[str, Any]], Any],
+            pool: Optional[Executor] = None) -> CompositeRun:
+        """Run the steps, each as soon as its dependencies are done.
+
+        `call(tool, arguments)` returns an ExecutionResult. With a `pool`,
+        ready steps run on it in parallel; without one they run in order on
+        the calling thread.
+        """
+        run = CompositeRun({}, {step_id: StepRun(step.tool) for step_id, step in self.steps.items()})
+        pending = [self.steps[step_id] for step_id in self.order()]
+        running: Dict[Any, Tuple[Step, float]] = {}
+
+        def finish(step: Step, result: Any, started: float):
+            record = run.steps[step.id]
+            record.seconds = time.perf_counter() - started
+            record.outcome = result.outcome
+            record.status_code = result.status_code
+            if result.outcome == 'success':
+                run.outputs[step.id] = result.envelope.get('data')
+            else:
+                record.error = _error_text(result.envelope)
+                run.fail(step.id, f"step {step.id} ({step.tool}) failed: {record.error}")
+
+        while pending or running:
+            if run.error is None:
+                for step in [s for s in pending if all(d in run.outputs for d in s.after)]:
+                    pending.remove(step)
+                    try:
+                        arguments = resolve(step.arguments, inputs, run.outputs)
+                    except CompositeError as e:
+                        run.steps[step.id].outcome, run.steps[step.id].error = 'error', str(e)
+                        run.fail(step.id, f"step {step.id}: {e}")
+                        break
+                    started = time.perf_counter()
+                    if pool is None:
+                        finish(step, call(step.tool, arguments), started)
+                        break
+                    running[pool.submit(call, step.tool, arguments)] = (step, started)
+            if not running:
+                if run.error is not None or not pending:
+                    break
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                step, started = running.pop(future)
+                finish(step, future.result(), started)
+
+        if run.error is None:
+            if self.result is None:
+                run.result = dict(run.outputs)
+            else:
+                try:
+                    run.result = resolve(self.result, inputs, run.outputs)
+                except CompositeError as e:
+                    run.fail(None, f"result: {e}")
+        return run
+
+
+def check_composite(definition: Dict[str, Any],
+                    get_tool: Callable[[str], Optional[Dict[str, Any]]]) -> Optional[str]:
+    """Why a composite definition can't run against the tools `get_tool` finds, or None if it can
+
+    Every step tool must exist and must not be a composite itself.
+    """
+    try:
+        plan = CompositePlan.parse(definition)
+    except CompositeError as e:
+        return str(e)
+    for name in plan.tools():
+        tool = get_tool(name)
+        if tool is None:
+            return f'unknown tool {name}'
+        if 'composite' in tool:
+            return f'step tool {name} is itself a composite'
+    return None
+
+
+def _error_text(envelope: Dict[str, Any]) -> str:
+    if envelope.get('error'):
+        return str(envelope['error'])
+    data = envelope.get('data')
+    if isinstance(data, dict) and data.get('error'):
+        return str(data['error'])
+    return f"status {envelope.get('status_code')}"
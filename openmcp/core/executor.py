@@ -0,0 +1,268 @@
+"""
+Tool execution: parameter routing and the upstream HTTP call.
+
+Used by the /api/tools/execute endpoint and directly by in-process clients
+(OllamaIntegration, OllamaToolClient), so both share one registry, one
+connection pool and the same metrics. Results are shaped for the model
+(projected, truncated, capped) here, so every client gets the same.
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+
+from openmcp.core.composite import CompositeError, CompositePlan
+from openmcp.core.registry import ToolRegistry, registry as default_registry
+from openmcp.core.response_shaping import ResponseShape
+from openmcp.utils.logging import slow_call_logger
+from openmcp.utils.metrics import (TOOL_CALLS, TOOL_ERRORS, TOOL_LATENCY, TOOL_IN_FLIGHT, TOOL_RESULTS_SHAPED,
+                                   UPSTREAM_LATENCY)
+from openmcp.utils.timing import PhaseTimer, create_timed_session, reset_connect_time, connect_time
+
+SUPPORTED_METHODS = ['GET', 'POST', 'PUT', 'DELETE']
+
+
+@dataclass
+class ExecutionResult:
+    """Outcome of one tool call"""
+    envelope: Dict[str, Any]
+    http_status: int = 200           # status the HTTP API answers with
+    outcome: str = 'error'           # success, upstream_error, error, unavailable or not_found
+    status_code: Optional[int] = None  # upstream status, if the call got that far
+    timer: PhaseTimer = field(default_factory=PhaseTimer)
+
+
+class ToolExecutor:
+    """Executes registered tools against their upstream APIs"""
+
+    def __init__(self, registry: Optional[ToolRegistry] = None,
+                 session: Optional[requests.Session] = None,
+                 slow_call_threshold_ms: float = 0,
+                 result_max_items: int = 0,
+                 result_max_tokens: int = 0,
+                 max_parallel_steps: int = 8,
+                 timeout: Optional[float] = 30.0):
+        self.registry = registry if registry is not None else default_registry
+        # Shared keep-alive session for upstream calls; reports connect time per request
+        self.session = session or create_timed_session()
+        self.slow_call_threshold_ms = slow_call_threshold_ms
+        # Seconds an upstream may take to connect or to send the next bytes (None = wait forever)
+        self.timeout = timeout
+        # Limits for tools that don't declare their own (0 = none)
+        self.result_max_items = result_max_items
+        self.result_max_tokens = result_max_tokens
+        # Runs the independent steps of composite tools side by side
+        self.max_parallel_steps = max_parallel_steps
+        self._step_pool: Optional[ThreadPoolExecutor] = None
+        self._step_pool_lock = threading.Lock()
+        # Told about upstreams that calls couldn't reach (an openmcp.core.health.HealthMonitor)
+        self.health_monitor = None
+
+    def route(self, tool: Dict[str, Any], parameters: Dict[str, Any]):
+        """Split parameters into path/query/body and build the URL"""
+        endpoint = tool['endpoint']
+        url = endpoint['url']
+        method = endpoint['method']
+
+        # Separate path parameters from body/query parameters
+        path_params = {}
+        body_params = {}
+        query_params = {}
+
+        # Simple parameter routing (in production, use the OpenAPI spec for proper routing)
+        for key, value in parameters.items():
+            if f'{{{key}}}' in url:
+                path_params[key] = value
+            elif method in ['GET', 'DELETE']:
+                query_params[key] = value
+            else:
+                body_params[key] = value
+
+        # Replace path parameters in URL
+        for key, value in path_params.items():
+            url = url.replace(f'{{{key}}}', str(value))
+
+        return method, url, query_params, body_params
+
+    def execute(self, tool_name: str, parameters: Dict[str, Any],
+                timer: Optional[PhaseTimer] = None, shape: bool = True,
+                timeout: Optional[float] = None) -> ExecutionResult:
+        """Execute a tool by making the actual HTTP request
+        
+        With `shape` (the default) the result data is cut down for a model
+        as described in openmcp.core.response_shaping; pass False for the
+        upstream response as is. `timeout` overrides the executor's upstream
+        timeout for this call (and the steps of a composite).
+        """
+        timer = timer or PhaseTimer()
+        timeout = timeout if timeout is not None else self.timeout
+
+        # Get tool definition
+        with timer.phase('lookup'):
+            tool = self.registry.get(tool_name)
+        if not tool:
+            return ExecutionResult({'error': f'Tool {tool_name} not found'}, 404, 'not_found', timer=timer)
+        if tool.get('unavailable'):
+            # Fail fast instead of waiting out a timeout against a server that's down
+            return ExecutionResult({'error': f"Tool {tool_name} is unavailable: {tool['unavailable']}",
+                                    'unavailable': True}, 503, 'unavailable', timer=timer)
+
+        TOOL_IN_FLIGHT.inc(tool_name)
+        result = ExecutionResult({}, timer=timer)
+        try:
+            if 'composite' in tool:
+                self._run_composite(tool, parameters, result, timeout)
+                if shape and 'data' in result.envelope:
+                    with timer.phase('shape'):
+                        self._shape(tool, result)
+                return result
+            
+            with timer.phase('route'):
+                method, url, query_params, body_params = self.route(tool, parameters)
+
+            if method not in SUPPORTED_METHODS:
+                result.envelope = {'error': f'Unsupported method: {method}'}
+                result.http_status = 400
+                return result
+
+            # Make the HTTP request; stream=True returns once headers arrive so
+            # time-to-first-byte and body download can be told apart
+            headers = {'Content-Type': 'application/json'}
+            reset_connect_time()
+            upstream_start = time.perf_counter()
+
+            if method in ['GET', 'DELETE']:
+                response = self.session.request(method, url, params=query_params, headers=headers, stream=True,
+                                                timeout=timeout)
+            else:
+                response = self.session.request(method, url, json=body_params, headers=headers, stream=True,
+                                                timeout=timeout)
+
+            connect_seconds = connect_time()
+            timer.record('connect', connect_seconds)
+            timer.record('ttfb', time.perf_counter() - upstream_start - connect_seconds)
+            with timer.phase('download'):
+                response.content
+
+            upstream_seconds = time.perf_counter() - upstream_start
+            timer.record('upstream', upstream_seconds)
+            UPSTREAM_LATENCY.observe(upstream_seconds, urlparse(url).netloc)
+            result.status_code = response.status_code
+            result.outcome = 'success' if response.ok else 'upstream_error'
+
+            with timer.phase('decode'):
+                result.envelope = {
+                    'success': response.ok,
+                    'status_code': response.status_code,
+                    'data': response.json() if response.headers.get('content-type', '').startswith('application/json') else response.text
+                }
+            if shape:
+                with timer.phase('shape'):
+                    self._shape(tool, result)
+            return result
+
+        except Exception as e:
+            if self.health_monitor is not None and isinstance(e, (requests.ConnectionError, requests.Timeout)):
+                self.health_monitor.report_failure(tool['endpoint']['url'])
+            if isinstance(e, requests.Timeout):
+                result.envelope = {'error': f'Upstream timed out after {timeout}s: {e}'}
+                result.http_status = 504
+            else:
+                result.envelope = {'error': str(e)}
+                result.http_status = 500
+            return result
+        finally:
+            TOOL_IN_FLIGHT.dec(tool_name)
+            TOOL_LATENCY.observe(timer.total, tool_name)
+            TOOL_CALLS.inc(tool_name, result.outcome)
+            if result.outcome != 'success':
+                TOOL_ERRORS.inc(tool_name)
+            self._log_if_slow(tool_name, result)
+    
+    def _steps(self) -> Optional[ThreadPoolExecutor]:
+        if self.max_parallel_steps <= 1:
+            return None
+        with self._step_pool_lock:
+            if self._step_pool is None:
+                self._step_pool = ThreadPoolExecutor(max_workers=self.max_parallel_steps,
+                                                     thread_name_prefix='openmcp-composite')
+        return self._step_pool
+    
+    def _call_step(self, tool_name: str, parameters: Dict[str, Any],
+                   timeout: Optional[float] = None) -> ExecutionResult:
+        step_tool = self.registry.get(tool_name)
+        if step_tool is not None and 'composite' in step_tool:
+            # Steps would wait on the pool they run on
+            return ExecutionResult({'error': f'Composite tool {tool_name} cannot be a step'}, 400, 'error')
+        # Unshaped: later steps may need fields the model wouldn't see
+        return self.execute(tool_name, parameters, shape=False, timeout=timeout)
+    
+    def _run_composite(self, tool: Dict[str, Any], parameters: Dict[str, Any], result: ExecutionResult,
+                       timeout: Optional[float] = None):
+        """Run a composite tool's steps into `result`; see openmcp.core.composite"""
+        try:
+            plan = CompositePlan.parse(tool['composite'])
+        except CompositeError as e:
+            result.envelope = {'error': f'Invalid composite tool: {e}'}
+            result.http_status = 500
+            return
+        run = plan.run(parameters, lambda name, arguments: self._call_step(name, arguments, timeout), self._steps())
+        for step_id, step in run.steps.items():
+            if step.outcome != 'skipped':
+                result.timer.record(f'step_{step_id}', step.seconds)
+        steps = {step_id: step.info() for step_id, step in run.steps.items()}
+        
+        if run.error is None:
+            result.outcome, result.status_code = 'success', 200
+            result.envelope = {'success': True, 'status_code': 200, 'data': run.result, 'steps': steps}
+            return
+        failed = run.steps.get(run.failed) if run.failed else None
+        result.status_code = failed.status_code if failed else None
+        # A step the upstream API refused (or whose upstream is down) fails like a single tool
+        # would; anything else is ours
+        result.outcome = failed.outcome if failed and failed.outcome in ('upstream_error', 'unavailable') else 'error'
+        result.envelope = {
+            'success': False,
+            'status_code': result.status_code,
+            'error': run.error,
+            'data': {'failed_step': run.failed, 'completed': run.outputs},
+            'steps': steps
+        }
+        if result.outcome == 'error':
+            result.http_status = 500
+        elif result.outcome == 'unavailable':
+            result.http_status = 503
+    
+    def _shape(self, tool: Dict[str, Any], result: ExecutionResult):
+        """Project, truncate and cap the envelope's data; notes what was done under `shaped`"""
+        shape = ResponseShape.for_tool(tool, self.result_max_items, self.result_max_tokens)
+        # Error bodies don't follow the declared fields, but are still limited
+        data, info = shape.apply(result.envelope['data'], project_fields=result.outcome == 'success')
+        if info:
+            result.envelope['data'] = data
+            result.envelope['shaped'] = info
+            for how in ('projected', 'truncated_arrays', 'capped'):
+                if how in info:
+                    TOOL_RESULTS_SHAPED.inc(tool['name'], how)
+
+    def _log_if_slow(self, tool_name: str, result: ExecutionResult):
+        """Write calls over the configured threshold to the slow-call log"""
+        threshold_ms = self.slow_call_threshold_ms
+        total_ms = result.timer.total * 1000
+        if threshold_ms <= 0 or total_ms < threshold_ms:
+            return
+        slow_call_logger.warning(json.dumps({
+            'timestamp': time.time(),
+            'tool': tool_name,
+            'outcome': result.outcome,
+            'status_code': result.status_code,
+            'total_ms': round(total_ms, 3),
+            'threshold_ms': threshold_ms,
+            'phases': result.timer.as_dict()
+        }))
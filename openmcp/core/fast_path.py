@@ -0,0 +1,257 @@
+r"""
+Deterministic fast path for trivial tool requests.
+
+"What is 42 plus 17?" costs two LLM calls on the normal path: one to pick
+the add tool and its arguments, one to phrase a result the tool already
+states. Operations can declare intent patterns in their spec instead:
+
+    x-ai-patterns:
+      - pattern: '(?:what is )?(?P<a>-?\d+(?:\.\d+)?) ?(?:\+|plus) ?(?P<b>-?\d+(?:\.\d+)?)'
+        template: '{a} + {b} = {result}'
+
+A pattern must match the whole message (case-insensitive, ignoring
+surrounding whitespace, closing punctuation and a leading "please"), and
+exactly one route may match; its named groups become the tool's arguments.
+The tool runs directly and the template is filled from the arguments and
+the fields of the result. Anything else, including a tool error or a
+template that doesn't fit the result, falls back to the model.
+"""
+
+import logging
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from openmcp.core.response_shaping import encode_compact
+from openmcp.core.schema_minifier import tool_alias
+from openmcp.utils.metrics import FAST_PATH_REQUESTS, FAST_PATH_SECONDS_SAVED
+
+logger = logging.getLogger(__name__)
+
+_LEADING_PLEASE = re.compile(r'^please[,\s]+', re.IGNORECASE)
+_TRUE_WORDS = ('true', 'yes', 'on', '1')
+_FALSE_WORDS = ('false', 'no', 'off', '0')
+# Weight of the newest LLM turn in the baseline the savings are measured against
+_BASELINE_ALPHA = 0.2
+
+
+def normalize_message(text: str) -> str:
+    """The part of a message patterns are matched against"""
+    text = ' '.join(text.split()).rstrip(' ?!.')
+    return _LEADING_PLEASE.sub('', text)
+
+
+def coerce(value: str, schema: Dict[str, Any]) -> Any:
+    """A matched string as the type its parameter schema asks for (ValueError if it can't be)"""
+    kind = (schema or {}).get('type')
+    if kind == 'integer':
+        return int(value)
+    if kind == 'number':
+        number = float(value)
+        return int(number) if number.is_integer() and '.' not in value else number
+    if kind == 'boolean':
+        lowered = value.lower()
+        if lowered in _TRUE_WORDS or lowered in _FALSE_WORDS:
+            return lowered in _TRUE_WORDS
+        raise ValueError(f"not a boolean: {value!r}")
+    return value
+
+
+def _display(value: Any) -> Any:
+    # 59.0 reads as 59 in an answer
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+@dataclass
+class Route:
+    """One intent pattern of one tool"""
+    name: str
+    tool: str
+    regex: re.Pattern
+    template: Optional[str] = None
+    fixed: Dict[str, Any] = field(default_factory=dict)
+    properties: Dict[str, Any] = field(default_factory=dict)
+    hits: int = 0
+    fallbacks: int = 0
+    seconds: float = 0.0
+    seconds_saved: float = 0.0
+
+    def info(self, messages: int) -> Dict[str, Any]:
+        return {
+            'tool': self.tool,
+            'pattern': self.regex.pattern,
+            'hits': self.hits,
+            'hit_rate': self.hits / messages if messages else 0.0,
+            'fallbacks': self.fallbacks,
+            'mean_ms': self.seconds / self.hits * 1000 if self.hits else None,
+            'latency_saved_ms': self.seconds_saved * 1000
+        }
+
+
+@dataclass
+class RouteMatch:
+    """A message a route will answer, with the arguments for its tool"""
+    route: Route
+    parameters: Dict[str, Any]
+    started: float
+
+    @property
+    def tool(self) -> str:
+        return self.route.tool
+
+
+def build_routes(tools: List[Dict[str, Any]]) -> List[Route]:
+    """Routes for every `fast_paths` entry of the given tool definitions"""
+    routes = []
+    for tool in tools:
+        entries = tool.get('fast_paths') or []
+        properties = (tool.get('parameters') or {}).get('properties') or {}
+        required = set((tool.get('parameters') or {}).get('required') or [])
+        alias = tool_alias(tool)
+        for index, entry in enumerate(entries):
+            if isinstance(entry, str):
+                entry = {'pattern': entry}
+            name = alias if len(entries) == 1 else f"{alias}[{index}]"
+            try:
+                regex = re.compile(entry['pattern'], re.IGNORECASE)
+            except (KeyError, re.error) as e:
+                logger.warning(f"Skipping fast path {name} of {tool['name']}: {e}")
+                continue
+            fixed = dict(entry.get('parameters') or {})
+            missing = required - set(regex.groupindex) - set(fixed)
+            if missing:
+                logger.warning(f"Skipping fast path {name} of {tool['name']}: "
+                               f"no group for required {', '.join(sorted(missing))}")
+                continue
+            routes.append(Route(name, tool['name'], regex, entry.get('template'), fixed, properties))
+    return routes
+
+
+class FastPathRouter:
+    """Answers messages that match a tool's intent pattern without the model.
+
+    Shared by every conversation on a registry; routes are rebuilt when the
+    catalog version changes. Clients call `match()` before the model, run
+    the tool themselves and hand the result to `answer()`, which returns
+    None whenever the model should take the message after all. The time
+    saved per hit is measured against the running average of LLM turns that
+    called a tool, reported through `observe_llm_turn()`.
+    """
+
+    def __init__(self, registry):
+        self.registry = registry
+        self._routes: Optional[Tuple[int, List[Route]]] = None
+        self._lock = threading.Lock()
+        self.messages = 0
+        self.fallbacks: Dict[str, int] = {}
+        self.llm_turn_seconds: Optional[float] = None
+
+    def routes(self) -> List[Route]:
+        cached = self._routes
+        snapshot = self.registry.snapshot()
+        if cached is None or cached[0] != snapshot.version:
+            version = snapshot.version
+            # Tools of an upstream that is down are left to the model, which is told they're missing
+            routes = build_routes([tool for _, tool in snapshot.items() if not tool.get('unavailable')])
+            # Counts carry over for routes that survive a catalog change
+            previous = {route.name: route for route in (cached[1] if cached else [])}
+            for route in routes:
+                old = previous.get(route.name)
+                if old is not None and old.tool == route.tool:
+                    route.hits, route.fallbacks = old.hits, old.fallbacks
+                    route.seconds, route.seconds_saved = old.seconds, old.seconds_saved
+            cached = self._routes = (version, routes)
+        return cached[1]
+
+    def _fallback(self, reason: str, route: Optional[Route] = None):
+        with self._lock:
+            self.fallbacks[reason] = self.fallbacks.get(reason, 0) + 1
+            if route is not None:
+                route.fallbacks += 1
+        FAST_PATH_REQUESTS.inc(route.name if route else '', reason)
+
+    def match(self, message: str) -> Optional[RouteMatch]:
+        """The route for `message`, or None if the model should handle it"""
+        started = time.perf_counter()
+        routes = self.routes()
+        with self._lock:
+            self.messages += 1
+        if not routes:
+            return None
+        text = normalize_message(message)
+        matches = [(route, m) for route in routes for m in [route.regex.fullmatch(text)] if m]
+        if not matches:
+            self._fallback('no_match')
+            return None
+        if len({route.tool for route, _ in matches}) > 1:
+            self._fallback('ambiguous')
+            return None
+        route, m = matches[0]
+        parameters = dict(route.fixed)
+        try:
+            for name, value in m.groupdict().items():
+                if value is not None:
+                    parameters[name] = coerce(value, route.properties.get(name))
+        except ValueError as e:
+            logger.debug(f"Fast path {route.name} could not read its arguments: {e}")
+            self._fallback('bad_parameters', route)
+            return None
+        return RouteMatch(route, parameters, started)
+
+    def answer(self, match: RouteMatch, envelope: Dict[str, Any]) -> Optional[str]:
+        """The reply for an executed match (an OpenMCP execute envelope), or None to fall back"""
+        route = match.route
+        if not envelope.get('success'):
+            self._fallback('tool_error', route)
+            return None
+        data = envelope.get('data')
+        if route.template is None:
+            reply = data if isinstance(data, str) else encode_compact(data)
+        else:
+            values = {name: _display(value) for name, value in match.parameters.items()}
+            if isinstance(data, dict):
+                values.update((key, _display(value)) for key, value in data.items())
+            else:
+                values['result'] = _display(data)
+            try:
+                reply = route.template.format_map(values)
+            except (KeyError, IndexError, ValueError) as e:
+                logger.warning(f"Fast path {route.name} template does not fit the result: {e}")
+                self._fallback('template', route)
+                return None
+
+        seconds = time.perf_counter() - match.started
+        saved = max(0.0, self.llm_turn_seconds - seconds) if self.llm_turn_seconds is not None else 0.0
+        with self._lock:
+            route.hits += 1
+            route.seconds += seconds
+            route.seconds_saved += saved
+        FAST_PATH_REQUESTS.inc(route.name, 'hit')
+        FAST_PATH_SECONDS_SAVED.inc(route.name, amount=saved)
+        return reply
+
+    def observe_llm_turn(self, seconds: float):
+        """Record how long a turn that went through the model and a tool took"""
+        with self._lock:
+            if self.llm_turn_seconds is None:
+                self.llm_turn_seconds = seconds
+            else:
+                self.llm_turn_seconds += _BASELINE_ALPHA * (seconds - self.llm_turn_seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        routes = self.routes()
+        with self._lock:
+            hits = sum(route.hits for route in routes)
+            return {
+                'routes': {route.name: route.info(self.messages) for route in routes},
+                'messages': self.messages,
+                'hits': hits,
+                'hit_rate': hits / self.messages if self.messages else 0.0,
+                'fallbacks': dict(self.fallbacks),
+                'llm_turn_ms': self.llm_turn_seconds * 1000 if self.llm_turn_seconds is not None else None,
+                'latency_saved_ms': sum(route.seconds_saved for route in routes) * 1000
+            }
@@ -0,0 +1,263 @@
+"""
+Background health probes for the upstream APIs behind registered tools.
+
+A tool whose upstream is down still looks callable: the model picks it, the
+call waits out a timeout and the turn is wasted. HealthMonitor groups the
+registered tools by upstream (scheme and host of the endpoint URL) and
+probes each upstream from a background thread: GET on the spec's
+`x-ai-health-path` when it declares one, otherwise HEAD on the server root,
+where any answer below 500 means the server is up.
+
+Intervals adapt per upstream. Each probe that finds it in the same state
+stretches the interval (by `backoff`, up to `max_interval`); a change of
+state, a failed probe or a failed tool call (`report_failure`) brings the
+next probe forward to `min_interval`. After `failure_threshold` failed
+probes in a row the upstream's tools are marked unavailable in the
+registry: listings show them with `available: false`, prompts leave them
+out and the executor refuses them. The first successful probe clears the
+mark. Marks are registry changes, so catalog versions, ETags, the change
+feed and per-version caches follow them.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+
+from openmcp.core.registry import RegistrySnapshot, ToolRegistry
+from openmcp.utils.metrics import UPSTREAM_HEALTH_PROBES
+
+logger = logging.getLogger(__name__)
+
+
+def upstream_of(url: str) -> Optional[str]:
+    """scheme://host[:port] of a URL, or None for one without a host"""
+    parsed = urlparse(url or '')
+    if not parsed.scheme or not parsed.netloc:
+        return None
+    return f"{parsed.scheme}://{parsed.netloc}"
+
+
+@dataclass
+class Upstream:
+    """One upstream API and what the probes found"""
+    origin: str
+    probe_url: str
+    method: str  # GET for a declared health path, HEAD otherwise
+    interval: float
+    tools: int = 0
+    healthy: bool = True
+    failures: int = 0  # failed probes in a row
+    probes: int = 0
+    next_probe: float = 0.0  # time.monotonic() of the next probe
+    last_checked: Optional[float] = None  # wall clock
+    latency: Optional[float] = None
+    last_error: Optional[str] = None
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            'upstream': self.origin,
+            'probe': f"{self.method} {self.probe_url}",
+            'healthy': self.healthy,
+            'tools': self.tools,
+            'failures': self.failures,
+            'probes': self.probes,
+            'interval_seconds': self.interval,
+            'last_checked': self.last_checked,
+            'latency_ms': round(self.latency * 1000, 1) if self.latency is not None else None,
+            'last_error': self.last_error
+        }
+
+
+class HealthMonitor:
+    """Probes the registry's upstreams and marks the tools of unhealthy ones"""
+
+    def __init__(self, registry: ToolRegistry, session: Optional[requests.Session] = None,
+                 min_interval: float = 5.0, max_interval: float = 60.0, backoff: float = 2.0,
+                 timeout: float = 2.0, failure_threshold: int = 2, max_parallel_probes: int = 8):
+        self.registry = registry
+        self.session = session or requests.Session()
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.timeout = timeout
+        self.failure_threshold = failure_threshold
+        self.max_parallel_probes = max_parallel_probes
+        self.upstreams: Dict[str, Upstream] = {}
+        self._lock = threading.Lock()
+        self._synced_version: Optional[int] = None
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    @staticmethod
+    def probe_target(tool: Dict[str, Any]) -> Optional[Tuple[str, str, str]]:
+        """(upstream, probe URL, method) for a tool, None for tools without one (composites)"""
+        origin = upstream_of(tool.get('endpoint', {}).get('url', ''))
+        if origin is None:
+            return None
+        health_url = tool.get('health_url')
+        if health_url:
+            return origin, health_url, 'GET'
+        return origin, f"{origin}/", 'HEAD'
+
+    @property
+    def unavailable_tools(self) -> int:
+        return sum(1 for _, tool in self.registry.items() if tool.get('unavailable'))
+
+    def sync(self):
+        """Follow the registry: track new upstreams, drop unused ones, re-mark replaced tools"""
+        snapshot = self.registry.snapshot()
+        if snapshot.version == self._synced_version:
+            return
+        targets: Dict[str, Tuple[str, str, int]] = {}
+        for _, tool in snapshot.items():
+            target = self.probe_target(tool)
+            if target is None:
+                continue
+            origin, url, method = target
+            known = targets.get(origin)
+            # A declared health path wins over HEAD on the root
+            if known is None or (known[1] == 'HEAD' and method == 'GET'):
+                targets[origin] = (url, method, (known[2] if known else 0) + 1)
+            else:
+                targets[origin] = (known[0], known[1], known[2] + 1)
+        with self._lock:
+            now = time.monotonic()
+            upstreams = {}
+            for origin, (url, method, count) in targets.items():
+                upstream = self.upstreams.get(origin)
+                if upstream is None or (upstream.probe_url, upstream.method) != (url, method):
+                    upstream = Upstream(origin, url, method, self.min_interval, next_probe=now)
+                upstream.tools = count
+                upstreams[origin] = upstream
+            self.upstreams = upstreams
+        self._synced_version = snapshot.version
+        # Tools registered (again) since the last sync don't carry the marks yet
+        self._mark(snapshot)
+
+    def _mark(self, snapshot: RegistrySnapshot, origins: Optional[List[str]] = None):
+        reasons: Dict[str, Optional[str]] = {}
+        for name, tool in snapshot.items():
+            target = self.probe_target(tool)
+            upstream = self.upstreams.get(target[0]) if target else None
+            if upstream is None or (origins is not None and upstream.origin not in origins):
+                continue
+            reasons[name] = None if upstream.healthy else f"upstream {upstream.origin} is not responding"
+        # The marks bump the version; the next sync() looks at it again rather
+        # than skipping it, in case other tools were stored meanwhile
+        self.registry.set_unavailable(reasons)
+
+    def probe(self, upstream: Upstream) -> Tuple[bool, Optional[str], float]:
+        """Probe one upstream once: (up, error, seconds)"""
+        start = time.perf_counter()
+        try:
+            response = self.session.request(upstream.method, upstream.probe_url, timeout=self.timeout,
+                                            allow_redirects=False)
+            # Any answer to HEAD / shows the server is there; a health path has to say it's fine
+            up = response.status_code < 500 if upstream.method == 'HEAD' else response.status_code < 400
+            error = None if up else f"status {response.status_code}"
+        except requests.RequestException as e:
+            up, error = False, str(e)
+        return up, error, time.perf_counter() - start
+
+    def _apply(self, upstream: Upstream, up: bool, error: Optional[str], seconds: float) -> bool:
+        """Record a probe result; True if the upstream changed state"""
+        changed = False
+        with self._lock:
+            upstream.probes += 1
+            upstream.last_checked = time.time()
+            upstream.latency = seconds
+            if up:
+                upstream.failures = 0
+                upstream.last_error = None
+                if not upstream.healthy:
+                    upstream.healthy = changed = True
+                    logger.info(f"Upstream {upstream.origin} recovered; its {upstream.tools} tools are available again")
+            else:
+                upstream.failures += 1
+                upstream.last_error = error
+                if upstream.healthy and upstream.failures >= self.failure_threshold:
+                    upstream.healthy = False
+                    changed = True
+                    logger.warning(f"Upstream {upstream.origin} is down ({error}); "
+                                   f"hiding its {upstream.tools} tools until it recovers")
+            # Settled upstreams are probed less and less often; a failure or change brings the next one forward
+            if changed or (not up and upstream.healthy):
+                upstream.interval = self.min_interval
+            else:
+                upstream.interval = min(upstream.interval * self.backoff, self.max_interval)
+            upstream.next_probe = time.monotonic() + upstream.interval
+        UPSTREAM_HEALTH_PROBES.inc(upstream.origin, 'up' if up else 'down')
+        return changed
+
+    def check_health(self, force: bool = False) -> List[str]:
+        """Probe the upstreams that are due (all with `force`); returns those that changed state"""
+        now = time.monotonic()
+        with self._lock:
+            due = [u for u in self.upstreams.values() if force or u.next_probe <= now]
+        if not due:
+            return []
+        if len(due) == 1 or self.max_parallel_probes <= 1:
+            results = [self.probe(upstream) for upstream in due]
+        else:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_parallel_probes,
+                                                thread_name_prefix='openmcp-health')
+            results = list(self._pool.map(self.probe, due))
+        changed = [upstream.origin for upstream, result in zip(due, results) if self._apply(upstream, *result)]
+        if changed:
+            self._mark(self.registry.snapshot(), changed)
+        return changed
+
+    def report_failure(self, url: str):
+        """A tool call couldn't reach `url`: probe its upstream now rather than at the next interval"""
+        upstream = self.upstreams.get(upstream_of(url) or '')
+        if upstream is not None:
+            upstream.next_probe = 0.0
+            self._wake.set()
+
+    def is_healthy(self, url: str) -> bool:
+        upstream = self.upstreams.get(upstream_of(url) or '')
+        return upstream is None or upstream.healthy
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [upstream.info() for upstream in self.upstreams.values()]
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self.sync()
+                self.check_health()
+            except Exception:
+                logger.exception("Upstream health check failed")
+            with self._lock:
+                next_probe = min((u.next_probe for u in self.upstreams.values()), default=float('inf'))
+            # Wake at least every second to pick up registry changes
+            self._wake.wait(min(max(next_probe - time.monotonic(), 0.05), 1.0))
+            self._wake.clear()
+
+    def start(self):
+        """Start probing in a background thread (idempotent)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name='openmcp-upstream-health', daemon=True)
+            self._thread.start()
+
+    def close(self):
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,176 @@
+"""
+Token-budgeted conversation history with rolling summarization.
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+Message = Dict[str, Any]
+# (messages being folded away, previous summary or None) -> new summary
+Summarizer = Callable[[List[Message], Optional[str]], str]
+
+# Per-message framing (role, separators) on top of its content
+_MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_PROMPT = """Summarize the conversation below for an assistant that will continue it.
+Keep facts, numbers, tool results and open questions; drop pleasantries.
+Answer with the summary only, in at most {max_words} words."""
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (about four characters per token)"""
+    return len(text) // 4 + 1
+
+
+def message_tokens(message: Message) -> int:
+    return estimate_tokens(str(message.get('content') or '')) + _MESSAGE_OVERHEAD_TOKENS
+
+
+def _is_tool_result(message: Message) -> bool:
+    return message.get('role') == 'tool' or str(message.get('content', '')).startswith('Tool result:')
+
+
+def extractive_summary(messages: List[Message], previous: Optional[str], max_chars: int = 2000) -> str:
+    """Summarizer that needs no model: the opening of each folded message"""
+    lines = [previous] if previous else []
+    for message in messages:
+        content = ' '.join(str(message.get('content') or '').split())
+        if content:
+            lines.append(f"{message.get('role', 'user')}: {content[:120]}")
+    # Keep the most recent part if the summary outgrows its budget
+    return '\n'.join(lines)[-max_chars:]
+
+
+def llm_summarizer(client: Any, model: str, max_words: int = 200, keep_alive: Any = None) -> Summarizer:
+    """Summarizer that asks a (synchronous) Ollama client to fold old turns"""
+    def summarize(messages: List[Message], previous: Optional[str]) -> str:
+        transcript = '\n'.join(f"{m.get('role', 'user')}: {m.get('content', '')}" for m in messages)
+        if previous:
+            transcript = f"Earlier summary:\n{previous}\n\n{transcript}"
+        response = client.chat(
+            model=model,
+            messages=[
+                {"role": "system", "content": SUMMARY_PROMPT.format(max_words=max_words)},
+                {"role": "user", "content": transcript}
+            ],
+            options={"temperature": 0},
+            keep_alive=keep_alive
+        )
+        return response['message']['content'].strip()
+
+    return summarize
+
+
+class HistoryManager:
+    """Keeps the prompt for each model call under a token budget.
+
+    `prepare()` is called with the live history list before every model call.
+    It always keeps the system prompt and the most recent messages, and
+    compacts older tool results. When the prompt is still over budget it
+    removes the oldest messages from the list (so memory stays bounded too)
+    and folds them into a running summary on a background thread. The next
+    prompt carries the summary inside the system message. Until the
+    summarizer finishes, the folded turns are simply absent, so no model
+    call ever waits for it.
+    """
+
+    def __init__(self, budget_tokens: int = 4096, keep_recent: int = 6, tool_result_chars: int = 500,
+                 summary_tokens: int = 512, summarizer: Optional[Summarizer] = None, background: bool = True):
+        self.budget_tokens = budget_tokens
+        self.keep_recent = keep_recent
+        self.tool_result_chars = tool_result_chars
+        self.summary_tokens = summary_tokens
+        self.summarizer = summarizer or (lambda messages, previous: extractive_summary(
+            messages, previous, max_chars=summary_tokens * 4))
+        self.background = background
+        self.summary: Optional[str] = None
+        self._pending: List[Message] = []
+        self._generation = 0  # bumped by reset(); summaries of an earlier conversation are dropped
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def prepare(self, system_prompt: Optional[str], history: List[Message]) -> List[Message]:
+        """Trim `history` in place and return the messages to send"""
+        recent_start = max(0, len(history) - self.keep_recent)
+        for index in range(recent_start):
+            history[index] = self._compact(history[index])
+
+        system = self._system_message(system_prompt)
+        total = sum(message_tokens(m) for m in history) + (message_tokens(system) if system else 0)
+
+        folded = []
+        while total > self.budget_tokens and len(history) > self.keep_recent:
+            message = history.pop(0)
+            folded.append(message)
+            total -= message_tokens(message)
+        # A tool result can't lead the history without the call that produced it
+        while history and len(history) > 1 and history[0].get('role') == 'tool':
+            folded.append(history.pop(0))
+
+        if folded:
+            self._fold(folded)
+
+        return ([system] if system else []) + list(history)
+
+    def reset(self):
+        with self._lock:
+            self.summary = None
+            self._pending = []
+            self._generation += 1
+
+    def wait(self, timeout: Optional[float] = None):
+        """Block until any background summarization has finished"""
+        worker = self._worker
+        if worker is not None:
+            worker.join(timeout)
+
+    def _system_message(self, system_prompt: Optional[str]) -> Optional[Message]:
+        summary = self.summary
+        if summary:
+            summary_block = f"Summary of the earlier conversation:\n{summary}"
+            content = f"{system_prompt}\n\n{summary_block}" if system_prompt else summary_block
+            return {"role": "system", "content": content}
+        if system_prompt:
+            return {"role": "system", "content": system_prompt}
+        return None
+
+    def _compact(self, message: Message) -> Message:
+        content = str(message.get('content') or '')
+        if not _is_tool_result(message) or len(content) <= self.tool_result_chars:
+            return message
+        dropped = len(content) - self.tool_result_chars
+        return dict(message, content=f"{content[:self.tool_result_chars]}... [{dropped} chars omitted]")
+
+    def _fold(self, messages: List[Message]):
+        with self._lock:
+            self._pending.extend(messages)
+            start_worker = self.background and self._worker is None
+            if start_worker:
+                self._worker = threading.Thread(target=self._drain, name='openmcp-history-summary', daemon=True)
+                self._worker.start()
+        if not self.background:
+            self._drain()
+
+    def _drain(self):
+        """Summarize queued messages until none are left; the lock is not held while summarizing"""
+        while True:
+            with self._lock:
+                if not self._pending:
+                    if self.background:
+                        self._worker = None
+                    return
+                batch, self._pending = self._pending, []
+                previous = self.summary
+                generation = self._generation
+            try:
+                summary = self.summarizer(batch, previous)
+            except Exception as e:
+                logger.warning(f"History summarization failed, using an extractive summary: {e}")
+                summary = extractive_summary(batch, previous, max_chars=self.summary_tokens * 4)
+            with self._lock:
+                # A reset() while summarizing started a new conversation
+                if generation == self._generation:
+                    self.summary = summary[-self.summary_tokens * 4:]
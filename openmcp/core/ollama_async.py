@@ -0,0 +1,504 @@
+"""
+Asyncio counterparts of OllamaIntegration and OllamaToolClient.
+
+One event loop can hold thousands of conversations: every LLM call, tool
+discovery and tool execution is awaited instead of blocking a thread. The
+classes reuse the synchronous ones for everything that isn't I/O (prompt
+building, tool-call parsing, conversation bookkeeping), so both behave the
+same. Pass a shared `client` (ollama.AsyncClient) and `http`
+(httpx.AsyncClient) to give many sessions one set of connection pools, or
+spread them over an AsyncClientPool.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+import httpx
+import ollama
+
+from openmcp.core.capabilities import CapabilityCache, ModelCapabilities
+from openmcp.core.executor import ToolExecutor
+from openmcp.core.fast_path import FastPathRouter
+from openmcp.core.history import HistoryManager
+from openmcp.core.ollama_integration import KeepAlive, OllamaConfig, OllamaIntegration, preload_request
+from openmcp.core.ollama_tools import OllamaToolClient, Tool
+from openmcp.core.response_cache import AsyncCachingClient, ResponseCache
+from openmcp.core.response_shaping import encode_compact
+from openmcp.core.streaming import StreamMeter
+from openmcp.core.tool_call_detector import ToolCallDetector, astream_until_tool_call
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncClientPool:
+    """Round-robin set of ollama/httpx async clients for many sessions.
+
+    httpcore scans every connection in a client's pool each time it assigns
+    a request, so one client holding thousands of streaming connections
+    spends more CPU in that scan than on the request. Spreading sessions over
+    a handful of clients keeps each pool small.
+    """
+
+    def __init__(self, host: Optional[str] = None, size: int = 8, timeout: Optional[float] = None):
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+        self._clients = [
+            (ollama.AsyncClient(host=host, limits=limits, timeout=timeout),
+             httpx.AsyncClient(limits=limits, timeout=timeout))
+            for _ in range(max(1, size))
+        ]
+        self._next = 0
+
+    def next(self) -> Tuple[ollama.AsyncClient, httpx.AsyncClient]:
+        """The (ollama client, OpenMCP http client) pair for a new session"""
+        pair = self._clients[self._next % len(self._clients)]
+        self._next += 1
+        return pair
+
+    async def aclose(self):
+        for client, http in self._clients:
+            await client._client.aclose()
+            await http.aclose()
+
+
+class AsyncOllamaIntegration(OllamaIntegration):
+    """Async OllamaIntegration: same prompts and history, awaitable I/O"""
+
+    _caching_client = AsyncCachingClient
+    
+    def __init__(self, config: OllamaConfig, openmcp_base: str = "http://localhost:5005",
+                 executor: Optional[ToolExecutor] = None,
+                 client: Optional[ollama.AsyncClient] = None,
+                 http: Optional[httpx.AsyncClient] = None,
+                 history: Optional[HistoryManager] = None,
+                 response_cache: Optional[ResponseCache] = None,
+                 fast_path: Optional[FastPathRouter] = None):
+        super().__init__(config, openmcp_base, executor, client=client or ollama.AsyncClient(host=config.host),
+                         history=history, response_cache=response_cache, fast_path=fast_path)
+        self.http = http or httpx.AsyncClient(timeout=None)
+
+    async def discover_tools(self) -> List[Dict[str, Any]]:
+        """Discover available tools from OpenMCP"""
+        if self.executor is not None:
+            return super().discover_tools()
+        try:
+            if await self.tool_mirror.async_sync(self.http):
+                self.available_tools = self.tool_mirror.available_summaries()
+                self.catalog_version = self.tool_mirror.version
+            return self.available_tools
+        except Exception as e:
+            logger.error(f"Error discovering tools: {e}")
+            return []
+    
+    async def preload(self, warm: bool = True) -> float:
+        """Load the model now (and evaluate the system prompt if `warm`); returns seconds taken"""
+        start = time.perf_counter()
+        await self.client.chat(**preload_request(self.config.model, self.config.keep_alive,
+                                                 self.system_prompt() if warm else None))
+        return time.perf_counter() - start
+
+    async def execute_tool(self, tool_name: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute a tool through OpenMCP"""
+        tool_name = self.prompt_catalog().resolve(tool_name)
+        try:
+            if self.executor is not None:
+                # The executor is synchronous; keep it off the event loop
+                result = await asyncio.to_thread(self.executor.execute, tool_name, parameters)
+                return result.envelope
+            response = await self.http.post(
+                f"{self.openmcp_base}/api/tools/execute",
+                json={
+                    "tool_name": tool_name,
+                    "parameters": parameters
+                }
+            )
+            return response.json()
+        except Exception as e:
+            logger.error(f"Error executing tool {tool_name}: {e}")
+            return {"error": str(e)}
+
+    async def _answer_fast_path(self, user_input: str, meter: StreamMeter) -> Optional[str]:
+        """Reply straight from a tool if the message matches one of its intent patterns"""
+        match = self.fast_path.match(user_input) if self.fast_path is not None else None
+        if match is None:
+            return None
+        reply = self.fast_path.answer(match, await self.execute_tool(match.tool, match.parameters))
+        if reply is not None:
+            self._record_fast_path(user_input, reply, match.route.name, meter)
+        return reply
+    
+    async def chat(self, user_input: str, on_token: Optional[Callable[[str], None]] = None) -> str:
+        """Process a chat message, potentially using tools"""
+        if on_token is not None:
+            parts = []
+            async for delta in self.chat_stream(user_input):
+                on_token(delta)
+                parts.append(delta)
+            return ''.join(parts)
+
+        meter = StreamMeter()
+        reply = await self._answer_fast_path(user_input, meter)
+        if reply is not None:
+            return reply
+        self.conversation_history.append({"role": "user", "content": user_input})
+        messages = self._build_messages()
+        options = self._options()
+
+        try:
+            call_start = time.perf_counter()
+            response = await self.client.chat(model=self.config.model, messages=messages, options=options,
+                                              keep_alive=self.config.keep_alive)
+            meter.record_response(response, time.perf_counter() - call_start)
+            assistant_message = response['message']['content']
+
+            tool_call = self.parse_tool_call(assistant_message)
+            if not tool_call:
+                self.conversation_history.append({"role": "assistant", "content": assistant_message})
+                return assistant_message
+
+            tool_result = await self.execute_tool(tool_call['tool'], tool_call['parameters'])
+            self._record_tool_call(tool_call, tool_result, assistant_message, messages)
+
+            call_start = time.perf_counter()
+            final_response = await self.client.chat(model=self.config.model, messages=messages, options=options,
+                                                    keep_alive=self.config.keep_alive)
+            meter.record_response(final_response, time.perf_counter() - call_start)
+            final_message = final_response['message']['content']
+            self.conversation_history.append({"role": "assistant", "content": final_message})
+            return final_message
+
+        except Exception as e:
+            logger.error(f"Error in chat: {e}")
+            return f"Sorry, I encountered an error: {str(e)}"
+        finally:
+            self._finish_turn(meter)
+
+    async def chat_stream(self, user_input: str) -> AsyncIterator[str]:
+        """Process a chat message, yielding the reply as text deltas"""
+        meter = StreamMeter()
+        reply = await self._answer_fast_path(user_input, meter)
+        if reply is not None:
+            yield reply
+            return
+        self.conversation_history.append({"role": "user", "content": user_input})
+        messages = self._build_messages()
+        options = self._options()
+
+        try:
+            detector = ToolCallDetector()
+            stream = await self.client.chat(model=self.config.model, messages=messages, options=options, stream=True,
+                                            keep_alive=self.config.keep_alive)
+            async for delta in astream_until_tool_call(meter.aconsume(stream), detector):
+                yield delta
+
+            if not detector.tool_call:
+                self.conversation_history.append({"role": "assistant", "content": detector.text})
+                return
+
+            tool_call = detector.tool_call
+            tool_result = await self.execute_tool(tool_call['tool'], tool_call['parameters'])
+            self._record_tool_call(tool_call, tool_result, detector.text, messages)
+
+            final_parts = []
+            final_stream = await self.client.chat(model=self.config.model, messages=messages, options=options,
+                                                  stream=True, keep_alive=self.config.keep_alive)
+            async for chunk in meter.aconsume(final_stream):
+                delta = chunk['message'].get('content') or ''
+                if delta:
+                    final_parts.append(delta)
+                    yield delta
+            self.conversation_history.append({"role": "assistant", "content": ''.join(final_parts)})
+
+        except Exception as e:
+            logger.error(f"Error in chat: {e}")
+            yield f"Sorry, I encountered an error: {str(e)}"
+        finally:
+            self._finish_turn(meter)
+
+    async def aclose(self):
+        """Close the HTTP connection pools (shared ones too, if passed in)"""
+        await self.http.aclose()
+        await self.client._client.aclose()
+
+
+class AsyncOllamaToolClient(OllamaToolClient):
+    """Async OllamaToolClient: native tool calling with prompt-based fallback"""
+
+    _caching_client = AsyncCachingClient
+    
+    def __init__(self, model: str = "llama3.2", openmcp_base: str = "http://localhost:5005",
+                 max_parallel_tools: int = 4, tool_timeout: float = 30.0,
+                 executor: Optional[ToolExecutor] = None,
+                 client: Optional[ollama.AsyncClient] = None,
+                 http: Optional[httpx.AsyncClient] = None,
+                 history: Optional[HistoryManager] = None, keep_alive: KeepAlive = None,
+                 capabilities: Optional[CapabilityCache] = None, temperature: float = 0.7,
+                 seed: Optional[int] = None, response_cache: Optional[ResponseCache] = None):
+        super().__init__(model, openmcp_base, max_parallel_tools, tool_timeout, executor,
+                         client=client or ollama.AsyncClient(), history=history, keep_alive=keep_alive,
+                         capabilities=capabilities, temperature=temperature, seed=seed,
+                         response_cache=response_cache)
+        self.http = http or httpx.AsyncClient(timeout=tool_timeout)
+
+    async def discover_and_register_tools(self) -> List[Tool]:
+        """Discover tools from OpenMCP and register them"""
+        try:
+            if self.executor is not None:
+                snapshot = self.executor.registry.snapshot()
+                if snapshot.version != self.catalog_version:
+                    self._register_tools(snapshot.available_summaries(), snapshot.version, snapshot.prompt_catalog())
+            elif await self.tool_mirror.async_sync(self.http):
+                self._register_tools(self.tool_mirror.available_summaries(), self.tool_mirror.version)
+            logger.info(f"Registered {len(self.tools)} tools")
+            return list(self.tools.values())
+        except Exception as e:
+            logger.error(f"Error discovering tools: {e}")
+            return []
+    
+    async def preload(self) -> float:
+        """Load the model now so the first message doesn't wait for it; returns seconds taken"""
+        start = time.perf_counter()
+        await self.client.chat(**preload_request(self.model, self.keep_alive))
+        return time.perf_counter() - start
+    
+    async def model_capabilities(self) -> ModelCapabilities:
+        """What the model supports on this server, probed once per cache TTL"""
+        return await self.capabilities.aget_or_probe(self.client, self.model)
+
+    def _create_tool_function(self, tool_name: str) -> Callable:
+        """Create a coroutine function that executes the tool via OpenMCP"""
+        async def execute(**kwargs):
+            try:
+                if self.executor is not None:
+                    # Also bounds the upstream request, so a timed-out call doesn't keep its thread
+                    result = (await asyncio.to_thread(self.executor.execute, tool_name, kwargs,
+                                                      timeout=self.tool_timeout)).envelope
+                else:
+                    response = await self.http.post(
+                        f"{self.openmcp_base}/api/tools/execute",
+                        json={
+                            "tool_name": tool_name,
+                            "parameters": kwargs
+                        }
+                    )
+                    result = response.json()
+
+                if result.get('success'):
+                    return result.get('data', {})
+                return {"error": result.get('error', 'Unknown error')}
+            except Exception as e:
+                return {"error": str(e)}
+
+        return execute
+
+    async def _run_tool(self, tool_name: str, tool_args: Dict[str, Any]) -> Any:
+        """Run one tool, turning failures and timeouts into an error result"""
+        if tool_name not in self.tools:
+            return {"error": f"Unknown tool: {tool_name}"}
+        try:
+            return await asyncio.wait_for(self.tools[tool_name].function(**tool_args), self.tool_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Tool {tool_name} timed out after {self.tool_timeout}s")
+            return {"error": f"Tool call timed out after {self.tool_timeout}s"}
+        except Exception as e:
+            return {"error": str(e)}
+
+    async def _execute_tool_calls(self, tool_calls: List[Any]) -> List[Dict[str, Any]]:
+        """Run the native tool calls concurrently, at most max_parallel_tools at a time"""
+        semaphore = asyncio.Semaphore(self.max_parallel_tools)
+
+        async def run(tool_call):
+            tool_name = tool_call['function']['name']
+            async with semaphore:
+                result = await self._run_tool(tool_name, tool_call['function']['arguments'])
+            return {"tool": tool_name, "result": result}
+
+        return list(await asyncio.gather(*(run(tool_call) for tool_call in tool_calls)))
+
+    async def chat_with_tools(self, user_input: str, on_token: Optional[Callable[[str], None]] = None) -> str:
+        """Chat with tool calling support"""
+        if on_token is not None:
+            parts = []
+            async for delta in self.chat_with_tools_stream(user_input):
+                on_token(delta)
+                parts.append(delta)
+            return ''.join(parts)
+
+        meter = StreamMeter()
+        caps = await self.model_capabilities()
+        self.conversation.append({"role": "user", "content": user_input})
+        tools_list = self.ollama_tools()
+
+        try:
+            response = None
+            if caps.native_tools is not False:
+                response = await self._try_native_tools(tools_list, meter)
+            if response:
+                return response
+            return await self._fallback_tool_calling(user_input, meter)
+        except Exception as e:
+            logger.error(f"Error in chat: {e}")
+            return f"Sorry, I encountered an error: {str(e)}"
+        finally:
+            self.last_turn_stats = meter.finish()
+
+    async def chat_with_tools_stream(self, user_input: str) -> AsyncIterator[str]:
+        """Chat with tool calling support, yielding the reply as text deltas"""
+        caps = await self.model_capabilities()
+        if caps.streaming is False:
+            yield await self.chat_with_tools(user_input)
+            return
+        
+        meter = StreamMeter()
+        self.conversation.append({"role": "user", "content": user_input})
+        tools_list = self.ollama_tools()
+
+        try:
+            streamed = False
+            if caps.native_tools is not False:
+                try:
+                    async for delta in self._stream_native_tools(tools_list, meter):
+                        streamed = True
+                        yield delta
+                    return
+                except Exception as e:
+                    # Only fall back if nothing reached the caller yet
+                    if streamed:
+                        raise
+                    self._note_native_failure(e)
+
+            async for delta in self._stream_fallback_tool_calling(user_input, meter):
+                yield delta
+        except Exception as e:
+            logger.error(f"Error in chat: {e}")
+            yield f"Sorry, I encountered an error: {str(e)}"
+        finally:
+            self.last_turn_stats = meter.finish()
+
+    async def _try_native_tools(self, tools_list: List[Dict], meter: Optional[StreamMeter] = None) -> Optional[str]:
+        """Try to use Ollama's native tool calling if supported"""
+        meter = meter or StreamMeter()
+        options = self._options()
+        try:
+            call_start = time.perf_counter()
+            response = await self.client.chat(model=self.model, messages=self._messages(), tools=tools_list,
+                                              options=options, keep_alive=self.keep_alive)
+            meter.record_response(response, time.perf_counter() - call_start)
+            message = response['message']
+
+            if 'tool_calls' not in message:
+                content = message['content']
+                self.conversation.append({"role": "assistant", "content": content})
+                return content
+
+            results = await self._execute_tool_calls(message['tool_calls'])
+            self._append_tool_results(message.get('content', ''), message['tool_calls'], results)
+
+            call_start = time.perf_counter()
+            final_response = await self.client.chat(model=self.model, messages=self._messages(), options=options,
+                                                    keep_alive=self.keep_alive)
+            meter.record_response(final_response, time.perf_counter() - call_start)
+            final_content = final_response['message']['content']
+            self.conversation.append({"role": "assistant", "content": final_content})
+            return final_content
+
+        except Exception as e:
+            self._note_native_failure(e)
+            return None
+
+    async def _stream_native_tools(self, tools_list: List[Dict], meter: StreamMeter) -> AsyncIterator[str]:
+        """Streaming variant of _try_native_tools; raises if tools are unsupported"""
+        options = self._options()
+        content_parts = []
+        tool_calls = []
+        stream = await self.client.chat(model=self.model, messages=self._messages(), tools=tools_list,
+                                        options=options, stream=True, keep_alive=self.keep_alive)
+        async for chunk in meter.aconsume(stream):
+            message = chunk['message']
+            if message.get('tool_calls'):
+                tool_calls.extend(message['tool_calls'])
+            delta = message.get('content') or ''
+            if delta:
+                content_parts.append(delta)
+                yield delta
+
+        if not tool_calls:
+            self.conversation.append({"role": "assistant", "content": ''.join(content_parts)})
+            return
+
+        results = await self._execute_tool_calls(tool_calls)
+        self._append_tool_results(''.join(content_parts), tool_calls, results)
+
+        final_parts = []
+        final_stream = await self.client.chat(model=self.model, messages=self._messages(), options=options,
+                                              stream=True, keep_alive=self.keep_alive)
+        async for chunk in meter.aconsume(final_stream):
+            delta = chunk['message'].get('content') or ''
+            if delta:
+                final_parts.append(delta)
+                yield delta
+        self.conversation.append({"role": "assistant", "content": ''.join(final_parts)})
+
+    async def _fallback_tool_calling(self, user_input: str, meter: Optional[StreamMeter] = None) -> str:
+        """Fallback to prompt-based tool calling"""
+        meter = meter or StreamMeter()
+        options = self._options()
+        messages = [
+            {"role": "system", "content": self._fallback_system_prompt()},
+            {"role": "user", "content": user_input}
+        ]
+
+        call_start = time.perf_counter()
+        response = await self.client.chat(model=self.model, messages=messages, options=options,
+                                          keep_alive=self.keep_alive)
+        meter.record_response(response, time.perf_counter() - call_start)
+        content = response['message']['content']
+
+        tool_call = self._parse_tool_call(content)
+        if not tool_call:
+            return content
+
+        result = await self._run_tool(tool_call['tool'], tool_call['parameters'])
+        messages.append({"role": "assistant", "content": content})
+        messages.append({"role": "user", "content": f"Tool result: {encode_compact(result)}"})
+
+        call_start = time.perf_counter()
+        final_response = await self.client.chat(model=self.model, messages=messages, options=options,
+                                                keep_alive=self.keep_alive)
+        meter.record_response(final_response, time.perf_counter() - call_start)
+        return final_response['message']['content']
+
+    async def _stream_fallback_tool_calling(self, user_input: str, meter: StreamMeter) -> AsyncIterator[str]:
+        """Streaming variant of _fallback_tool_calling"""
+        options = self._options()
+        messages = [
+            {"role": "system", "content": self._fallback_system_prompt()},
+            {"role": "user", "content": user_input}
+        ]
+
+        detector = ToolCallDetector(self.tools)
+        stream = await self.client.chat(model=self.model, messages=messages, options=options, stream=True,
+                                        keep_alive=self.keep_alive)
+        async for delta in astream_until_tool_call(meter.aconsume(stream), detector):
+            yield delta
+
+        tool_call = detector.tool_call
+        if not tool_call:
+            return
+
+        result = await self._run_tool(tool_call['tool'], tool_call['parameters'])
+        messages.append({"role": "assistant", "content": detector.text})
+        messages.append({"role": "user", "content": f"Tool result: {encode_compact(result)}"})
+
+        final_stream = await self.client.chat(model=self.model, messages=messages, options=options, stream=True,
+                                              keep_alive=self.keep_alive)
+        async for chunk in meter.aconsume(final_stream):
+            delta = chunk['message'].get('content') or ''
+            if delta:
+                yield delta
+
+    async def aclose(self):
+        """Close the HTTP connection pools (shared ones too, if passed in)"""
+        await self.http.aclose()
+        await self.client._client.aclose()
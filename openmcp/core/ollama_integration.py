@@ -1,18 +1,66 @@
 import ollama
-import json
 import requests
-from typing import List, Dict, Any, Optional
+import time
+from typing import List, Dict, Any, Optional, Callable, Iterator, Union
 from dataclasses import dataclass
 import logging
 
+from openmcp.core.executor import ToolExecutor
+from openmcp.core.fast_path import FastPathRouter
+from openmcp.core.history import HistoryManager
+from openmcp.core.response_cache import CachingClient, ResponseCache
+from openmcp.core.response_shaping import encode_compact
+from openmcp.core.schema_minifier import PromptCatalog
+from openmcp.core.streaming import StreamMeter, TurnStats
+from openmcp.core.tool_mirror import ToolMirror
+from openmcp.core.tool_call_detector import ToolCallDetector, find_tool_call, stream_until_tool_call
+
 logger = logging.getLogger(__name__)
 
+# How long Ollama keeps a model loaded after a request: a duration such as
+# "30m", seconds as a number, or a negative number for forever
+KeepAlive = Optional[Union[str, float]]
+
+def parse_keep_alive(value: Optional[str]) -> KeepAlive:
+    """Read a keep-alive setting from config; bare numbers are seconds"""
+    if value is None or not value.strip():
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return value.strip()
+
+def preload_request(model: str, keep_alive: KeepAlive = None, system_prompt: Optional[str] = None) -> Dict[str, Any]:
+    """Arguments for a chat call that loads `model` before the first user needs it.
+    
+    With a system prompt, it is evaluated too (generating a single token), so
+    the runtime's prompt cache already holds the prefix every turn starts with.
+    """
+    if not system_prompt:
+        # An empty chat just loads the model
+        return {"model": model, "messages": [], "keep_alive": keep_alive}
+    return {
+        "model": model,
+        "messages": [{"role": "system", "content": system_prompt}],
+        "options": {"num_predict": 1},
+        "keep_alive": keep_alive
+    }
+
+def preload_model(client: Any, model: str, keep_alive: KeepAlive = None,
+                  system_prompt: Optional[str] = None) -> float:
+    """Load (and optionally warm) a model; returns the seconds it took"""
+    start = time.perf_counter()
+    client.chat(**preload_request(model, keep_alive, system_prompt))
+    return time.perf_counter() - start
+
 @dataclass
 class OllamaConfig:
     """Configuration for Ollama integration"""
     host: str = "http://localhost:11434"
     model: str = "llama3.2"
     temperature: float = 0.7
+    keep_alive: KeepAlive = None  # None leaves Ollama's default (5 minutes)
+    seed: Optional[int] = None  # fixed seed for reproducible (and cacheable) answers
     system_prompt: str = """You are a helpful AI assistant with access to various tools through OpenMCP.
 When you need to use a tool, respond with a JSON object in this format:
 {"tool": "tool_name", "parameters": {...}}
@@ -22,43 +70,104 @@ Available tools will be listed at the start of our conversation."""
 class OllamaIntegration:
     """Integrates Ollama with OpenMCP for tool-enabled chat"""
     
-    def __init__(self, config: OllamaConfig, openmcp_base: str = "http://localhost:5005"):
+    _caching_client = CachingClient
+    
+    def __init__(self, config: OllamaConfig, openmcp_base: str = "http://localhost:5005",
+                 executor: Optional[ToolExecutor] = None, client: Optional[Any] = None,
+                 history: Optional[HistoryManager] = None, response_cache: Optional[ResponseCache] = None,
+                 fast_path: Optional[FastPathRouter] = None):
         self.config = config
         self.openmcp_base = openmcp_base
-        self.client = ollama.Client(host=config.host)
+        # With an executor, tools are listed and run in-process instead of over HTTP
+        self.executor = executor
+        # Pass a client to share one connection pool between many conversations
+        self.client = client or ollama.Client(host=config.host)
+        if response_cache is not None:
+            # Deterministic calls (temperature 0 or a seed) are answered from the cache
+            self.client = self._caching_client(self.client, response_cache, lambda: self.catalog_version)
         self.available_tools = []
+        # Over HTTP, discovery fetches only what changed since the last call
+        self.tool_mirror = ToolMirror(openmcp_base)
+        # Catalog version the tools were discovered at (None if unknown)
+        self.catalog_version: Optional[int] = None
+        self._rendered_prompt: Optional[tuple] = None
+        self._prompt_catalog: Optional[tuple] = None
         self.conversation_history = []
+        # Optional token budget for the prompt; without one the full history is resent
+        self.history = history
+        # Messages matching a tool's intent pattern are answered without the model
+        self.fast_path = fast_path
+        self.last_turn_stats: Optional[TurnStats] = None
         
     def discover_tools(self) -> List[Dict[str, Any]]:
         """Discover available tools from OpenMCP"""
+        if self.executor is not None:
+            snapshot = self.executor.registry.snapshot()
+            if snapshot.version != self.catalog_version:
+                self.available_tools = snapshot.available_summaries()
+                self.catalog_version = snapshot.version
+                # Shared by every conversation on this registry version
+                self._prompt_catalog = (self.available_tools, snapshot.prompt_catalog())
+            return self.available_tools
         try:
-            response = requests.get(f"{self.openmcp_base}/api/tools/list")
-            if response.status_code == 200:
-                data = response.json()
-                self.available_tools = data['tools']
-                return self.available_tools
-            else:
-                logger.error(f"Failed to discover tools: {response.status_code}")
-                return []
+            if self.tool_mirror.sync():
+                self.available_tools = self.tool_mirror.available_summaries()
+                self.catalog_version = self.tool_mirror.version
+            return self.available_tools
         except Exception as e:
             logger.error(f"Error discovering tools: {e}")
             return []
     
+    def prompt_catalog(self) -> PromptCatalog:
+        """The available tools minified, under the short aliases the model sees"""
+        cached = self._prompt_catalog
+        if cached is None or cached[0] is not self.available_tools:
+            cached = self._prompt_catalog = (self.available_tools, PromptCatalog.build(self.available_tools))
+        return cached[1]
+    
     def format_tools_for_prompt(self) -> str:
         """Format available tools for the system prompt"""
         if not self.available_tools:
             return "No tools are currently available."
         
         tools_desc = []
-        for tool in self.available_tools:
+        for tool in self.prompt_catalog().tools:
             params = tool.get('parameters', {}).get('properties', {})
             params_str = ", ".join([f"{k}: {v.get('type', 'any')}" for k, v in params.items()])
             tools_desc.append(f"- {tool['name']}({params_str}): {tool.get('description', 'No description')}")
         
         return "Available tools:\n" + "\n".join(tools_desc)
     
+    def system_prompt(self) -> str:
+        """The system prompt with the tool list, rendered once per catalog version
+        
+        Sending the very same string every turn keeps the prompt prefix
+        byte-identical, so Ollama can reuse its cached evaluation of it.
+        """
+        key = (self.catalog_version, self.config.system_prompt)
+        cached = self._rendered_prompt
+        # The list identity catches tools assigned directly, without a version
+        if cached is None or cached[0] != key or cached[1] is not self.available_tools:
+            prompt = f"{self.config.system_prompt}\n\n{self.format_tools_for_prompt()}"
+            cached = self._rendered_prompt = (key, self.available_tools, prompt)
+        return cached[2]
+    
+    def _options(self) -> Dict[str, Any]:
+        options = {"temperature": self.config.temperature}
+        if self.config.seed is not None:
+            options["seed"] = self.config.seed
+        return options
+    
+    def preload(self, warm: bool = True) -> float:
+        """Load the model now (and evaluate the system prompt if `warm`); returns seconds taken"""
+        return preload_model(self.client, self.config.model, self.config.keep_alive,
+                             self.system_prompt() if warm else None)
+    
     def execute_tool(self, tool_name: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
         """Execute a tool through OpenMCP"""
+        tool_name = self.prompt_catalog().resolve(tool_name)
+        if self.executor is not None:
+            return self.executor.execute(tool_name, parameters).envelope
         try:
             response = requests.post(
                 f"{self.openmcp_base}/api/tools/execute",
@@ -74,45 +183,121 @@ class OllamaIntegration:
     
     def parse_tool_call(self, response: str) -> Optional[Dict[str, Any]]:
         """Parse tool call from model response"""
-        try:
-            # Look for JSON in the response
-            start_idx = response.find('{')
-            end_idx = response.rfind('}')
-            
-            if start_idx != -1 and end_idx != -1:
-                json_str = response[start_idx:end_idx + 1]
-                data = json.loads(json_str)
-                
-                if 'tool' in data and 'parameters' in data:
-                    return data
-        except json.JSONDecodeError:
-            pass
-        
-        return None
+        # First complete {"tool": ..., "parameters": ...} object, so prose
+        # with braces or several JSON objects don't confuse the parser
+        return find_tool_call(response)
     
-    def chat(self, user_input: str) -> str:
-        """Process a chat message, potentially using tools"""
-        # Add user message to history
-        self.conversation_history.append({"role": "user", "content": user_input})
-        
-        # Build messages for Ollama
+    def _build_messages(self) -> List[Dict[str, Any]]:
+        """Build messages for Ollama: system prompt with tools, then the history"""
+        system_prompt = self.system_prompt()
+        if self.history is not None:
+            return self.history.prepare(system_prompt, self.conversation_history)
         messages = [
             {
                 "role": "system",
-                "content": f"{self.config.system_prompt}\n\n{self.format_tools_for_prompt()}"
+                "content": system_prompt
             }
         ]
         messages.extend(self.conversation_history)
+        return messages
+        
+    def _format_tool_result(self, tool_result: Dict[str, Any]) -> str:
+        """Turn an OpenMCP execute envelope into a message for the model"""
+        if tool_result.get('success'):
+            result_data = tool_result.get('data', {})
+            if isinstance(result_data, dict) and 'expression' in result_data:
+                return f"Result: {result_data['expression']}"
+            return f"Result: {encode_compact(result_data)}"
+        return f"Error: {tool_result.get('error', 'Unknown error')}"
+            
+    def _apply_tool_call(self, tool_call: Dict[str, Any], assistant_message: str,
+                         messages: List[Dict[str, Any]]):
+        """Execute a parsed tool call and record it in the history and messages"""
+        tool_result = self.execute_tool(
+            tool_call['tool'],
+            tool_call['parameters']
+        )
+        self._record_tool_call(tool_call, tool_result, assistant_message, messages)
+                
+    def _record_tool_call(self, tool_call: Dict[str, Any], tool_result: Dict[str, Any],
+                          assistant_message: str, messages: List[Dict[str, Any]]):
+        """Record an executed tool call in the history and follow-up messages"""
+        # Add tool execution to history
+        self.conversation_history.append({
+            "role": "assistant",
+            "content": f"I'll use the {tool_call['tool']} tool with parameters {tool_call['parameters']}"
+        })
+                
+        result_message = self._format_tool_result(tool_result)
+        self.conversation_history.append({
+            "role": "user",
+            "content": f"Tool result: {result_message}"
+        })
+                
+        # Messages for the follow-up request
+        messages.append({
+            "role": "assistant",
+            "content": assistant_message
+        })
+        messages.append({
+            "role": "user",
+            "content": f"Tool result: {result_message}"
+        })
+                
+    def _answer_fast_path(self, user_input: str, meter: StreamMeter) -> Optional[str]:
+        """Reply straight from a tool if the message matches one of its intent patterns"""
+        match = self.fast_path.match(user_input) if self.fast_path is not None else None
+        if match is None:
+            return None
+        reply = self.fast_path.answer(match, self.execute_tool(match.tool, match.parameters))
+        if reply is not None:
+            self._record_fast_path(user_input, reply, match.route.name, meter)
+        return reply
+    
+    def _record_fast_path(self, user_input: str, reply: str, route: str, meter: StreamMeter):
+        self.conversation_history.append({"role": "user", "content": user_input})
+        self.conversation_history.append({"role": "assistant", "content": reply})
+        meter.stats.fast_path = route
+        self.last_turn_stats = meter.finish()
+    
+    def _finish_turn(self, meter: StreamMeter):
+        self.last_turn_stats = meter.finish()
+        # Turns that went through the model and a tool are what a fast-path hit saves
+        if self.fast_path is not None and self.last_turn_stats.llm_calls > 1:
+            self.fast_path.observe_llm_turn(self.last_turn_stats.total_time)
+    
+    def chat(self, user_input: str, on_token: Optional[Callable[[str], None]] = None) -> str:
+        """Process a chat message, potentially using tools.
+        
+        If `on_token` is given the reply is streamed and every text delta is
+        passed to it as it arrives; the full reply is still returned.
+        """
+        if on_token is not None:
+            parts = []
+            for delta in self.chat_stream(user_input):
+                on_token(delta)
+                parts.append(delta)
+            return ''.join(parts)
+        
+        meter = StreamMeter()
+        reply = self._answer_fast_path(user_input, meter)
+        if reply is not None:
+            return reply
+        
+        # Add user message to history
+        self.conversation_history.append({"role": "user", "content": user_input})
+        messages = self._build_messages()
         
         try:
             # Get response from Ollama
+            call_start = time.perf_counter()
             response = self.client.chat(
                 model=self.config.model,
+                keep_alive=self.config.keep_alive,
                 messages=messages,
-                options={
-                    "temperature": self.config.temperature
-                }
+                options=self._options()
             )
+            meter.record_response(response, time.perf_counter() - call_start)
             
             assistant_message = response['message']['content']
             
@@ -120,48 +305,17 @@ class OllamaIntegration:
             tool_call = self.parse_tool_call(assistant_message)
             
             if tool_call:
-                # Execute the tool
-                tool_result = self.execute_tool(
-                    tool_call['tool'],
-                    tool_call['parameters']
-                )
-                
-                # Add tool execution to history
-                self.conversation_history.append({
-                    "role": "assistant",
-                    "content": f"I'll use the {tool_call['tool']} tool with parameters {tool_call['parameters']}"
-                })
-                
-                # Format tool result
-                if tool_result.get('success'):
-                    result_data = tool_result.get('data', {})
-                    if 'expression' in result_data:
-                        result_message = f"Result: {result_data['expression']}"
-                    else:
-                        result_message = f"Result: {json.dumps(result_data, indent=2)}"
-                else:
-                    result_message = f"Error: {tool_result.get('error', 'Unknown error')}"
-                
-                self.conversation_history.append({
-                    "role": "user",
-                    "content": f"Tool result: {result_message}"
-                })
+                self._apply_tool_call(tool_call, assistant_message, messages)
                 
                 # Get final response from model
-                messages.append({
-                    "role": "assistant",
-                    "content": assistant_message
-                })
-                messages.append({
-                    "role": "user",
-                    "content": f"Tool result: {result_message}"
-                })
-                
+                call_start = time.perf_counter()
                 final_response = self.client.chat(
                     model=self.config.model,
+                    keep_alive=self.config.keep_alive,
                     messages=messages,
-                    options={"temperature": self.config.temperature}
+                    options=self._options()
                 )
+                meter.record_response(final_response, time.perf_counter() - call_start)
                 
                 final_message = final_response['message']['content']
                 self.conversation_history.append({
@@ -181,7 +335,77 @@ class OllamaIntegration:
         except Exception as e:
             logger.error(f"Error in chat: {e}")
             return f"Sorry, I encountered an error: {str(e)}"
+        finally:
+            self._finish_turn(meter)
+    
+    def chat_stream(self, user_input: str) -> Iterator[str]:
+        """Process a chat message, yielding the reply as text deltas.
+        
+        Text that could be part of a tool call is held back while it streams.
+        The moment a complete tool-call object closes, the rest of the model's
+        output is cancelled, the tool runs and the model's follow-up answer is
+        streamed instead. Timings end up in `last_turn_stats`.
+        """
+        meter = StreamMeter()
+        reply = self._answer_fast_path(user_input, meter)
+        if reply is not None:
+            yield reply
+            return
+        
+        # Add user message to history
+        self.conversation_history.append({"role": "user", "content": user_input})
+        messages = self._build_messages()
+        
+        try:
+            detector = ToolCallDetector()
+            stream = self.client.chat(
+                model=self.config.model,
+                keep_alive=self.config.keep_alive,
+                messages=messages,
+                options=self._options(),
+                stream=True
+            )
+            yield from stream_until_tool_call(meter.consume(stream), detector)
+            
+            assistant_message = detector.text
+            tool_call = detector.tool_call
+            
+            if tool_call:
+                self._apply_tool_call(tool_call, assistant_message, messages)
+                
+                # Stream final response from model
+                final_parts = []
+                final_stream = self.client.chat(
+                    model=self.config.model,
+                    keep_alive=self.config.keep_alive,
+                    messages=messages,
+                    options=self._options(),
+                    stream=True
+                )
+                for chunk in meter.consume(final_stream):
+                    delta = chunk['message'].get('content') or ''
+                    if delta:
+                        final_parts.append(delta)
+                        yield delta
+                
+                self.conversation_history.append({
+                    "role": "assistant",
+                    "content": ''.join(final_parts)
+                })
+            else:
+                self.conversation_history.append({
+                    "role": "assistant",
+                    "content": assistant_message
+                })
+        
+        except Exception as e:
+            logger.error(f"Error in chat: {e}")
+            yield f"Sorry, I encountered an error: {str(e)}"
+        finally:
+            self._finish_turn(meter)
     
     def reset_conversation(self):
         """Reset the conversation history"""
-        self.conversation_history = []
\ No newline at end of file
+        self.conversation_history = []
+        if self.history is not None:
+            self.history.reset()
\ No newline at end of file
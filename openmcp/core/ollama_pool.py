@@ -0,0 +1,456 @@
+"""
+A pool of Ollama hosts behind one client-like object.
+
+Each host serves at most `max_concurrency` generations at once. Requests go
+to the host with the fewest outstanding (running plus queued) requests per
+slot; a host without the model loaded counts `swap_penalty` extra, so a
+request waits briefly for a warm host rather than making a cold one swap
+models in. Hosts that fail to connect are drained (no new requests) until a
+background health check sees them answer again; `drain()` does the same by
+hand, e.g. before maintenance.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Set
+
+import httpx
+import ollama
+
+from openmcp.utils.metrics import (OLLAMA_BACKEND_FAILURES, OLLAMA_BACKEND_IN_FLIGHT, OLLAMA_BACKEND_LATENCY,
+                                   OLLAMA_BACKEND_QUEUED)
+
+logger = logging.getLogger(__name__)
+
+# Failures that say nothing about the request, only that the host is unreachable
+TRANSPORT_ERRORS = (ConnectionError, httpx.TransportError)
+# A response that spent longer than this loading its model swapped it in
+_MODEL_LOAD_SECONDS = 0.1
+
+
+class NoBackendAvailable(ConnectionError):
+    """Every host in the pool is unhealthy or drained"""
+
+
+@dataclass
+class Backend:
+    """One Ollama host and what the pool knows about it"""
+    host: str
+    client: Any
+    max_concurrency: int
+    in_flight: int = 0
+    queued: int = 0
+    healthy: bool = True
+    draining: bool = False
+    loaded_models: Set[str] = field(default_factory=set)
+    # Models of the requests running now; they will be loaded by the time a new one starts
+    active_models: Dict[str, int] = field(default_factory=dict)
+    requests: int = 0
+    failures: int = 0
+    latency_ewma: Optional[float] = None
+    last_error: Optional[str] = None
+
+    @property
+    def available(self) -> bool:
+        return self.healthy and not self.draining
+
+    @property
+    def load(self) -> float:
+        return (self.in_flight + self.queued) / self.max_concurrency
+
+    def has_model(self, model: Optional[str]) -> bool:
+        names = (model, f"{model}:latest")
+        return bool(model) and any(name in self.loaded_models or name in self.active_models for name in names)
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            'host': self.host,
+            'healthy': self.healthy,
+            'draining': self.draining,
+            'in_flight': self.in_flight,
+            'queued': self.queued,
+            'max_concurrency': self.max_concurrency,
+            'loaded_models': sorted(self.loaded_models),
+            'requests': self.requests,
+            'failures': self.failures,
+            'latency_ms': round(self.latency_ewma * 1000, 1) if self.latency_ewma is not None else None,
+            'last_error': self.last_error
+        }
+
+
+class _PoolBase:
+    """Routing and bookkeeping shared by the sync and async pools"""
+
+    def __init__(self, backends: List[Backend], health_interval: float, swap_penalty: float):
+        if not backends:
+            raise ValueError('An Ollama pool needs at least one host')
+        self.backends = backends
+        self.health_interval = health_interval
+        self.swap_penalty = swap_penalty
+
+    @property
+    def hosts(self) -> List[str]:
+        return [backend.host for backend in self.backends]
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [backend.info() for backend in self.backends]
+
+    def _backend(self, host: str) -> Backend:
+        for backend in self.backends:
+            if backend.host == host:
+                return backend
+        raise KeyError(host)
+
+    def _pick(self, model: Optional[str], exclude: Sequence[Backend]) -> Backend:
+        """Least loaded host, counting a model swap as `swap_penalty` extra load (warm wins ties)"""
+        candidates = [b for b in self.backends if b.available and b not in exclude]
+        if not candidates:
+            raise NoBackendAvailable(f"No healthy Ollama host for {model or 'request'}")
+
+        def cost(backend: Backend):
+            warm = not model or backend.has_model(model)
+            return backend.load + (0.0 if warm else self.swap_penalty), not warm
+
+        return min(candidates, key=cost)
+
+    def _start(self, backend: Backend, model: Optional[str]):
+        backend.in_flight += 1
+        if model:
+            backend.active_models[model] = backend.active_models.get(model, 0) + 1
+        OLLAMA_BACKEND_IN_FLIGHT.inc(backend.host)
+
+    def _queue(self, backend: Optional[Backend], amount: int):
+        if backend is not None:
+            backend.queued += amount
+            OLLAMA_BACKEND_QUEUED.inc(backend.host, amount=amount)
+
+    def _finish(self, backend: Backend, model: Optional[str], started: float, error: Optional[BaseException] = None,
+                response: Any = None):
+        backend.in_flight -= 1
+        if model:
+            backend.active_models[model] -= 1
+            if not backend.active_models[model]:
+                del backend.active_models[model]
+        OLLAMA_BACKEND_IN_FLIGHT.dec(backend.host)
+        elapsed = time.perf_counter() - started
+        backend.requests += 1
+        if isinstance(error, TRANSPORT_ERRORS):
+            self._mark_failed(backend, error)
+            return
+        OLLAMA_BACKEND_LATENCY.observe(elapsed, backend.host)
+        backend.latency_ewma = elapsed if backend.latency_ewma is None else 0.8 * backend.latency_ewma + 0.2 * elapsed
+        if error is None and model:
+            if (getattr(response, 'load_duration', None) or 0) / 1e9 > _MODEL_LOAD_SECONDS:
+                # Loading it may have pushed other models out; the next health check tells
+                backend.loaded_models = {model}
+            else:
+                backend.loaded_models.add(model)
+
+    def _mark_failed(self, backend: Backend, error: BaseException):
+        backend.failures += 1
+        backend.last_error = str(error)
+        OLLAMA_BACKEND_FAILURES.inc(backend.host)
+        if backend.healthy:
+            logger.warning(f"Ollama host {backend.host} failed, draining it until it recovers: {error}")
+        backend.healthy = False
+
+    def _apply_health(self, backend: Backend, loaded: Optional[Set[str]], error: Optional[Exception]):
+        if error is not None:
+            if backend.healthy:
+                self._mark_failed(backend, error)
+            return
+        if not backend.healthy:
+            logger.info(f"Ollama host {backend.host} recovered")
+        backend.healthy = True
+        backend.last_error = None
+        backend.loaded_models = loaded
+
+
+def _loaded_models(ps_response: Any) -> Set[str]:
+    return {m.model or m.name for m in ps_response.models if (m.model or m.name)}
+
+
+class OllamaPool(_PoolBase):
+    """Client-like pool of ollama.Client hosts; pass it as `client=` to the integrations"""
+
+    def __init__(self, hosts: Sequence[str], max_concurrency: int = 2, health_interval: float = 10.0,
+                 swap_penalty: float = 1.0, timeout: Optional[float] = None, health_timeout: float = 2.0,
+                 **client_kwargs):
+        super().__init__([
+            Backend(host=host, client=ollama.Client(host=host, timeout=timeout, **client_kwargs),
+                    max_concurrency=max_concurrency)
+            for host in hosts
+        ], health_interval, swap_penalty)
+        self._health_clients = {host: ollama.Client(host=host, timeout=health_timeout) for host in hosts}
+        self._cond = threading.Condition()
+        self._health_thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def chat(self, **request: Any) -> Any:
+        """ollama.Client.chat on the best host; connection failures are retried on another"""
+        self._ensure_health_checks()
+        model = request.get('model')
+        if request.get('stream'):
+            return self._stream(model, request)
+        tried: List[Backend] = []
+        while True:
+            backend = self._acquire(model, tried)
+            started = time.perf_counter()
+            try:
+                response = backend.client.chat(**request)
+            except BaseException as e:
+                self._release(backend, model, started, e)
+                if not isinstance(e, TRANSPORT_ERRORS):
+                    raise
+                tried.append(backend)
+                continue
+            self._release(backend, model, started, response=response)
+            return response
+
+    def _stream(self, model: Optional[str], request: Dict[str, Any]) -> Iterator[Any]:
+        """Holds the host's slot until the stream ends or is closed"""
+        tried: List[Backend] = []
+        while True:
+            backend = self._acquire(model, tried)
+            started = time.perf_counter()
+            stream = backend.client.chat(**request)
+            error = last = None
+            yielded = False
+            try:
+                for chunk in stream:
+                    yielded, last = True, chunk
+                    yield chunk
+                return
+            except BaseException as e:
+                error = e
+                # Nothing was sent to the caller yet: another host can take it
+                if yielded or not isinstance(e, TRANSPORT_ERRORS):
+                    raise
+                tried.append(backend)
+            finally:
+                close = getattr(stream, 'close', None)
+                if close is not None:
+                    close()
+                self._release(backend, model, started, error, last)
+
+    def drain(self, host: str):
+        """Stop sending new requests to `host`; running ones finish normally"""
+        with self._cond:
+            self._backend(host).draining = True
+
+    def undrain(self, host: str):
+        with self._cond:
+            self._backend(host).draining = False
+            self._cond.notify_all()
+
+    def check_health(self):
+        """Ping every host once (the background thread calls this every health_interval)"""
+        for backend in self.backends:
+            loaded, error = None, None
+            try:
+                loaded = _loaded_models(self._health_clients[backend.host].ps())
+            except Exception as e:
+                error = e
+            with self._cond:
+                self._apply_health(backend, loaded, error)
+                self._cond.notify_all()
+
+    def close(self):
+        self._stopped.set()
+
+    def __getattr__(self, name: str) -> Any:
+        # Other client calls (show, ps, ...) go to the least loaded healthy host
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        def call(*args, **kwargs):
+            with self._cond:
+                backend = self._pick(kwargs.get('model') or (args[0] if args else None), ())
+            return getattr(backend.client, name)(*args, **kwargs)
+
+        return call
+
+    def _acquire(self, model: Optional[str], tried: Sequence[Backend]) -> Backend:
+        with self._cond:
+            queued_on = None
+            try:
+                while True:
+                    backend = self._pick(model, tried)
+                    if backend.in_flight < backend.max_concurrency:
+                        self._start(backend, model)
+                        return backend
+                    if queued_on is not backend:
+                        self._queue(queued_on, -1)
+                        self._queue(backend, 1)
+                        queued_on = backend
+                    # Re-route on every wake-up: any host may have freed a slot
+                    self._cond.wait(timeout=1.0)
+            finally:
+                self._queue(queued_on, -1)
+
+    def _release(self, backend: Backend, model: Optional[str], started: float,
+                 error: Optional[BaseException] = None, response: Any = None):
+        with self._cond:
+            self._finish(backend, model, started, error, response)
+            self._cond.notify_all()
+
+    def _ensure_health_checks(self):
+        if self._health_thread is None and self.health_interval > 0:
+            with self._cond:
+                if self._health_thread is None:
+                    self._health_thread = threading.Thread(target=self._health_loop, name='openmcp-ollama-health',
+                                                           daemon=True)
+                    self._health_thread.start()
+
+    def _health_loop(self):
+        while True:
+            self.check_health()
+            if self._stopped.wait(self.health_interval):
+                return
+
+
+class AsyncOllamaPool(_PoolBase):
+    """OllamaPool for asyncio: a pool of ollama.AsyncClient hosts"""
+
+    def __init__(self, hosts: Sequence[str], max_concurrency: int = 2, health_interval: float = 10.0,
+                 swap_penalty: float = 1.0, timeout: Optional[float] = None, health_timeout: float = 2.0,
+                 **client_kwargs):
+        super().__init__([
+            Backend(host=host, client=ollama.AsyncClient(host=host, timeout=timeout, **client_kwargs),
+                    max_concurrency=max_concurrency)
+            for host in hosts
+        ], health_interval, swap_penalty)
+        self._health_clients = {host: ollama.AsyncClient(host=host, timeout=health_timeout) for host in hosts}
+        self._cond: Optional[asyncio.Condition] = None
+        self._health_task: Optional[asyncio.Task] = None
+
+    async def chat(self, **request: Any) -> Any:
+        self._ensure_health_checks()
+        model = request.get('model')
+        if request.get('stream'):
+            return self._stream(model, request)
+        tried: List[Backend] = []
+        while True:
+            backend = await self._acquire(model, tried)
+            started = time.perf_counter()
+            try:
+                response = await backend.client.chat(**request)
+            except BaseException as e:
+                await self._release(backend, model, started, e)
+                if not isinstance(e, TRANSPORT_ERRORS):
+                    raise
+                tried.append(backend)
+                continue
+            await self._release(backend, model, started, response=response)
+            return response
+
+    async def _stream(self, model: Optional[str], request: Dict[str, Any]) -> AsyncIterator[Any]:
+        tried: List[Backend] = []
+        while True:
+            backend = await self._acquire(model, tried)
+            started = time.perf_counter()
+            stream = None
+            error = last = None
+            yielded = False
+            try:
+                stream = await backend.client.chat(**request)
+                async for chunk in stream:
+                    yielded, last = True, chunk
+                    yield chunk
+                return
+            except BaseException as e:
+                error = e
+                if yielded or not isinstance(e, TRANSPORT_ERRORS):
+                    raise
+                tried.append(backend)
+            finally:
+                aclose = getattr(stream, 'aclose', None)
+                if aclose is not None:
+                    await aclose()
+                await self._release(backend, model, started, error, last)
+
+    async def drain(self, host: str):
+        async with self._condition():
+            self._backend(host).draining = True
+
+    async def undrain(self, host: str):
+        async with self._condition():
+            self._backend(host).draining = False
+            self._condition().notify_all()
+
+    async def check_health(self):
+        async def ping(backend):
+            try:
+                return backend, _loaded_models(await self._health_clients[backend.host].ps()), None
+            except Exception as e:
+                return backend, None, e
+
+        results = await asyncio.gather(*(ping(backend) for backend in self.backends))
+        async with self._condition():
+            for backend, loaded, error in results:
+                self._apply_health(backend, loaded, error)
+            self._condition().notify_all()
+
+    async def aclose(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+        for backend in self.backends:
+            await backend.client._client.aclose()
+        for client in self._health_clients.values():
+            await client._client.aclose()
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        async def call(*args, **kwargs):
+            backend = self._pick(kwargs.get('model') or (args[0] if args else None), ())
+            return await getattr(backend.client, name)(*args, **kwargs)
+
+        return call
+
+    def _condition(self) -> asyncio.Condition:
+        # Created lazily so the pool can be built outside a running loop
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        return self._cond
+
+    async def _acquire(self, model: Optional[str], tried: Sequence[Backend]) -> Backend:
+        cond = self._condition()
+        async with cond:
+            queued_on = None
+            try:
+                while True:
+                    backend = self._pick(model, tried)
+                    if backend.in_flight < backend.max_concurrency:
+                        self._start(backend, model)
+                        return backend
+                    if queued_on is not backend:
+                        self._queue(queued_on, -1)
+                        self._queue(backend, 1)
+                        queued_on = backend
+                    try:
+                        await asyncio.wait_for(cond.wait(), timeout=1.0)
+                    except asyncio.TimeoutError:
+                        pass
+            finally:
+                self._queue(queued_on, -1)
+
+    async def _release(self, backend: Backend, model: Optional[str], started: float,
+                       error: Optional[BaseException] = None, response: Any = None):
+        cond = self._condition()
+        async with cond:
+            self._finish(backend, model, started, error, response)
+            cond.notify_all()
+
+    def _ensure_health_checks(self):
+        if self._health_task is None and self.health_interval > 0:
+            self._health_task = asyncio.get_running_loop().create_task(self._health_loop())
+
+    async def _health_loop(self):
+        while True:
+            await self.check_health()
+            await asyncio.sleep(self.health_interval)
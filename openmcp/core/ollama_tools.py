@@ -3,12 +3,25 @@ Enhanced Ollama integration with native tool calling support
 """
 
 import ollama
-import json
 import requests
-from typing import List, Dict, Any, Optional, Callable
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import List, Dict, Any, Optional, Callable, Iterator
 from dataclasses import dataclass, field
 import logging
 
+from openmcp.core.capabilities import (CapabilityCache, ModelCapabilities, capability_cache, client_host,
+                                       is_tools_unsupported)
+from openmcp.core.executor import ToolExecutor
+from openmcp.core.history import HistoryManager
+from openmcp.core.ollama_integration import KeepAlive, preload_model
+from openmcp.core.response_cache import CachingClient, ResponseCache
+from openmcp.core.response_shaping import encode_compact
+from openmcp.core.schema_minifier import PromptCatalog
+from openmcp.core.streaming import StreamMeter, TurnStats
+from openmcp.core.tool_call_detector import ToolCallDetector, find_tool_call, stream_until_tool_call
+from openmcp.core.tool_mirror import ToolMirror
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -18,6 +31,8 @@ class Tool:
     description: str
     parameters: Dict[str, Any]
     function: Optional[Callable] = None
+    # Minified schema sent to the model; `parameters` keeps the full one
+    prompt_parameters: Optional[Dict[str, Any]] = None
     
     def to_ollama_format(self) -> Dict[str, Any]:
         """Convert to Ollama's expected tool format"""
@@ -26,58 +41,140 @@ class Tool:
             "function": {
                 "name": self.name,
                 "description": self.description,
-                "parameters": self.parameters
+                "parameters": self.prompt_parameters if self.prompt_parameters is not None else self.parameters
             }
         }
 
 class OllamaToolClient:
     """Enhanced Ollama client with tool calling support"""
     
-    def __init__(self, model: str = "llama3.2", openmcp_base: str = "http://localhost:5005"):
+    _caching_client = CachingClient
+    
+    def __init__(self, model: str = "llama3.2", openmcp_base: str = "http://localhost:5005",
+                 max_parallel_tools: int = 4, tool_timeout: float = 30.0,
+                 executor: Optional[ToolExecutor] = None, client: Optional[Any] = None,
+                 history: Optional[HistoryManager] = None, keep_alive: KeepAlive = None,
+                 capabilities: Optional[CapabilityCache] = None, temperature: float = 0.7,
+                 seed: Optional[int] = None, response_cache: Optional[ResponseCache] = None):
         self.model = model
+        self.temperature = temperature
+        self.seed = seed
+        self.keep_alive = keep_alive
+        # Probed model capabilities pick native or prompt-based tool calling up front
+        self.capabilities = capabilities if capabilities is not None else capability_cache
         self.openmcp_base = openmcp_base
-        self.client = ollama.Client()
+        # With an executor, tools are listed and run in-process instead of over HTTP
+        self.executor = executor
+        # Pass a client to share one connection pool between many conversations
+        self.client = client or ollama.Client()
+        if response_cache is not None:
+            # Deterministic calls (temperature 0 or a seed) are answered from the cache
+            self.client = self._caching_client(self.client, response_cache, lambda: self.catalog_version)
         self.tools: Dict[str, Tool] = {}
+        # Over HTTP, discovery fetches only what changed since the last call
+        self.tool_mirror = ToolMirror(openmcp_base)
+        # Tool list and fallback prompt are rendered once per catalog version,
+        # so every request carries a byte-identical prefix
+        self.catalog_version: Optional[int] = None
+        self._ollama_tools: Optional[List[Dict[str, Any]]] = None
+        self._fallback_prompt: Optional[str] = None
         self.conversation = []
+        # Optional token budget for the prompt; without one the full history is resent
+        self.history = history
+        self.last_turn_stats: Optional[TurnStats] = None
+        # Native tool calls from one model turn run concurrently on this pool
+        self.tool_timeout = tool_timeout
+        self.max_parallel_tools = max_parallel_tools
+        self._tool_pool: Optional[ThreadPoolExecutor] = None
         
     def discover_and_register_tools(self) -> List[Tool]:
         """Discover tools from OpenMCP and register them"""
         try:
-            response = requests.get(f"{self.openmcp_base}/api/tools/list")
-            if response.status_code == 200:
-                data = response.json()
-                
-                for tool_data in data['tools']:
-                    # Create tool wrapper
-                    tool = Tool(
-                        name=tool_data['name'],
-                        description=tool_data.get('description', ''),
-                        parameters=tool_data.get('parameters', {}),
-                        function=self._create_tool_function(tool_data['name'])
-                    )
-                    self.tools[tool.name] = tool
+            if self.executor is not None:
+                snapshot = self.executor.registry.snapshot()
+                if snapshot.version != self.catalog_version:
+                    self._register_tools(snapshot.available_summaries(), snapshot.version, snapshot.prompt_catalog())
+            elif self.tool_mirror.sync():
+                self._register_tools(self.tool_mirror.available_summaries(), self.tool_mirror.version)
                 
-                logger.info(f"Registered {len(self.tools)} tools")
-                return list(self.tools.values())
-            else:
-                logger.error(f"Failed to discover tools: {response.status_code}")
-                return []
+            logger.info(f"Registered {len(self.tools)} tools")
+            return list(self.tools.values())
         except Exception as e:
             logger.error(f"Error discovering tools: {e}")
             return []
     
+    def _register_tools(self, tools_data: List[Dict[str, Any]], catalog_version: Optional[int] = None,
+                        catalog: Optional[PromptCatalog] = None):
+        """Wrap discovered tools and drop the prompts rendered for the old catalog
+        
+        Tools are registered under their short prompt aliases with minified
+        schemas; each still executes under its full registry name.
+        """
+        catalog = catalog or PromptCatalog.build(tools_data)
+        tools_by_name = {tool_data['name']: tool_data for tool_data in tools_data}
+        # Rebuilt whole, so tools removed from the catalog go too
+        tools = {}
+        for prompt_tool in catalog.tools:
+            tool_data = tools_by_name.get(catalog.resolve(prompt_tool['name']))
+            if tool_data is None:
+                continue
+            # Create tool wrapper
+            tool = Tool(
+                name=prompt_tool['name'],
+                description=prompt_tool['description'],
+                parameters=tool_data.get('parameters', {}),
+                function=self._create_tool_function(tool_data['name']),
+                prompt_parameters=prompt_tool['parameters']
+            )
+            tools[tool.name] = tool
+        self.tools = tools
+        self.catalog_version = catalog_version
+        self._ollama_tools = None
+        self._fallback_prompt = None
+                
+    def ollama_tools(self) -> List[Dict[str, Any]]:
+        """Registered tools in Ollama's format, built once per catalog version"""
+        if self._ollama_tools is None:
+            self._ollama_tools = [tool.to_ollama_format() for tool in self.tools.values()]
+        return self._ollama_tools
+    
+    def preload(self) -> float:
+        """Load the model now so the first message doesn't wait for it; returns seconds taken"""
+        return preload_model(self.client, self.model, self.keep_alive)
+    
+    def _options(self) -> Dict[str, Any]:
+        options = {"temperature": self.temperature}
+        if self.seed is not None:
+            options["seed"] = self.seed
+        return options
+    
+    def model_capabilities(self) -> ModelCapabilities:
+        """What the model supports on this server, probed once per cache TTL"""
+        return self.capabilities.get_or_probe(self.client, self.model)
+    
+    def _note_native_failure(self, error: Exception):
+        logger.info(f"Native tool calling not available: {error}")
+        if is_tools_unsupported(error):
+            # Later turns go straight to prompt-based tool calling
+            self.capabilities.record(client_host(self.client), self.model, native_tools=False)
+    
     def _create_tool_function(self, tool_name: str) -> Callable:
         """Create a function that executes the tool via OpenMCP"""
         def execute(**kwargs):
             try:
-                response = requests.post(
-                    f"{self.openmcp_base}/api/tools/execute",
-                    json={
-                        "tool_name": tool_name,
-                        "parameters": kwargs
-                    }
-                )
-                result = response.json()
+                if self.executor is not None:
+                    # The timeout applies to the upstream request, so a hung call frees its thread
+                    result = self.executor.execute(tool_name, kwargs, timeout=self.tool_timeout).envelope
+                else:
+                    response = requests.post(
+                        f"{self.openmcp_base}/api/tools/execute",
+                        json={
+                            "tool_name": tool_name,
+                            "parameters": kwargs
+                        },
+                        timeout=self.tool_timeout
+                    )
+                    result = response.json()
                 
                 if result.get('success'):
                     return result.get('data', {})
@@ -88,73 +185,191 @@ class OllamaToolClient:
         
         return execute
     
-    def chat_with_tools(self, user_input: str) -> str:
-        """Chat with tool calling support"""
+    def chat_with_tools(self, user_input: str, on_token: Optional[Callable[[str], None]] = None) -> str:
+        """Chat with tool calling support
+        
+        If `on_token` is given the reply is streamed and every text delta is
+        passed to it as it arrives; the full reply is still returned.
+        """
+        if on_token is not None:
+            parts = []
+            for delta in self.chat_with_tools_stream(user_input):
+                on_token(delta)
+                parts.append(delta)
+            return ''.join(parts)
+        
+        meter = StreamMeter()
+        caps = self.model_capabilities()
+        
         # Add user message
         self.conversation.append({"role": "user", "content": user_input})
         
         # Prepare tools for Ollama
-        tools_list = [tool.to_ollama_format() for tool in self.tools.values()]
+        tools_list = self.ollama_tools()
         
         try:
-            # Try to use native tool calling if available
-            response = self._try_native_tools(tools_list)
+            # Try native tool calling unless the model is known not to support it
+            response = None
+            if caps.native_tools is not False:
+                response = self._try_native_tools(tools_list, meter)
             
             if response:
                 return response
             else:
                 # Fallback to prompt-based tool calling
-                return self._fallback_tool_calling(user_input)
+                return self._fallback_tool_calling(user_input, meter)
                 
         except Exception as e:
             logger.error(f"Error in chat: {e}")
             return f"Sorry, I encountered an error: {str(e)}"
+        finally:
+            self.last_turn_stats = meter.finish()
+    
+    def chat_with_tools_stream(self, user_input: str) -> Iterator[str]:
+        """Chat with tool calling support, yielding the reply as text deltas
+        
+        Timings for the turn end up in `last_turn_stats`.
+        """
+        caps = self.model_capabilities()
+        if caps.streaming is False:
+            # Nothing to stream from this model/server; answer in one piece
+            yield self.chat_with_tools(user_input)
+            return
+        
+        meter = StreamMeter()
+        
+        # Add user message
+        self.conversation.append({"role": "user", "content": user_input})
+        
+        # Prepare tools for Ollama
+        tools_list = self.ollama_tools()
+        
+        try:
+            streamed = False
+            if caps.native_tools is not False:
+                try:
+                    for delta in self._stream_native_tools(tools_list, meter):
+                        streamed = True
+                        yield delta
+                    return
+                except Exception as e:
+                    # Only fall back if nothing reached the caller yet
+                    if streamed:
+                        raise
+                    self._note_native_failure(e)
+            
+            # Fallback to prompt-based tool calling
+            yield from self._stream_fallback_tool_calling(user_input, meter)
+            
+        except Exception as e:
+            logger.error(f"Error in chat: {e}")
+            yield f"Sorry, I encountered an error: {str(e)}"
+        finally:
+            self.last_turn_stats = meter.finish()
+    
+    def _run_tool(self, tool_name: str, tool_args: Dict[str, Any]) -> Any:
+        """Run one tool, turning failures into an error result"""
+        if tool_name not in self.tools:
+            return {"error": f"Unknown tool: {tool_name}"}
+        try:
+            return self.tools[tool_name].function(**tool_args)
+        except Exception as e:
+            return {"error": str(e)}
+    
+    def _execute_tool_calls(self, tool_calls: List[Any]) -> List[Dict[str, Any]]:
+        """Run the native tool calls requested by the model
+        
+        Calls run concurrently on the client's bounded pool, so a turn takes
+        as long as its slowest call rather than the sum. Results come back in
+        the order the model asked for them; a call still running
+        `tool_timeout` seconds after it started is reported as an error.
+        The same timeout is set on the call's request (in-process or over
+        HTTP), so the thread of a hung call is freed for later calls.
+        """
+        if self._tool_pool is None:
+            self._tool_pool = ThreadPoolExecutor(
+                max_workers=self.max_parallel_tools,
+                thread_name_prefix="openmcp-tool"
+            )
+        
+        # Calls beyond the pool size queue behind earlier ones; each deadline
+        # counts from when the call actually starts
+        started: Dict[int, float] = {}
+                    
+        def run(index: int, tool_name: str, tool_args: Dict[str, Any]) -> Any:
+            started[index] = time.monotonic()
+            return self._run_tool(tool_name, tool_args)
+        
+        names = [tool_call['function']['name'] for tool_call in tool_calls]
+        futures = [self._tool_pool.submit(run, index, tool_call['function']['name'], tool_call['function']['arguments'])
+                   for index, tool_call in enumerate(tool_calls)]
+        
+        results: List[Any] = [None] * len(futures)
+        pending = set(range(len(futures)))
+        while pending:
+            now = time.monotonic()
+            for index in sorted(pending):
+                if futures[index].done():
+                    results[index] = futures[index].result()
+                    pending.discard(index)
+                elif index in started and now - started[index] >= self.tool_timeout:
+                    logger.warning(f"Tool {names[index]} timed out after {self.tool_timeout}s")
+                    results[index] = {"error": f"Tool call timed out after {self.tool_timeout}s"}
+                    pending.discard(index)
+            if pending:
+                deadline = min((started[i] for i in pending if i in started), default=now) + self.tool_timeout
+                wait([futures[i] for i in pending], timeout=max(deadline - time.monotonic(), 0.01),
+                     return_when=FIRST_COMPLETED)
+        return [{"tool": tool_name, "result": result} for tool_name, result in zip(names, results)]
+    
+    def _append_tool_results(self, message_content: str, tool_calls: List[Any],
+                             results: List[Dict[str, Any]]):
+        """Record the assistant's tool calls and one `tool` message per call"""
+        self.conversation.append({
+            "role": "assistant",
+            "content": message_content,
+            "tool_calls": tool_calls
+        })
+        for result in results:
+            self.conversation.append({
+                "role": "tool",
+                "tool_name": result["tool"],
+                "content": encode_compact(result["result"])
+            })
     
-    def _try_native_tools(self, tools_list: List[Dict]) -> Optional[str]:
+    def _try_native_tools(self, tools_list: List[Dict], meter: Optional[StreamMeter] = None) -> Optional[str]:
         """Try to use Ollama's native tool calling if supported"""
+        meter = meter or StreamMeter()
         try:
             # Attempt native tool calling (works with newer Ollama versions)
+            call_start = time.perf_counter()
             response = self.client.chat(
                 model=self.model,
-                messages=self.conversation,
+                keep_alive=self.keep_alive,
+                messages=self._messages(),
                 tools=tools_list,
-                options={"temperature": 0.7}
+                options=self._options()
             )
+            meter.record_response(response, time.perf_counter() - call_start)
             
             message = response['message']
             
             # Check if the model wants to use a tool
             if 'tool_calls' in message:
-                results = []
-                for tool_call in message['tool_calls']:
-                    tool_name = tool_call['function']['name']
-                    tool_args = tool_call['function']['arguments']
-                    
-                    if tool_name in self.tools:
-                        result = self.tools[tool_name].function(**tool_args)
-                        results.append({
-                            "tool": tool_name,
-                            "result": result
-                        })
+                results = self._execute_tool_calls(message['tool_calls'])
                 
                 # Add tool results to conversation
-                self.conversation.append({
-                    "role": "assistant",
-                    "content": message.get('content', ''),
-                    "tool_calls": message['tool_calls']
-                })
-                
-                self.conversation.append({
-                    "role": "tool",
-                    "content": json.dumps(results)
-                })
+                self._append_tool_results(message.get('content', ''), message['tool_calls'], results)
                 
                 # Get final response
+                call_start = time.perf_counter()
                 final_response = self.client.chat(
                     model=self.model,
-                    messages=self.conversation,
-                    options={"temperature": 0.7}
+                    keep_alive=self.keep_alive,
+                    messages=self._messages(),
+                    options=self._options()
                 )
+                meter.record_response(final_response, time.perf_counter() - call_start)
                 
                 final_content = final_response['message']['content']
                 self.conversation.append({
@@ -173,21 +388,84 @@ class OllamaToolClient:
                 return content
                 
         except Exception as e:
-            logger.info(f"Native tool calling not available: {e}")
+            self._note_native_failure(e)
             return None
     
-    def _fallback_tool_calling(self, user_input: str) -> str:
-        """Fallback to prompt-based tool calling"""
+    def _stream_native_tools(self, tools_list: List[Dict], meter: StreamMeter) -> Iterator[str]:
+        """Streaming variant of _try_native_tools; raises if tools are unsupported"""
+        content_parts = []
+        tool_calls = []
+        stream = self.client.chat(
+            model=self.model,
+            keep_alive=self.keep_alive,
+            messages=self._messages(),
+            tools=tools_list,
+            options=self._options(),
+            stream=True
+        )
+        for chunk in meter.consume(stream):
+            message = chunk['message']
+            if message.get('tool_calls'):
+                tool_calls.extend(message['tool_calls'])
+            delta = message.get('content') or ''
+            if delta:
+                content_parts.append(delta)
+                yield delta
+        
+        if not tool_calls:
+            # No tool use, regular response
+            self.conversation.append({
+                "role": "assistant",
+                "content": ''.join(content_parts)
+            })
+            return
+        
+        results = self._execute_tool_calls(tool_calls)
+        
+        # Add tool results to conversation
+        self._append_tool_results(''.join(content_parts), tool_calls, results)
+        
+        # Stream final response
+        final_parts = []
+        final_stream = self.client.chat(
+            model=self.model,
+            keep_alive=self.keep_alive,
+            messages=self._messages(),
+            options=self._options(),
+            stream=True
+        )
+        for chunk in meter.consume(final_stream):
+            delta = chunk['message'].get('content') or ''
+            if delta:
+                final_parts.append(delta)
+                yield delta
+        
+        self.conversation.append({
+            "role": "assistant",
+            "content": ''.join(final_parts)
+        })
+    
+    def _messages(self) -> List[Dict[str, Any]]:
+        """The conversation to send, trimmed to the history budget if one is set"""
+        if self.history is not None:
+            return self.history.prepare(None, self.conversation)
+        return self.conversation
+    
+    def _fallback_system_prompt(self) -> str:
+        """Build the prompt-based tool calling system prompt (cached per catalog version)"""
+        if self._fallback_prompt is not None:
+            return self._fallback_prompt
+        
         # Build tool descriptions for the prompt
         tool_descriptions = []
         for tool in self.tools.values():
-            params = tool.parameters.get('properties', {})
+            params = (tool.prompt_parameters or tool.parameters).get('properties', {})
             param_str = ", ".join([f"{k}: {v.get('type', 'any')}" for k, v in params.items()])
             tool_descriptions.append(
                 f"- {tool.name}({param_str}): {tool.description}"
             )
         
-        system_prompt = f"""You are a helpful AI assistant with access to these tools:
+        self._fallback_prompt = f"""You are a helpful AI assistant with access to these tools:
 
 {chr(10).join(tool_descriptions)}
 
@@ -195,18 +473,26 @@ To use a tool, respond with ONLY a JSON object in this format:
 {{"tool": "tool_name", "parameters": {{"param1": value1, "param2": value2}}}}
 
 After I provide the tool result, give a natural response to the user."""
+        return self._fallback_prompt
+        
+    def _fallback_tool_calling(self, user_input: str, meter: Optional[StreamMeter] = None) -> str:
+        """Fallback to prompt-based tool calling"""
+        meter = meter or StreamMeter()
         
         # Create messages with system prompt
         messages = [
-            {"role": "system", "content": system_prompt},
+            {"role": "system", "content": self._fallback_system_prompt()},
             {"role": "user", "content": user_input}
         ]
         
+        call_start = time.perf_counter()
         response = self.client.chat(
             model=self.model,
+            keep_alive=self.keep_alive,
             messages=messages,
-            options={"temperature": 0.7}
+            options=self._options()
         )
+        meter.record_response(response, time.perf_counter() - call_start)
         
         content = response['message']['content']
         
@@ -222,38 +508,78 @@ After I provide the tool result, give a natural response to the user."""
             messages.append({"role": "assistant", "content": content})
             messages.append({
                 "role": "user", 
-                "content": f"Tool result: {json.dumps(result)}"
+                "content": f"Tool result: {encode_compact(result)}"
             })
             
+            call_start = time.perf_counter()
             final_response = self.client.chat(
                 model=self.model,
+                keep_alive=self.keep_alive,
                 messages=messages,
-                options={"temperature": 0.7}
+                options=self._options()
             )
+            meter.record_response(final_response, time.perf_counter() - call_start)
             
             return final_response['message']['content']
         else:
             # No tool use
             return content
     
+    def _stream_fallback_tool_calling(self, user_input: str, meter: StreamMeter) -> Iterator[str]:
+        """Streaming variant of _fallback_tool_calling
+        
+        Possible tool-call JSON is held back while prose streams through; once
+        a call to a known tool completes, the rest of the output is cancelled.
+        """
+        messages = [
+            {"role": "system", "content": self._fallback_system_prompt()},
+            {"role": "user", "content": user_input}
+        ]
+        
+        detector = ToolCallDetector(self.tools)
+        stream = self.client.chat(
+            model=self.model,
+            keep_alive=self.keep_alive,
+            messages=messages,
+            options=self._options(),
+            stream=True
+        )
+        yield from stream_until_tool_call(meter.consume(stream), detector)
+        
+        content = detector.text
+        tool_call = detector.tool_call
+        if not tool_call:
+            # No tool use
+            return
+        
+        # Execute tool
+        tool = self.tools[tool_call['tool']]
+        result = tool.function(**tool_call['parameters'])
+        
+        # Stream final response with tool result
+        messages.append({"role": "assistant", "content": content})
+        messages.append({
+            "role": "user",
+            "content": f"Tool result: {encode_compact(result)}"
+        })
+        final_stream = self.client.chat(
+            model=self.model,
+            keep_alive=self.keep_alive,
+            messages=messages,
+            options=self._options(),
+            stream=True
+        )
+        for chunk in meter.consume(final_stream):
+            delta = chunk['message'].get('content') or ''
+            if delta:
+                yield delta
+    
     def _parse_tool_call(self, text: str) -> Optional[Dict[str, Any]]:
         """Parse tool call from text"""
-        try:
-            # Find JSON in the text
-            start = text.find('{')
-            end = text.rfind('}')
-            
-            if start != -1 and end != -1:
-                json_str = text[start:end + 1]
-                data = json.loads(json_str)
-                
-                if 'tool' in data and 'parameters' in data:
-                    return data
-        except:
-            pass
-        
-        return None
+        return find_tool_call(text, self.tools)
     
     def reset(self):
         """Reset conversation history"""
-        self.conversation = []
\ No newline at end of file
+        self.conversation = []
+        if self.history is not None:
+            self.history.reset()
\ No newline at end of file
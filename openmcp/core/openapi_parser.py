@@ -4,10 +4,25 @@ from typing import Dict, List, Any, Optional
 from pydantic import BaseModel, Field
 from pathlib import Path
 
+from openmcp.core.composite import CompositeError, CompositePlan
+
+def tool_name(method: str, url: str) -> str:
+    """Registry name of the tool for an operation, e.g. post_http:__localhost:5001_calculate_add"""
+    return f"{method.lower()}_{url.replace('/', '_').strip('_')}"
+
 class AIToolExtension(BaseModel):
     enabled: bool = Field(default=True, alias='x-ai-tool')
     description: str = Field(alias='x-ai-description')
     category: Optional[str] = Field(default=None, alias='x-ai-category')
+    # Result shaping: JSON pointers of the fields the model needs, and limits
+    response_fields: Optional[List[str]] = Field(default=None, alias='x-ai-response-fields')
+    max_items: Optional[int] = Field(default=None, alias='x-ai-max-items')
+    max_tokens: Optional[int] = Field(default=None, alias='x-ai-max-tokens')
+    # Intent patterns the chat fast path answers without the model
+    patterns: Optional[List[Any]] = Field(default=None, alias='x-ai-patterns')
+    # Path (under the server URL) or URL the health monitor probes for this
+    # operation's upstream; defaults to the spec's top-level x-ai-health-path
+    health_path: Optional[str] = Field(default=None, alias='x-ai-health-path')
     
     class Config:
         populate_by_name = True
@@ -52,6 +67,7 @@ class OpenAPIParser:
         paths = spec.get('paths', {})
         servers = spec.get('servers', [])
         base_url = servers[0]['url'] if servers else ''
+        health_path = spec.get('x-ai-health-path')
         
         for path, path_item in paths.items():
             for method, operation in path_item.items():
@@ -59,7 +75,7 @@ class OpenAPIParser:
                     # Check if endpoint is marked as AI tool
                     if 'x-ai-tool' in operation:
                         endpoint = self._parse_endpoint(
-                            path, method, operation, base_url
+                            path, method, operation, base_url, health_path
                         )
                         if endpoint:
                             ai_tools.append(endpoint)
@@ -67,15 +83,20 @@ class OpenAPIParser:
         return ai_tools
     
     def _parse_endpoint(self, path: str, method: str, 
-                       operation: Dict[str, Any], base_url: str) -> Optional[ParsedEndpoint]:
+                       operation: Dict[str, Any], base_url: str,
+                       health_path: Optional[str] = None) -> Optional[ParsedEndpoint]:
         """Parse a single endpoint operation"""
         try:
             # Extract AI tool extensions
             ai_tool = None
             if operation.get('x-ai-tool'):
-                ai_tool = AIToolExtension(
-                    **{k: v for k, v in operation.items() if k.startswith('x-ai-')}
-                )
+                extensions = {k: v for k, v in operation.items() if k.startswith('x-ai-')}
+                if health_path:
+                    extensions.setdefault('x-ai-health-path', health_path)
+                ai_tool = AIToolExtension(**extensions)
+                # Health paths are relative to the server URL, like the operation paths
+                if ai_tool.health_path and '://' not in ai_tool.health_path:
+                    ai_tool.health_path = f"{base_url.rstrip('/')}/{ai_tool.health_path.lstrip('/')}"
             
             # Extract parameters
             parameters = []
@@ -130,8 +151,8 @@ class OpenAPIParser:
                 body_required = endpoint.request_body.get('required', [])
                 required.extend(body_required)
         
-        return {
-            'name': f"{endpoint.method.lower()}_{endpoint.path.replace('/', '_').strip('_')}",
+        tool = {
+            'name': tool_name(endpoint.method, endpoint.path),
             'description': endpoint.ai_tool.description if endpoint.ai_tool else endpoint.description,
             'parameters': {
                 'type': 'object',
@@ -142,4 +163,49 @@ class OpenAPIParser:
                 'url': endpoint.path,
                 'method': endpoint.method
             }
-        }
\ No newline at end of file
+        }
+        
+        # Only kept server-side; the executor applies it to results
+        shape = endpoint.ai_tool and {
+            'fields': endpoint.ai_tool.response_fields,
+            'max_items': endpoint.ai_tool.max_items,
+            'max_tokens': endpoint.ai_tool.max_tokens
+        }
+        if shape and any(value is not None for value in shape.values()):
+            tool['response_shape'] = {key: value for key, value in shape.items() if value is not None}
+        if endpoint.ai_tool and endpoint.ai_tool.patterns:
+            tool['fast_paths'] = endpoint.ai_tool.patterns
+        if endpoint.ai_tool and endpoint.ai_tool.health_path:
+            tool['health_url'] = endpoint.ai_tool.health_path
+        return tool
+    
+    def extract_composites(self, spec: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Tool definitions for the composite tools listed under x-ai-composites
+        
+        Steps name an operation of the same spec (`operation: PUT /users/{userId}`)
+        or any registered tool (`tool: <name>`); see openmcp.core.composite.
+        """
+        servers = spec.get('servers', [])
+        base_url = servers[0]['url'] if servers else ''
+        composites = []
+        for composite in spec.get('x-ai-composites') or []:
+            try:
+                steps = []
+                for step in composite.get('steps') or []:
+                    step = dict(step)
+                    operation = step.pop('operation', None)
+                    if operation:
+                        method, _, path = operation.strip().partition(' ')
+                        step['tool'] = tool_name(method, f"{base_url}{path.strip()}")
+                    steps.append(step)
+                definition = {'steps': steps, 'result': composite.get('result')}
+                CompositePlan.parse(definition)
+                composites.append({
+                    'name': composite['name'],
+                    'description': composite.get('x-ai-description') or composite.get('description', ''),
+                    'parameters': composite.get('parameters') or {'type': 'object', 'properties': {}},
+                    'composite': definition
+                })
+            except (CompositeError, KeyError, TypeError) as e:
+                print(f"Error parsing composite tool {composite.get('name', '?')}: {e}")
+        return composites
\ No newline at end of file
@@ -0,0 +1,298 @@
+"""
+In-memory registry of AI tools, shared by the HTTP API and in-process clients.
+"""
+
+import logging
+import secrets
+import threading
+from bisect import bisect_right
+from collections import deque
+from types import MappingProxyType
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+
+from openmcp.core.composite import check_composite
+from openmcp.core.openapi_parser import OpenAPIParser
+from openmcp.core.schema_minifier import PromptCatalog
+
+logger = logging.getLogger(__name__)
+
+
+def page_names(names: List[str], after: Optional[str], limit: Optional[int]) -> Tuple[List[str], Optional[str]]:
+    """The part of sorted `names` after `after` (at most `limit`), and the name to continue after"""
+    start = bisect_right(names, after) if after is not None else 0
+    if limit is None or start + limit >= len(names):
+        return names[start:], None
+    return names[start:start + limit], names[start + limit - 1]
+
+
+def summary(name: str, tool: Dict[str, Any]) -> Dict[str, Any]:
+    """A tool in the shape returned by /api/tools/list"""
+    info = {
+        'name': name,
+        'description': tool.get('description', ''),
+        'parameters': tool.get('parameters', {}),
+        'endpoint': tool.get('endpoint', {})
+    }
+    # Set by the upstream health monitor while the tool's API is down
+    if tool.get('unavailable'):
+        info['available'] = False
+        info['unavailable_reason'] = tool['unavailable']
+    return info
+    
+
+class RegistrySnapshot:
+    """One version of the catalog; never changes once published
+    
+    Reads need no lock. Derived views (summaries, sorted names, the prompt
+    catalog) are built on first use; two threads may both build one, which
+    is harmless.
+    """
+    
+    def __init__(self, version: int, tools: Dict[str, Dict[str, Any]], changes: Tuple[Tuple[int, str], ...]):
+        self.version = version
+        self.tools: Mapping[str, Dict[str, Any]] = MappingProxyType(tools)
+        # (version, tool name) for each of the most recent changes, oldest first
+        self.changes = changes
+        self._summaries: Optional[Tuple[Dict[str, Any], ...]] = None
+        self._available: Optional[Tuple[Dict[str, Any], ...]] = None
+        self._sorted_names: Optional[List[str]] = None
+        self._prompt_catalog: Optional[PromptCatalog] = None
+    
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        return self.tools.get(name)
+    
+    def items(self) -> List[Tuple[str, Dict[str, Any]]]:
+        return list(self.tools.items())
+    
+    def summaries(self) -> List[Dict[str, Any]]:
+        """Tools in the shape returned by /api/tools/list; the summaries are shared, don't modify them"""
+        if self._summaries is None:
+            self._summaries = tuple(summary(name, tool) for name, tool in self.tools.items())
+        return list(self._summaries)
+    
+    def available_summaries(self) -> List[Dict[str, Any]]:
+        """Summaries of the tools whose upstream is up, the ones to offer a model"""
+        if self._available is None:
+            self._available = tuple(info for info in self.summaries() if info.get('available', True))
+        return list(self._available)
+    
+    def sorted_names(self) -> List[str]:
+        """Tool names in name order; don't modify"""
+        if self._sorted_names is None:
+            self._sorted_names = sorted(self.tools)
+        return self._sorted_names
+    
+    def page(self, after: Optional[str] = None,
+             limit: Optional[int] = None) -> Tuple[Iterator[Dict[str, Any]], Optional[str]]:
+        """Summaries in name order after the name `after`, at most `limit` of them
+        
+        Returns the summaries (produced lazily) and the name to continue
+        after, None at the end.
+        """
+        names, next_after = page_names(self.sorted_names(), after, limit)
+        return (summary(name, self.tools[name]) for name in names), next_after
+    
+    def prompt_catalog(self) -> PromptCatalog:
+        """Minified available tools under short aliases"""
+        if self._prompt_catalog is None:
+            self._prompt_catalog = PromptCatalog.build(self.available_summaries())
+        return self._prompt_catalog
+    
+    def __len__(self) -> int:
+        return len(self.tools)
+
+
+class ToolRegistry:
+    """Tool definitions keyed by name, with a version bumped on every change
+    
+    The catalog is published as immutable snapshots (`snapshot()`): writers
+    copy the current tools, change the copy and swap it in, one writer at a
+    time; readers take the current snapshot without locking and see one
+    consistent version for as long as they hold it. Every write copies the
+    catalog, so register many tools with one `store_many` call.
+    
+    The last `changelog_size` changes are kept, so clients holding an older
+    version can fetch just what changed since (see `changes_since`).
+    Versions restart at 0 with every registry, so each one also gets a
+    random `epoch`; a version only identifies a catalog together with it.
+    """
+    
+    def __init__(self, changelog_size: int = 1024):
+        # In production, use a database
+        self._snapshot = RegistrySnapshot(0, {}, ())
+        # Tells this registry's versions from those of an earlier process
+        self.epoch = secrets.token_hex(8)
+        # Serializes writers; readers never take it
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._changes: deque = deque(maxlen=changelog_size)
+    
+    def snapshot(self) -> RegistrySnapshot:
+        """The current catalog version"""
+        return self._snapshot
+    
+    @property
+    def tools(self) -> Mapping[str, Dict[str, Any]]:
+        """Read-only view of the current tools"""
+        return self._snapshot.tools
+    
+    @property
+    def version(self) -> int:
+        return self._snapshot.version
+    
+    def _publish(self, tools: Dict[str, Dict[str, Any]], names: List[str]):
+        # Callers hold the lock; `tools` is a new dict nobody else has seen
+        version = self._snapshot.version
+        for name in names:
+            version += 1
+            self._changes.append((version, name))
+        self._snapshot = RegistrySnapshot(version, tools, tuple(self._changes))
+        self._changed.notify_all()
+        
+    def store(self, tool_def: Dict[str, Any]):
+        """Add or replace a tool"""
+        self.store_many([tool_def])
+    
+    def store_many(self, tool_defs: List[Dict[str, Any]]):
+        """Add or replace several tools in one write (each still counts as a change)"""
+        if not tool_defs:
+            return
+        with self._lock:
+            tools = dict(self._snapshot.tools)
+            for tool_def in tool_defs:
+                tools[tool_def['name']] = tool_def
+            self._publish(tools, [tool_def['name'] for tool_def in tool_defs])
+    
+    def remove(self, name: str) -> bool:
+        """Remove a tool; False if there was none by that name"""
+        with self._lock:
+            if name not in self._snapshot.tools:
+                return False
+            tools = dict(self._snapshot.tools)
+            del tools[name]
+            self._publish(tools, [name])
+            return True
+    
+    def set_unavailable(self, reasons: Dict[str, Optional[str]]) -> int:
+        """Mark tools unavailable with a reason, or available again with None
+        
+        Marked tools are re-stored (a change like any other), so listings,
+        the change feed and per-version caches pick the mark up. Returns
+        how many tools changed.
+        """
+        with self._lock:
+            current = self._snapshot.tools
+            changed = {}
+            for name, reason in reasons.items():
+                tool = current.get(name)
+                if tool is None or tool.get('unavailable') == reason:
+                    continue
+                tool = {key: value for key, value in tool.items() if key != 'unavailable'}
+                if reason:
+                    tool['unavailable'] = reason
+                changed[name] = tool
+            if changed:
+                tools = dict(current)
+                tools.update(changed)
+                self._publish(tools, list(changed))
+            return len(changed)
+    
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        return self._snapshot.get(name)
+    
+    def items(self) -> List[Tuple[str, Dict[str, Any]]]:
+        return self._snapshot.items()
+    
+    summary = staticmethod(summary)
+    
+    def summaries(self) -> List[Dict[str, Any]]:
+        """Tools in the shape returned by /api/tools/list"""
+        return self._snapshot.summaries()
+    
+    def sorted_names(self) -> List[str]:
+        """Tool names in name order; don't modify"""
+        return self._snapshot.sorted_names()
+    
+    def page(self, after: Optional[str] = None,
+             limit: Optional[int] = None) -> Tuple[Iterator[Dict[str, Any]], Optional[str]]:
+        """See RegistrySnapshot.page"""
+        return self._snapshot.page(after, limit)
+    
+    def changes_since(self, since: int, epoch: Optional[str] = None) -> Dict[str, Any]:
+        """Tools added or replaced, and names removed, after version `since`
+        
+        `reset` is set (and every tool listed as upserted) when the changelog
+        no longer reaches back to `since`, or `since` is from another
+        registry: `epoch` differs from this registry's (e.g. after a server
+        restart), or, without an epoch, `since` is ahead of this registry.
+        """
+        snapshot = self._snapshot
+        version, changes, tools = snapshot.version, snapshot.changes, snapshot.tools
+        reset = ((epoch is not None and epoch != self.epoch) or since > version
+                 or (bool(changes) and since < changes[0][0] - 1))
+        if reset:
+            names = list(tools)
+        else:
+            names = list(dict.fromkeys(name for changed, name in changes if changed > since))
+        return {
+            'version': version,
+            'epoch': self.epoch,
+            'since': since,
+            'reset': reset,
+            'upserted': [summary(name, tools[name]) for name in names if name in tools],
+            'removed': [] if reset else [name for name in names if name not in tools]
+        }
+    
+    def wait_for_change(self, since: int, timeout: float) -> bool:
+        """Block until the version differs from `since` (or the timeout passes); True if it does"""
+        with self._changed:
+            return self._changed.wait_for(lambda: self.version != since, timeout)
+
+    def prompt_catalog(self) -> PromptCatalog:
+        """Minified available tools under short aliases, built once per version"""
+        return self._snapshot.prompt_catalog()
+    
+    def check_batch(self, tool_defs: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+        """The definitions that can be stored together, and why the others can't
+        
+        Composites are checked like /api/tools/register does, against the
+        other tools of the batch and the registered ones.
+        """
+        batch = {tool_def['name']: tool_def for tool_def in tool_defs}
+        get_tool = lambda name: batch.get(name) or self.get(name)
+        accepted, rejected = [], {}
+        for tool_def in tool_defs:
+            error = check_composite(tool_def['composite'], get_tool) if 'composite' in tool_def else None
+            if error:
+                rejected[tool_def['name']] = error
+            else:
+                accepted.append(tool_def)
+        return accepted, rejected
+    
+    def register_spec(self, spec_path: str, parser: Optional[OpenAPIParser] = None) -> int:
+        """Load a spec file and register its AI tools; returns how many were added
+        
+        Composites whose steps can't run are left out (see `check_batch`).
+        """
+        parser = parser or OpenAPIParser()
+        spec = parser.load_spec(spec_path)
+        tool_defs = [parser.convert_to_ai_format(endpoint) for endpoint in parser.extract_ai_tools(spec)]
+        tool_defs += parser.extract_composites(spec)
+        tool_defs, rejected = self.check_batch(tool_defs)
+        for name, error in rejected.items():
+            logger.warning(f"Not registering composite tool {name}: {error}")
+        self.store_many(tool_defs)
+        return len(tool_defs)
+
+    def __len__(self) -> int:
+        return len(self._snapshot)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._snapshot.tools
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._snapshot.tools)
+
+
+# Process-wide registry used by the API blueprints
+registry = ToolRegistry()
@@ -0,0 +1,263 @@
+"""
+Exact-match cache for deterministic LLM responses.
+
+A response is only reused when sampling is deterministic (temperature 0 or a
+fixed seed) and the model, options, messages, tools and tool catalog version
+all match. Entries are kept in an in-memory LRU and, optionally, in SQLite
+so replayed evaluation suites hit across processes. Both tiers hold at most
+`max_entries`; the SQLite table drops its least recently used rows.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional
+
+from ollama import ChatResponse
+
+from openmcp.core.tool_call_detector import find_tool_call
+from openmcp.utils.metrics import LLM_CACHE_REQUESTS
+
+# Request arguments that don't change what the model answers
+_IGNORED_ARGS = {'stream', 'keep_alive'}
+# Suffix for streams the caller stopped reading early
+_PARTIAL = ':partial'
+
+
+def is_deterministic(options: Optional[Dict[str, Any]]) -> bool:
+    """Whether sampling with these options always gives the same answer"""
+    options = options or {}
+    return options.get('temperature') == 0 or options.get('seed') is not None
+
+
+def _plain(value: Any) -> Any:
+    """Messages and tools as plain JSON data, whether dicts or ollama models"""
+    if hasattr(value, 'model_dump'):
+        return value.model_dump(mode='json', exclude_none=True)
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items() if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    return value
+
+
+def cache_key(request: Dict[str, Any], catalog_version: Any = None) -> str:
+    """SHA-256 of the canonical JSON of a chat request"""
+    canonical = {k: _plain(v) for k, v in request.items() if k not in _IGNORED_ARGS and v is not None}
+    canonical['catalog_version'] = catalog_version
+    encoded = json.dumps(canonical, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class ResponseCache:
+    """LRU of chat responses (as JSON-ready dicts), optionally backed by SQLite"""
+
+    def __init__(self, max_entries: int = 1024, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self._entries: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute('CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, response TEXT NOT NULL, '
+                             'created REAL NOT NULL, last_used REAL NOT NULL DEFAULT 0)')
+            columns = {row[1] for row in self._db.execute('PRAGMA table_info(responses)')}
+            if 'last_used' not in columns:
+                # Caches written before the table was bounded
+                self._db.execute('ALTER TABLE responses ADD COLUMN last_used REAL NOT NULL DEFAULT 0')
+            self._db.execute('CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)')
+            self._db.commit()
+
+    def get(self, *keys: str) -> Optional[Dict[str, Any]]:
+        """The response stored under the first of `keys` that has one (one lookup in the stats)"""
+        response = None
+        with self._lock:
+            for key in keys:
+                response = self._lookup(key)
+                if response is not None:
+                    break
+            if response is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        LLM_CACHE_REQUESTS.inc('hit' if response is not None else 'miss')
+        return response
+
+    def put(self, key: str, response: Dict[str, Any]):
+        with self._lock:
+            self._remember(key, response)
+            if self._db is not None:
+                now = time.time()
+                self._db.execute('INSERT OR REPLACE INTO responses (key, response, created, last_used) '
+                                 'VALUES (?, ?, ?, ?)', (key, json.dumps(response), now, now))
+                self._db.execute('DELETE FROM responses WHERE key NOT IN '
+                                 '(SELECT key FROM responses ORDER BY last_used DESC LIMIT ?)', (self.max_entries,))
+                self._db.commit()
+
+    def bypass(self):
+        """Count a request that couldn't be cached (non-deterministic sampling)"""
+        with self._lock:
+            self.bypasses += 1
+        LLM_CACHE_REQUESTS.inc('bypass')
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'bypasses': self.bypasses,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute('DELETE FROM responses')
+                self._db.commit()
+
+    def _lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        response = self._entries.get(key)
+        if response is not None:
+            self._entries.move_to_end(key)
+        elif self._db is not None:
+            row = self._db.execute('SELECT response FROM responses WHERE key = ?', (key,)).fetchone()
+            if row is not None:
+                response = json.loads(row[0])
+                self._remember(key, response)
+                # Rows are only touched when loaded; hits served from memory don't write
+                self._db.execute('UPDATE responses SET last_used = ? WHERE key = ?', (time.time(), key))
+                self._db.commit()
+        return response
+
+    def _remember(self, key: str, response: Dict[str, Any]):
+        self._entries[key] = response
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+def _assemble(chunks: list) -> Dict[str, Any]:
+    """Fold a finished stream into one response"""
+    final = _plain(chunks[-1])
+    message = dict(final.get('message') or {}, role='assistant')
+    message['content'] = ''.join((_plain(c).get('message') or {}).get('content') or '' for c in chunks)
+    tool_calls = [call for c in chunks for call in ((_plain(c).get('message') or {}).get('tool_calls') or [])]
+    if tool_calls:
+        message['tool_calls'] = tool_calls
+    final['message'] = message
+    return final
+
+
+def _store_stream(cache: ResponseCache, key: str, chunks: list):
+    if not chunks:
+        return
+    response = _assemble(chunks)
+    if response.get('done'):
+        cache.put(key, response)
+    elif find_tool_call(response['message']['content']) is not None:
+        # Cut short after a complete tool call; anything else (a client that
+        # went away mid-answer) is not worth replaying
+        cache.put(key + _PARTIAL, response)
+
+
+def _replay(response: Dict[str, Any]) -> ChatResponse:
+    # Generation counters are dropped: nothing was generated for this answer
+    replayed = {k: v for k, v in response.items() if not k.endswith(('_count', '_duration'))}
+    return ChatResponse.model_validate(replayed)
+
+
+class CachingClient:
+    """Wraps an ollama.Client so deterministic chat calls are answered from a ResponseCache.
+
+    `catalog_version` is called on every request so answers produced against
+    an older tool catalog are never reused. Streamed requests are replayed as
+    a single chunk on a hit. A stream the caller closed right after a complete
+    tool call (as the tool-call detector does) is stored under a stream-only
+    key, since replaying it stops at the same point; only complete responses
+    serve non-streamed requests. Everything other than `chat` is passed through to
+    the wrapped client.
+    """
+
+    def __init__(self, client: Any, cache: ResponseCache, catalog_version: Callable[[], Any] = lambda: None):
+        self.client = client
+        self.cache = cache
+        self.catalog_version = catalog_version
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.client, name)
+
+    def chat(self, **request: Any) -> Any:
+        if not is_deterministic(request.get('options')):
+            self.cache.bypass()
+            return self.client.chat(**request)
+
+        key = cache_key(request, self.catalog_version())
+        if request.get('stream'):
+            cached = self.cache.get(key, key + _PARTIAL)
+            if cached is not None:
+                return iter([_replay(cached)])
+            return self._record_stream(key, self.client.chat(**request))
+        cached = self.cache.get(key)
+        if cached is not None:
+            return _replay(cached)
+        response = self.client.chat(**request)
+        self.cache.put(key, _plain(response))
+        return response
+
+    def _record_stream(self, key: str, stream: Iterator[Any]) -> Iterator[Any]:
+        chunks = []
+        try:
+            for chunk in stream:
+                chunks.append(chunk)
+                yield chunk
+        finally:
+            close = getattr(stream, 'close', None)
+            if close is not None:
+                close()
+            _store_stream(self.cache, key, chunks)
+
+
+class AsyncCachingClient(CachingClient):
+    """CachingClient for an ollama.AsyncClient"""
+
+    async def chat(self, **request: Any) -> Any:
+        if not is_deterministic(request.get('options')):
+            self.cache.bypass()
+            return await self.client.chat(**request)
+
+        key = cache_key(request, self.catalog_version())
+        if request.get('stream'):
+            cached = self.cache.get(key, key + _PARTIAL)
+            if cached is not None:
+                return self._areplay(cached)
+            return self._arecord_stream(key, await self.client.chat(**request))
+        cached = self.cache.get(key)
+        if cached is not None:
+            return _replay(cached)
+        response = await self.client.chat(**request)
+        self.cache.put(key, _plain(response))
+        return response
+
+    async def _areplay(self, cached: Dict[str, Any]) -> AsyncIterator[Any]:
+        yield _replay(cached)
+
+    async def _arecord_stream(self, key: str, stream: AsyncIterator[Any]) -> AsyncIterator[Any]:
+        chunks = []
+        try:
+            async for chunk in stream:
+                chunks.append(chunk)
+                yield chunk
+        finally:
+            aclose = getattr(stream, 'aclose', None)
+            if aclose is not None:
+                await aclose()
+            _store_stream(self.cache, key, chunks)
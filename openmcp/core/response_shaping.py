@@ -0,0 +1,168 @@
+"""
+Shaping of tool results before they reach a model.
+
+Upstream APIs return whatever they return; a model only needs the fields
+that answer the question, and every extra character is prompt to evaluate.
+A tool can declare which fields to keep (`x-ai-response-fields`, JSON
+pointers where `*` matches every array element or object member), and every
+result has long arrays cut down to their first items, with a note of how
+many were left out, and is held under a token cap.
+"""
+
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from openmcp.core.history import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Pointer segment matching every element of an array or member of an object
+WILDCARD = '*'
+
+
+def encode_compact(value: Any) -> str:
+    """JSON without indentation or ASCII escapes: the fewest tokens for the model"""
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False, default=str)
+
+
+def parse_pointer(pointer: str) -> List[str]:
+    """RFC 6901 pointer -> list of unescaped segments ('' is the whole document)"""
+    if pointer in ('', '/'):
+        return []
+    if not pointer.startswith('/'):
+        raise ValueError(f"JSON pointer must start with '/': {pointer!r}")
+    return [segment.replace('~1', '/').replace('~0', '~') for segment in pointer[1:].split('/')]
+
+
+def _pointer_tree(pointers: List[str]) -> Dict[str, Any]:
+    # ['/items/*/title'] -> {'items': {'*': {'title': None}}}; None keeps the whole value
+    tree: Dict[str, Any] = {}
+    for pointer in pointers:
+        segments = parse_pointer(pointer)
+        if not segments:
+            return {}
+        node = tree
+        for segment in segments[:-1]:
+            node = node.setdefault(segment, {})
+            if node is None:
+                break
+        else:
+            node[segments[-1]] = None
+    return tree
+
+
+def _project(value: Any, tree: Optional[Dict[str, Any]]) -> Any:
+    if not tree:
+        return value
+    if isinstance(value, dict):
+        projected = {}
+        for key, subtree in tree.items():
+            if key == WILDCARD:
+                for member, item in value.items():
+                    projected[member] = _project(item, subtree)
+            elif key in value:
+                projected[key] = _project(value[key], subtree)
+        return projected
+    if isinstance(value, list):
+        if WILDCARD in tree:
+            return [_project(item, tree[WILDCARD]) for item in value]
+        indexes = [int(key) for key in tree if key.isdigit() and int(key) < len(value)]
+        return [_project(value[i], tree[str(i)]) for i in sorted(indexes)]
+    return value
+
+
+def project(value: Any, pointers: List[str]) -> Any:
+    """Keep only the parts of `value` the pointers select, in their original nesting"""
+    return _project(value, _pointer_tree(pointers))
+
+
+def truncate_arrays(value: Any, max_items: int) -> Tuple[Any, int]:
+    """Cut every array to `max_items`, appending a "... N more of M" note; returns (value, arrays cut)"""
+    if isinstance(value, dict):
+        cut = 0
+        truncated = {}
+        for key, item in value.items():
+            truncated[key], n = truncate_arrays(item, max_items)
+            cut += n
+        return truncated, cut
+    if isinstance(value, list):
+        cut = 0
+        truncated = []
+        for item in value[:max_items]:
+            item, n = truncate_arrays(item, max_items)
+            truncated.append(item)
+            cut += n
+        if len(value) > max_items:
+            truncated.append(f"... {len(value) - max_items} more of {len(value)} items")
+            cut += 1
+        return truncated, cut
+    return value, 0
+
+
+@dataclass
+class ResponseShape:
+    """How one tool's results are cut down; 0 disables a limit"""
+    fields: List[str] = field(default_factory=list)
+    max_items: int = 0
+    max_tokens: int = 0
+
+    @classmethod
+    def for_tool(cls, tool: Dict[str, Any], max_items: int = 0, max_tokens: int = 0) -> 'ResponseShape':
+        """The tool's declared shape, with the executor-wide limits where it sets none
+
+        A declared limit of 0 turns the executor-wide limit off for the tool.
+        """
+        declared = tool.get('response_shape') or {}
+        return cls(fields=list(declared.get('fields') or []),
+                   max_items=int(declared['max_items'] if declared.get('max_items') is not None else max_items),
+                   max_tokens=int(declared['max_tokens'] if declared.get('max_tokens') is not None else max_tokens))
+
+    def apply(self, data: Any, project_fields: bool = True) -> Tuple[Any, Dict[str, Any]]:
+        """Returns the shaped data and what was done to it ({} when nothing was)"""
+        info: Dict[str, Any] = {}
+        if self.fields and project_fields and isinstance(data, (dict, list)):
+            projected = project(data, self.fields)
+            if projected in ({}, []) and data:
+                # Nothing matched: the spec is probably out of date, keep everything
+                logger.debug(f"Response fields {self.fields} matched nothing; result left unprojected")
+            else:
+                data = projected
+                info['projected'] = True
+        full = data
+        if self.max_items > 0:
+            data, cut = truncate_arrays(full, self.max_items)
+            if cut:
+                info['truncated_arrays'] = cut
+        if self.max_tokens > 0:
+            data = self._cap(full, data, info)
+        return data, info
+
+    def _cap(self, full: Any, data: Any, info: Dict[str, Any]) -> Any:
+        encoded = encode_compact(data)
+        tokens = estimate_tokens(encoded)
+        if tokens <= self.max_tokens:
+            return data
+        info['uncapped_tokens'] = tokens
+        # Fewer items per array first: the result stays valid JSON
+        max_items = self.max_items or _longest_array(full)
+        while isinstance(full, (dict, list)) and max_items > 1:
+            max_items //= 2
+            shorter, cut = truncate_arrays(full, max_items)
+            if estimate_tokens(encode_compact(shorter)) <= self.max_tokens:
+                info['truncated_arrays'] = cut
+                return shorter
+        # Still too big (long strings, wide objects): cut the text itself
+        info['capped'] = True
+        return encoded[:self.max_tokens * 4] + f" ... [cut at {self.max_tokens} of {tokens} tokens]"
+
+
+def _longest_array(value: Any) -> int:
+    if isinstance(value, dict):
+        return max((_longest_array(v) for v in value.values()), default=0)
+    if isinstance(value, list):
+        return max([len(value)] + [_longest_array(v) for v in value])
+    return 0
@@ -0,0 +1,154 @@
+"""
+Prompt-sized views of tool definitions.
+
+Tool definitions carry their OpenAPI schemas whole: examples, formats, long
+descriptions and URL-derived names like
+`post_http:__localhost:5001_calculate_add`. All of it is sent to the model
+with every request. The prompt catalog keeps only what helps the model pick
+a tool and fill in its arguments, under short stable aliases
+(`post_calculate_add_68a1f1`); the registry keeps the full definitions for
+execution and validation, and aliases are resolved back before a call runs.
+"""
+
+import hashlib
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+# Schema keywords the model needs to produce valid arguments; everything
+# else (example, format, title, minimum, pattern, ...) is dropped
+_KEPT_KEYWORDS = ('type', 'description', 'enum', 'const', 'items', 'properties', 'required', 'anyOf', 'oneOf')
+# Function names Ollama (and OpenAI-style APIs) accept
+_ALIAS_CHARS = re.compile(r'[^A-Za-z0-9_-]+')
+_MAX_ALIAS_LENGTH = 64
+_VERSION_SEGMENT = re.compile(r'v\d+$')
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+TOOL_DESCRIPTION_CHARS = 120
+PARAMETER_DESCRIPTION_CHARS = 60
+
+
+def short_description(text: Optional[str], max_chars: int) -> str:
+    """Whole sentences up to `max_chars`; a longer first sentence is cut at a word"""
+    text = ' '.join((text or '').split())
+    if len(text) <= max_chars:
+        return text
+    kept = ''
+    for sentence in _SENTENCE_END.split(text):
+        candidate = f"{kept} {sentence}".strip()
+        if len(candidate) > max_chars:
+            break
+        kept = candidate
+    if kept:
+        return kept
+    return text[:max_chars].rsplit(' ', 1)[0].rstrip(',;:') + '...'
+
+
+def _restates_name(name: str, description: str) -> bool:
+    # "userId" / "The user id" add nothing the property name doesn't say
+    name_words = set(re.sub(r'([a-z])([A-Z])', r'\1 \2', name).replace('_', ' ').lower().split())
+    words = set(re.sub(r'[^a-z0-9 ]', '', description.lower()).split()) - {'the', 'a', 'an', 'of'}
+    return bool(words) and words <= name_words
+
+
+def minify_schema(schema: Dict[str, Any], description_chars: int = PARAMETER_DESCRIPTION_CHARS,
+                  _seen: Optional[set] = None, _name: str = '') -> Dict[str, Any]:
+    """A JSON schema with only the keywords a model needs and short descriptions"""
+    if not isinstance(schema, dict):
+        return schema
+    seen = set() if _seen is None else _seen
+    # One-element combinators and allOf of objects say nothing a flat schema doesn't
+    for combinator in ('allOf', 'anyOf', 'oneOf'):
+        options = schema.get(combinator)
+        if isinstance(options, list) and (len(options) == 1 or combinator == 'allOf'):
+            merged = {k: v for k, v in schema.items() if k != combinator}
+            for option in options:
+                for key, value in (option or {}).items():
+                    if key == 'properties':
+                        merged['properties'] = dict(merged.get('properties') or {}, **value)
+                    elif key == 'required':
+                        merged['required'] = list(merged.get('required') or []) + list(value)
+                    else:
+                        merged.setdefault(key, value)
+            schema = merged
+
+    minified: Dict[str, Any] = {}
+    for key in _KEPT_KEYWORDS:
+        if key not in schema:
+            continue
+        value = schema[key]
+        if key == 'description':
+            text = short_description(value, description_chars)
+            # Each text once per tool, and none that only restate the name
+            if text and text not in seen and not _restates_name(_name, text):
+                seen.add(text)
+                minified['description'] = text
+        elif key == 'properties':
+            minified['properties'] = {
+                name: minify_schema(prop, description_chars, seen, name) for name, prop in (value or {}).items()
+            }
+        elif key == 'items':
+            minified['items'] = minify_schema(value, description_chars, seen, _name)
+        elif key in ('anyOf', 'oneOf'):
+            minified[key] = [minify_schema(option, description_chars, seen, _name) for option in value]
+        elif key == 'required':
+            properties = schema.get('properties') or {}
+            required = [name for name in dict.fromkeys(value or []) if name in properties]
+            if required:
+                minified['required'] = required
+        else:
+            minified[key] = value
+    return minified
+
+
+def tool_alias(tool: Dict[str, Any]) -> str:
+    """Short name from the method and path, e.g. post_calculate_add_68a1f1
+
+    The suffix comes from the tool's full name (which includes the upstream
+    URL), so an alias depends on the tool alone: another spec with the same
+    method and path gets a different alias instead of renaming this one.
+    Tools without an endpoint keep their name, suffixed only if it had to
+    be changed to be a valid function name.
+    """
+    endpoint = tool.get('endpoint') or {}
+    url, method = endpoint.get('url'), endpoint.get('method')
+    if url and method:
+        segments = [segment.strip('{}') for segment in urlparse(url).path.split('/')
+                    if segment and not _VERSION_SEGMENT.match(segment)]
+        alias = _ALIAS_CHARS.sub('_', '_'.join([method.lower()] + segments)).strip('_')
+    else:
+        alias = _ALIAS_CHARS.sub('_', tool['name']).strip('_')
+        if alias == tool['name'] and len(alias) <= _MAX_ALIAS_LENGTH:
+            return alias
+    suffix = hashlib.sha1(tool['name'].encode()).hexdigest()[:6]
+    return f"{alias[:_MAX_ALIAS_LENGTH - 7] or 'tool'}_{suffix}"
+
+
+@dataclass
+class PromptCatalog:
+    """Minified tools for prompts, and the way back from alias to registry name"""
+    tools: List[Dict[str, Any]] = field(default_factory=list)
+    names: Dict[str, str] = field(default_factory=dict)  # alias -> registry name
+
+    @classmethod
+    def build(cls, tools: Iterable[Dict[str, Any]], description_chars: int = TOOL_DESCRIPTION_CHARS,
+              parameter_description_chars: int = PARAMETER_DESCRIPTION_CHARS) -> 'PromptCatalog':
+        """From tool summaries (as listed by /api/tools/list or ToolRegistry.summaries)"""
+        catalog = cls()
+        for tool in tools:
+            alias = tool_alias(tool)
+            description = short_description(tool.get('description'), description_chars)
+            catalog.names[alias] = tool['name']
+            catalog.tools.append({
+                'name': alias,
+                'description': description,
+                # The tool description counts as seen, so parameters don't repeat it
+                'parameters': minify_schema(tool.get('parameters') or {}, parameter_description_chars,
+                                            {description})
+            })
+        return catalog
+
+    def resolve(self, name: str) -> str:
+        """Registry name for an alias (full names pass through unchanged)"""
+        return self.names.get(name, name)
@@ -0,0 +1,142 @@
+"""
+Server-side chat sessions with LRU, idle-TTL and memory-cap eviction.
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from openmcp.core.ollama_integration import OllamaIntegration
+from openmcp.utils.metrics import CHAT_SESSION_EVICTIONS
+
+# Rough per-message overhead (dict, role string) on top of its content
+_MESSAGE_OVERHEAD_BYTES = 200
+
+
+@dataclass
+class ChatSession:
+    """One server-side conversation"""
+    id: str
+    chat: OllamaIntegration
+    created: float = field(default_factory=time.time)
+    last_used: float = field(default_factory=time.monotonic)
+    size_bytes: int = 0
+    # Held while a message is being answered; one turn at a time per session
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def estimate_size(self) -> int:
+        return sum(
+            len(str(message.get('content', ''))) + _MESSAGE_OVERHEAD_BYTES
+            for message in self.chat.conversation_history
+        )
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            'session_id': self.id,
+            'model': self.chat.config.model,
+            'created': self.created,
+            'idle_seconds': round(time.monotonic() - self.last_used, 3),
+            'messages': len(self.chat.conversation_history),
+            'size_bytes': self.size_bytes,
+            'busy': self.lock.locked()
+        }
+
+
+class SessionStore:
+    """Sessions in least-recently-used order, bounded by count, idle time and memory.
+
+    Eviction happens inline on create/get/resize, oldest first. Sessions that
+    are answering a message are never evicted.
+    """
+
+    def __init__(self, max_sessions: int = 1000, ttl_seconds: float = 1800, max_bytes: int = 64 * 1024 * 1024):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._sessions: 'OrderedDict[str, ChatSession]' = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def create(self, chat: OllamaIntegration) -> ChatSession:
+        session = ChatSession(id=uuid.uuid4().hex, chat=chat)
+        with self._lock:
+            self._evict_expired()
+            self._sessions[session.id] = session
+            self._evict_over_limits()
+        return session
+
+    def get(self, session_id: str) -> Optional[ChatSession]:
+        """Return a live session and mark it most recently used"""
+        with self._lock:
+            self._evict_expired()
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.last_used = time.monotonic()
+                self._sessions.move_to_end(session_id)
+            return session
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is None:
+                return False
+            self._total_bytes -= session.size_bytes
+            return True
+
+    def resize(self, session: ChatSession):
+        """Re-account a session's memory after a turn and enforce the cap"""
+        with self._lock:
+            if self._sessions.get(session.id) is not session:
+                return
+            new_size = session.estimate_size()
+            self._total_bytes += new_size - session.size_bytes
+            session.size_bytes = new_size
+            session.last_used = time.monotonic()
+            self._sessions.move_to_end(session.id)
+            self._evict_over_limits()
+
+    def sessions(self) -> List[ChatSession]:
+        with self._lock:
+            self._evict_expired()
+            return list(self._sessions.values())
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _evict(self, session: ChatSession, reason: str):
+        del self._sessions[session.id]
+        self._total_bytes -= session.size_bytes
+        CHAT_SESSION_EVICTIONS.inc(reason)
+
+    def _evict_expired(self):
+        # LRU order means expired sessions sit at the front; stop at the first live one
+        cutoff = time.monotonic() - self.ttl_seconds
+        expired = []
+        for session in self._sessions.values():
+            if session.last_used >= cutoff:
+                break
+            if not session.lock.locked():
+                expired.append(session)
+        for session in expired:
+            self._evict(session, 'ttl')
+
+    def _evict_over_limits(self):
+        count, total_bytes = len(self._sessions), self._total_bytes
+        victims = []
+        for session in self._sessions.values():
+            over_count = count > self.max_sessions
+            if not (over_count or total_bytes > self.max_bytes):
+                break
+            if not session.lock.locked():
+                victims.append((session, 'lru' if over_count else 'memory'))
+                count -= 1
+                total_bytes -= session.size_bytes
+        for session, reason in victims:
+            self._evict(session, reason)
@@ -0,0 +1,106 @@
+"""
+Helpers for streaming chat turns from Ollama and measuring them.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterable, AsyncIterator, Iterable, Iterator, Optional
+
+
+@dataclass
+class TurnStats:
+    """Latency and throughput of one chat turn (possibly several LLM calls)"""
+    time_to_first_token: Optional[float] = None
+    total_time: float = 0.0
+    tokens: int = 0
+    generation_time: float = 0.0
+    prompt_tokens: int = 0
+    prompt_eval_time: float = 0.0
+    llm_calls: int = 0
+    fast_path: Optional[str] = None  # route that answered without the model
+
+    @property
+    def tokens_per_second(self) -> float:
+        return self.tokens / self.generation_time if self.generation_time > 0 else 0.0
+
+
+class StreamMeter:
+    """Records time-to-first-token and token throughput across a turn"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stats = TurnStats()
+
+    def consume(self, stream: Iterable[Any]) -> Iterator[Any]:
+        """Pass chunks of an Ollama stream through while recording timings.
+
+        Closing this generator early (e.g. once a tool call has been detected)
+        also closes the underlying stream, which drops the connection and
+        stops generation on the server.
+        """
+        self.stats.llm_calls += 1
+        call_start = time.perf_counter()
+        content_chunks = 0
+        eval_count = eval_duration = None
+
+        try:
+            for chunk in stream:
+                if chunk['message'].get('content'):
+                    content_chunks += 1
+                    if self.stats.time_to_first_token is None:
+                        self.stats.time_to_first_token = time.perf_counter() - self.start
+                if chunk.get('done'):
+                    eval_count = chunk.get('eval_count')
+                    eval_duration = chunk.get('eval_duration')
+                    self._record_prompt(chunk)
+                yield chunk
+        finally:
+            close = getattr(stream, 'close', None)
+            if close is not None:
+                close()
+            # Prefer the server's token accounting; fall back to chunk counts
+            self.stats.tokens += eval_count if eval_count else content_chunks
+            self.stats.generation_time += (eval_duration / 1e9) if eval_duration else time.perf_counter() - call_start
+
+    async def aconsume(self, stream: AsyncIterable[Any]) -> AsyncIterator[Any]:
+        """Async counterpart of consume() for ollama.AsyncClient streams"""
+        self.stats.llm_calls += 1
+        call_start = time.perf_counter()
+        content_chunks = 0
+        eval_count = eval_duration = None
+
+        try:
+            async for chunk in stream:
+                if chunk['message'].get('content'):
+                    content_chunks += 1
+                    if self.stats.time_to_first_token is None:
+                        self.stats.time_to_first_token = time.perf_counter() - self.start
+                if chunk.get('done'):
+                    eval_count = chunk.get('eval_count')
+                    eval_duration = chunk.get('eval_duration')
+                    self._record_prompt(chunk)
+                yield chunk
+        finally:
+            aclose = getattr(stream, 'aclose', None)
+            if aclose is not None:
+                await aclose()
+            self.stats.tokens += eval_count if eval_count else content_chunks
+            self.stats.generation_time += (eval_duration / 1e9) if eval_duration else time.perf_counter() - call_start
+
+    def record_response(self, response: Any, elapsed: float):
+        """Account for a non-streamed LLM call"""
+        self.stats.llm_calls += 1
+        if self.stats.time_to_first_token is None:
+            self.stats.time_to_first_token = time.perf_counter() - self.start
+        self._record_prompt(response)
+        self.stats.tokens += response.get('eval_count') or 0
+        eval_duration = response.get('eval_duration')
+        self.stats.generation_time += (eval_duration / 1e9) if eval_duration else elapsed
+    
+    def _record_prompt(self, final_chunk: Any):
+        self.stats.prompt_tokens += final_chunk.get('prompt_eval_count') or 0
+        self.stats.prompt_eval_time += (final_chunk.get('prompt_eval_duration') or 0) / 1e9
+
+    def finish(self) -> TurnStats:
+        self.stats.total_time = time.perf_counter() - self.start
+        return self.stats
@@ -0,0 +1,164 @@
+"""
+Incremental detection of prompt-based tool calls in streamed model output.
+"""
+
+import json
+from typing import Any, AsyncIterable, AsyncIterator, Collection, Dict, Iterable, Iterator, List, Optional
+
+
+class ToolCallDetector:
+    """Scan streamed text for a complete {"tool": ..., "parameters": ...} object.
+
+    Tracks the open braces outside of JSON strings (honouring backslash
+    escapes) so a tool call is recognised the moment its closing brace
+    arrives, rather than after the whole response. Every open brace is a
+    candidate: one that can't start a JSON object (`{a, b}`) is dropped at
+    once, and when an outermost candidate closes without being valid JSON
+    the scan restarts just after it, so stray braces and quotes in prose
+    don't hide a later tool call. Text outside candidate objects is handed
+    back from `feed()` straight away so prose can still be streamed; text
+    inside an object is held until it closes and turns out not to be a tool
+    call.
+    """
+
+    def __init__(self, tool_names: Optional[Collection[str]] = None):
+        self.tool_names = tool_names
+        self.tool_call: Optional[Dict[str, Any]] = None
+        self.text = ''            # everything consumed, up to the tool call's closing brace
+        self._starts: List[int] = []  # offsets of the open candidates, outermost first
+        self._opening = False     # just after a '{': only '"' or '}' may follow
+        self._in_string = False
+        self._escaped = False
+        self._scanned = 0         # offset into self.text already scanned
+        self._released = 0        # offset into self.text already handed back
+
+    @property
+    def done(self) -> bool:
+        return self.tool_call is not None
+
+    def feed(self, delta: str) -> str:
+        """Consume a chunk of model output; return text that is safe to show.
+
+        Once a tool call has been found the rest of the output is ignored.
+        """
+        if self.done or not delta:
+            return ''
+
+        self.text += delta
+        call_start = self._scan()
+        if call_start is not None:
+            return self._release(call_start)
+        if self._starts:
+            return self._release(self._starts[0])
+        return self._release(len(self.text))
+
+    def _scan(self) -> Optional[int]:
+        """Scan the new text; the offset of the tool call once one closes"""
+        text = self.text
+        index = self._scanned
+        while index < len(text):
+            char = text[index]
+            index += 1
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if self._opening and not char.isspace():
+                self._opening = False
+                if char not in '"}':
+                    # Not a JSON object, just a brace in prose
+                    self._starts.pop()
+
+            if char == '{':
+                self._starts.append(index - 1)
+                self._opening = True
+            elif not self._starts:
+                continue
+            elif char == '"':
+                self._in_string = True
+            elif char == '}':
+                start = self._starts.pop()
+                try:
+                    data = json.loads(text[start:index])
+                except ValueError:
+                    if not self._starts:
+                        # Whatever it held was read with the wrong nesting or
+                        # quoting; look again from just after its brace
+                        index = start + 1
+                    continue
+                if self._is_tool_call(data):
+                    self.tool_call = data
+                    self.text = text[:index]
+                    self._scanned = index
+                    return start
+
+        self._scanned = index
+        return None
+
+    def flush(self) -> str:
+        """Release any held text once the stream has ended without a tool call"""
+        if self.done:
+            return ''
+        return self._release(len(self.text))
+
+    def _release(self, upto: int) -> str:
+        released = self.text[self._released:upto]
+        self._released = max(self._released, upto)
+        return released
+
+    def _is_tool_call(self, data: Any) -> bool:
+        if not isinstance(data, dict) or 'tool' not in data or 'parameters' not in data:
+            return False
+        return self.tool_names is None or data['tool'] in self.tool_names
+
+
+def find_tool_call(text: str, tool_names: Optional[Collection[str]] = None) -> Optional[Dict[str, Any]]:
+    """Return the first complete tool-call object in `text`, if any"""
+    detector = ToolCallDetector(tool_names)
+    detector.feed(text)
+    return detector.tool_call
+
+
+def stream_until_tool_call(chunks: Iterable[Any], detector: ToolCallDetector) -> Iterator[str]:
+    """Yield displayable text from Ollama chat chunks until a tool call completes.
+
+    The chunk stream is closed as soon as the detector fires, so the rest of
+    the model's output is never generated or read.
+    """
+    try:
+        for chunk in chunks:
+            released = detector.feed(chunk['message'].get('content') or '')
+            if released:
+                yield released
+            if detector.done:
+                break
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+    tail = detector.flush()
+    if tail:
+        yield tail
+
+
+async def astream_until_tool_call(chunks: AsyncIterable[Any], detector: ToolCallDetector) -> AsyncIterator[str]:
+    """Async counterpart of stream_until_tool_call()"""
+    try:
+        async for chunk in chunks:
+            released = detector.feed(chunk['message'].get('content') or '')
+            if released:
+                yield released
+            if detector.done:
+                break
+    finally:
+        aclose = getattr(chunks, 'aclose', None)
+        if aclose is not None:
+            await aclose()
+    tail = detector.flush()
+    if tail:
+        yield tail
@@ -0,0 +1,123 @@
+"""
+Client-side mirror of an OpenMCP server's tool catalog.
+
+Instead of downloading the whole of /api/tools/list on every discovery, a
+mirror asks /api/tools/changes for what changed since the catalog version it
+holds and applies the delta: new and replaced tools, and removed names. The
+server answers with a full list (`reset`) when its changelog no longer
+reaches back that far, or when it was restarted: versions restart at 0, so
+the mirror also sends the registry `epoch` it synced with and starts over
+whenever the epoch changes. Against a server without the
+change feed the mirror falls back to /api/tools/list with If-None-Match, so
+an unchanged catalog costs a 304.
+
+`sync()` (or `async_sync()` with an httpx.AsyncClient) returns whether
+anything changed; pass `wait` to long-poll until something does.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+class ToolMirror:
+    """Local copy of a server's tool summaries, kept current from its change feed"""
+
+    def __init__(self, openmcp_base: str):
+        self.openmcp_base = openmcp_base
+        self.tools: Dict[str, Dict[str, Any]] = {}
+        self.version: Optional[int] = None
+        # Versions only mean something within one server's registry epoch
+        self.epoch: Optional[str] = None
+        # ETag of the last full list, for servers without /api/tools/changes
+        self.etag: Optional[str] = None
+        self.supports_changes = True
+        self._summaries: Optional[List[Dict[str, Any]]] = None
+        self._available: Optional[List[Dict[str, Any]]] = None
+
+    def summaries(self) -> List[Dict[str, Any]]:
+        """The mirrored tools in registry order; the same list object until something changes"""
+        if self._summaries is None:
+            self._summaries = list(self.tools.values())
+        return self._summaries
+    
+    def available_summaries(self) -> List[Dict[str, Any]]:
+        """The mirrored tools the server doesn't mark unavailable (upstream down)"""
+        if self._available is None:
+            self._available = [tool for tool in self.summaries() if tool.get('available', True)]
+        return self._available
+
+    def _changes_request(self, wait: float):
+        params = {'since': self.version if self.version is not None else 0}
+        if self.epoch is not None:
+            params['epoch'] = self.epoch
+        if wait > 0:
+            params['wait'] = wait
+        return f"{self.openmcp_base}/api/tools/changes", params
+
+    def _list_request(self):
+        headers = {'If-None-Match': self.etag} if self.etag else {}
+        return f"{self.openmcp_base}/api/tools/list", headers
+
+    def apply_changes(self, delta: Dict[str, Any]) -> bool:
+        """Apply a /api/tools/changes response; True if the catalog changed"""
+        # A new epoch is a different registry (the server restarted), whatever the versions say
+        reset = delta['reset'] or delta.get('epoch') != self.epoch
+        if reset:
+            self.tools = {}
+        for tool in delta['upserted']:
+            self.tools[tool['name']] = tool
+        for name in delta['removed']:
+            self.tools.pop(name, None)
+        changed = reset or bool(delta['upserted'] or delta['removed']) or self.version is None
+        self.version = delta['version']
+        self.epoch = delta.get('epoch')
+        if changed:
+            self._summaries = self._available = None
+        return changed
+
+    def apply_list(self, data: Dict[str, Any], etag: Optional[str]) -> bool:
+        """Apply a full /api/tools/list response"""
+        self.tools = {tool['name']: tool for tool in data['tools']}
+        self.version = data.get('catalog_version')
+        self.epoch = data.get('catalog_epoch')
+        self.etag = etag
+        self._summaries = self._available = None
+        return True
+
+    def sync(self, session: Any = requests, wait: float = 0, timeout: Optional[float] = None) -> bool:
+        """Bring the mirror up to date; True if the catalog changed"""
+        if self.supports_changes:
+            url, params = self._changes_request(wait)
+            response = session.get(url, params=params, timeout=timeout if timeout is not None else wait + 30)
+            if response.status_code != 404:
+                response.raise_for_status()
+                return self.apply_changes(response.json())
+            logger.info(f"{self.openmcp_base} has no change feed; using conditional list requests")
+            self.supports_changes = False
+        url, headers = self._list_request()
+        response = session.get(url, headers=headers, timeout=timeout if timeout is not None else 30)
+        if response.status_code == 304:
+            return False
+        response.raise_for_status()
+        return self.apply_list(response.json(), response.headers.get('ETag'))
+
+    async def async_sync(self, http: Any, wait: float = 0, timeout: Optional[float] = None) -> bool:
+        """sync() over an httpx.AsyncClient"""
+        if self.supports_changes:
+            url, params = self._changes_request(wait)
+            response = await http.get(url, params=params, timeout=timeout if timeout is not None else wait + 30)
+            if response.status_code != 404:
+                response.raise_for_status()
+                return self.apply_changes(response.json())
+            logger.info(f"{self.openmcp_base} has no change feed; using conditional list requests")
+            self.supports_changes = False
+        url, headers = self._list_request()
+        response = await http.get(url, headers=headers, timeout=timeout if timeout is not None else 30)
+        if response.status_code == 304:
+            return False
+        response.raise_for_status()
+        return self.apply_list(response.json(), response.headers.get('ETag'))
@@ -0,0 +1,190 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from openmcp.core.composite import CompositeError, CompositePlan, check_composite
+from openmcp.core.executor import ExecutionResult
+from openmcp.core.registry import ToolRegistry
+
+
+def ok(data):
+    return ExecutionResult({'success': True, 'status_code': 200, 'data': data}, outcome='success', status_code=200)
+
+
+def upstream_error(message):
+    return ExecutionResult({'success': False, 'status_code': 404, 'data': {'error': message}},
+                           outcome='upstream_error', status_code=404)
+
+
+def plan(*steps, result=None):
+    return CompositePlan.parse({'steps': list(steps), 'result': result})
+
+
+@pytest.fixture
+def pool():
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        yield executor
+
+
+def test_steps_are_ordered_by_their_references():
+    p = plan({'id': 'b', 'tool': 't', 'arguments': {'x': '$steps.a.id'}},
+             {'id': 'a', 'tool': 't'},
+             {'id': 'c', 'tool': 't', 'after': ['b']})
+    assert p.order() == ['a', 'b', 'c']
+    assert p.steps['b'].after == ['a']
+
+
+@pytest.mark.parametrize('steps, message', [
+    ([], 'list of steps'),
+    ([{'id': 'a', 'tool': 't', 'after': ['b']}, {'id': 'b', 'tool': 't', 'after': ['a']}], 'depend on each other'),
+    ([{'id': 'a', 'tool': 't', 'arguments': {'x': '$steps.z.id'}}], "unknown step 'z'"),
+    ([{'id': 'a', 'tool': 't'}, {'id': 'a', 'tool': 't'}], 'unique'),
+    ([{'id': 'a'}], 'names no tool'),
+])
+def test_invalid_definitions_are_rejected(steps, message):
+    with pytest.raises(CompositeError, match=message):
+        CompositePlan.parse({'steps': steps})
+
+
+def test_sequential_run_passes_results_between_steps():
+    calls = []
+
+    def call(tool, arguments):
+        calls.append((tool, arguments))
+        return ok({'id': 'u1', 'items': [{'sku': 'p9'}]} if tool == 'get_user' else {'saved': arguments})
+
+    p = plan({'id': 'user', 'tool': 'get_user', 'arguments': {'name': '$input.name', 'page': '$input.page'}},
+             {'id': 'save', 'tool': 'save', 'arguments': {'user': '$steps.user.id', 'sku': '$steps.user.items.0.sku'}},
+             result={'user': '$steps.user.id', 'saved': '$steps.save.saved'})
+    run = p.run({'name': 'ada'}, call)
+
+    assert run.error is None
+    # An input the caller didn't give is left out, not passed as None
+    assert calls == [('get_user', {'name': 'ada'}), ('save', {'user': 'u1', 'sku': 'p9'})]
+    assert run.result == {'user': 'u1', 'saved': {'user': 'u1', 'sku': 'p9'}}
+    assert [step.outcome for step in run.steps.values()] == ['success', 'success']
+
+
+def test_without_result_the_outputs_are_returned_by_step_id():
+    run = plan({'id': 'a', 'tool': 't'}, {'id': 'b', 'tool': 't'}).run({}, lambda tool, arguments: ok(1))
+    assert run.result == {'a': 1, 'b': 1}
+
+
+def test_independent_steps_run_in_parallel(pool):
+    # Both steps must be running at once to get past the barrier
+    barrier = threading.Barrier(2, timeout=5)
+
+    def call(tool, arguments):
+        if tool == 'combine':
+            return ok(arguments)
+        barrier.wait()
+        return ok(tool)
+
+    p = plan({'id': 'a', 'tool': 'ta'}, {'id': 'b', 'tool': 'tb'},
+             {'id': 'c', 'tool': 'combine', 'arguments': {'x': '$steps.a', 'y': '$steps.b'}})
+    run = p.run({}, call, pool)
+
+    assert run.error is None
+    assert run.outputs['c'] == {'x': 'ta', 'y': 'tb'}
+
+
+def test_a_step_starts_as_soon_as_its_own_dependencies_are_done(pool):
+    slow_done = threading.Event()
+    order = []
+
+    def call(tool, arguments):
+        if tool == 'slow':
+            time.sleep(0.2)
+            slow_done.set()
+        order.append((tool, slow_done.is_set()))
+        return ok(tool)
+
+    p = plan({'id': 'slow', 'tool': 'slow'}, {'id': 'fast', 'tool': 'fast'},
+             {'id': 'next', 'tool': 'next', 'arguments': {'x': '$steps.fast'}})
+    run = p.run({}, call, pool)
+
+    assert run.error is None
+    # `next` only waits for `fast`, not for the unrelated slow step
+    assert ('next', False) in order
+
+
+def test_a_failing_step_skips_the_steps_not_yet_started(pool):
+    calls = []
+
+    def call(tool, arguments):
+        calls.append(tool)
+        return upstream_error('no such user') if tool == 'get_user' else ok({})
+
+    p = plan({'id': 'user', 'tool': 'get_user'},
+             {'id': 'save', 'tool': 'save', 'arguments': {'user': '$steps.user.id'}},
+             {'id': 'notify', 'tool': 'notify', 'after': ['save']})
+    run = p.run({}, call, pool)
+
+    assert calls == ['get_user']
+    assert run.failed == 'user'
+    assert 'no such user' in run.error
+    assert run.result is None
+    assert {step_id: step.outcome for step_id, step in run.steps.items()} == {
+        'user': 'upstream_error', 'save': 'skipped', 'notify': 'skipped'}
+
+
+def test_steps_already_running_when_another_fails_are_waited_for(pool):
+    def call(tool, arguments):
+        if tool == 'slow':
+            time.sleep(0.2)
+            return ok('late')
+        return upstream_error('boom')
+
+    p = plan({'id': 'slow', 'tool': 'slow'}, {'id': 'bad', 'tool': 'bad'},
+             {'id': 'after', 'tool': 'slow', 'after': ['slow']})
+    run = p.run({}, call, pool)
+
+    assert run.failed == 'bad'
+    # The running step finished and was recorded; its dependent never started
+    assert run.steps['slow'].outcome == 'success'
+    assert run.outputs['slow'] == 'late'
+    assert run.steps['after'].outcome == 'skipped'
+
+
+def test_a_reference_missing_from_a_result_fails_the_step():
+    p = plan({'id': 'a', 'tool': 't'}, {'id': 'b', 'tool': 't', 'arguments': {'x': '$steps.a.missing'}})
+    run = p.run({}, lambda tool, arguments: ok({'id': 1}))
+
+    assert run.failed == 'b'
+    assert run.steps['b'].outcome == 'error'
+    assert "'missing'" in run.error
+
+
+def test_the_first_failure_is_the_one_reported_sequentially():
+    run = plan({'id': 'a', 'tool': 't'}, {'id': 'b', 'tool': 't'}).run(
+        {}, lambda tool, arguments: upstream_error('first'))
+    assert run.failed == 'a'
+    assert run.steps['b'].outcome == 'skipped'
+
+
+def test_check_composite_needs_registered_non_composite_step_tools():
+    tools = {'plain': {'name': 'plain'}, 'combo': {'name': 'combo', 'composite': {}}}
+    definition = lambda tool: {'steps': [{'id': 'a', 'tool': tool}]}
+
+    assert check_composite(definition('plain'), tools.get) is None
+    assert check_composite(definition('missing'), tools.get) == 'unknown tool missing'
+    assert 'itself a composite' in check_composite(definition('combo'), tools.get)
+    assert 'list of steps' in check_composite({'steps': []}, tools.get)
+
+
+def test_registry_batches_drop_composites_whose_steps_cannot_run():
+    registry = ToolRegistry()
+    registry.store({'name': 'registered'})
+    composite = lambda name, tool: {'name': name, 'composite': {'steps': [{'id': 'a', 'tool': tool}]}}
+
+    accepted, rejected = registry.check_batch([
+        {'name': 'in_batch'},
+        composite('uses_batch', 'in_batch'),
+        composite('uses_registry', 'registered'),
+        composite('uses_missing', 'missing'),
+    ])
+
+    assert [tool['name'] for tool in accepted] == ['in_batch', 'uses_batch', 'uses_registry']
+    assert rejected == {'uses_missing': 'unknown tool missing'}
@@ -0,0 +1,31 @@
+import threading
+
+from openmcp.core.history import HistoryManager
+
+
+def test_a_summary_finished_after_reset_is_dropped():
+    started, release = threading.Event(), threading.Event()
+
+    def summarize(messages, previous):
+        started.set()
+        release.wait(5)
+        return 'old conversation'
+
+    manager = HistoryManager(budget_tokens=1, keep_recent=1, summarizer=summarize)
+    history = [{'role': 'user', 'content': 'first ' * 50}, {'role': 'user', 'content': 'second'}]
+    manager.prepare(None, history)
+    assert started.wait(5)
+
+    manager.reset()
+    release.set()
+    manager.wait(5)
+
+    assert manager.summary is None
+    assert manager.prepare('system', [{'role': 'user', 'content': 'hi'}])[0] == {'role': 'system', 'content': 'system'}
+
+
+def test_summaries_are_kept_without_a_reset():
+    manager = HistoryManager(budget_tokens=1, keep_recent=1, background=False,
+                             summarizer=lambda messages, previous: 'earlier turns')
+    manager.prepare(None, [{'role': 'user', 'content': 'first ' * 50}, {'role': 'user', 'content': 'second'}])
+    assert manager.summary == 'earlier turns'
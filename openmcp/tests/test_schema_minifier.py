@@ -0,0 +1,23 @@
+from openmcp.core.schema_minifier import PromptCatalog, tool_alias
+
+
+def endpoint_tool(base, path='/calculate/add', method='POST'):
+    return {'name': f"{method.lower()}_{base}{path}", 'description': '', 'parameters': {},
+            'endpoint': {'url': f"{base}{path}", 'method': method}}
+
+
+def test_adding_a_tool_never_renames_another():
+    first = endpoint_tool('http://localhost:5001')
+    before = PromptCatalog.build([first])
+    after = PromptCatalog.build([first, endpoint_tool('http://localhost:5002')])
+
+    alias = tool_alias(first)
+    assert alias.startswith('post_calculate_add_')
+    assert before.names == {alias: first['name']}
+    assert after.names[alias] == first['name']
+    assert len(after.names) == 2
+
+
+def test_names_that_are_valid_aliases_are_kept():
+    assert tool_alias({'name': 'order_summary'}) == 'order_summary'
+    assert tool_alias({'name': 'order.summary'}).startswith('order_summary_')
@@ -0,0 +1,73 @@
+import pytest
+
+from openmcp.core.tool_call_detector import ToolCallDetector, find_tool_call, stream_until_tool_call
+
+CALL = '{"tool": "add", "parameters": {"a": 1}}'
+
+
+def feed_all(chunks, tool_names=None):
+    detector = ToolCallDetector(tool_names)
+    shown = ''.join(detector.feed(chunk) for chunk in chunks) + detector.flush()
+    return detector, shown
+
+
+def char_by_char(text):
+    return list(text)
+
+
+@pytest.mark.parametrize('split', [lambda text: [text], char_by_char])
+@pytest.mark.parametrize('prose', [
+    'Sets look like {a, b. ',
+    'Sets look like { a, b }. ',
+    'A set {"a" is unclosed. ',
+    'Quoted {"a" is a set}. ',
+    'Nested {"x": {"y": 1} and prose. ',
+    'JSON {"note": "not a call"} first. ',
+])
+def test_tool_call_after_braces_in_prose(prose, split):
+    detector, shown = feed_all(split(prose + CALL + ' trailing'))
+    assert detector.tool_call == {'tool': 'add', 'parameters': {'a': 1}}
+    # Everything before the call is shown, nothing from the call on
+    assert shown == prose
+    assert detector.text == prose + CALL
+    assert find_tool_call(prose + CALL) == detector.tool_call
+
+
+def test_reviewer_repro_across_chunks():
+    detector, _ = feed_all(['Sets look like {a, b. ', CALL])
+    assert detector.tool_call is not None
+    assert find_tool_call('Sets look like {a, b. ' + CALL) is not None
+
+
+@pytest.mark.parametrize('split', [lambda text: [text], char_by_char])
+def test_braces_and_escaped_quotes_inside_strings(split):
+    call = r'{"tool": "echo", "parameters": {"text": "a } b { c \"}\" d \\"}}'
+    detector, shown = feed_all(split('Calling: ' + call))
+    assert detector.tool_call == {'tool': 'echo', 'parameters': {'text': 'a } b { c "}" d \\'}}
+    assert shown == 'Calling: '
+
+
+def test_held_text_is_released_when_no_call_closes():
+    detector = ToolCallDetector()
+    assert detector.feed('Before {"tool": "add", ') == 'Before '
+    assert detector.feed('"parameters"') == ''
+    assert detector.flush() == '{"tool": "add", "parameters"'
+    assert detector.tool_call is None
+
+
+def test_prose_braces_are_not_held():
+    detector = ToolCallDetector()
+    assert detector.feed('Sets look like {a, b}') == 'Sets look like {a, b}'
+
+
+def test_unknown_tools_are_ignored():
+    text = '{"tool": "other", "parameters": {}} then ' + CALL
+    assert find_tool_call(text, ['add'])['tool'] == 'add'
+    assert find_tool_call(text, ['missing']) is None
+
+
+def test_stream_stops_at_the_tool_call():
+    chunks = [{'message': {'content': part}} for part in ['Let me {a, b. ', CALL[:10], CALL[10:], ' ignored']]
+    detector = ToolCallDetector()
+    assert ''.join(stream_until_tool_call(iter(chunks), detector)) == 'Let me {a, b. '
+    assert detector.tool_call['tool'] == 'add'
@@ -0,0 +1,306 @@
+"""
+Response encodings: a pluggable JSON codec, optional msgpack, gzip and zstd.
+
+Flask's `jsonify` pretty-prints in debug mode and never compresses, so a
+large tool catalog goes out as megabytes of indented JSON on every call.
+Here:
+
+- `FastJSONProvider` replaces the app's JSON provider with a compact codec:
+  orjson when it is installed, the standard library otherwise, or anything
+  registered with `register_codec`.
+- `ResponseEncoder.respond` negotiates the body format from `Accept`
+  (application/json, or application/msgpack when msgpack is installed) and
+  the content coding from `Accept-Encoding` (zstd when zstandard is
+  installed, else gzip), skipping bodies under a size threshold. Bodies
+  with a cache key, such as the catalog at one version, are encoded and
+  compressed once per representation.
+- `ResponseEncoder.stream` sends a sequence as NDJSON, one item per line,
+  encoded (and compressed) chunk by chunk as the client reads.
+- `ResponseEncoder.compress_response` compresses the remaining JSON
+  responses after the fact.
+
+The optional packages (orjson, msgpack, zstandard) are used when importable
+and are not required.
+"""
+
+import gzip
+import json
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, Optional, Tuple
+
+from flask import Response, current_app, request, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional
+    zstandard = None
+
+JSON_MIMETYPE = 'application/json'
+MSGPACK_MIMETYPE = 'application/msgpack'
+NDJSON_MIMETYPE = 'application/x-ndjson'
+# Also understood in Accept; answered as application/msgpack
+_MSGPACK_ALIASES = ('application/msgpack', 'application/x-msgpack', 'application/vnd.msgpack')
+# Short tags that keep the ETags of different representations apart
+_MEDIA_TAGS = {JSON_MIMETYPE: '', MSGPACK_MIMETYPE: '.msgpack'}
+_CODING_TAGS = {None: '', 'gzip': '.gz', 'zstd': '.zst'}
+
+
+def _stdlib_dumps(obj: Any, default: Callable) -> bytes:
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False, default=default).encode()
+
+
+def _orjson_dumps(obj: Any, default: Callable) -> bytes:
+    return orjson.dumps(obj, default=default, option=orjson.OPT_NON_STR_KEYS)
+
+
+# name -> (dumps(obj, default) -> bytes, loads(bytes or str) -> object)
+JSON_CODECS: Dict[str, Tuple[Callable, Callable]] = {'json': (_stdlib_dumps, json.loads)}
+if orjson is not None:
+    JSON_CODECS['orjson'] = (_orjson_dumps, orjson.loads)
+
+
+def register_codec(name: str, dumps: Callable[[Any, Callable], bytes], loads: Callable[[Any], Any]):
+    """Make another JSON library available as JSON_CODEC=<name>"""
+    JSON_CODECS[name] = (dumps, loads)
+
+
+def codec(name: str = 'auto') -> Tuple[str, Tuple[Callable, Callable]]:
+    """(name, codec) for a JSON_CODEC setting; 'auto' is the fastest installed"""
+    if name == 'auto':
+        name = 'orjson' if 'orjson' in JSON_CODECS else 'json'
+    if name not in JSON_CODECS:
+        raise ValueError(f"Unknown JSON codec {name!r}; available: {', '.join(JSON_CODECS)}")
+    return name, JSON_CODECS[name]
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider using a pluggable codec, always compact"""
+
+    def __init__(self, app: Any, codec_name: str = 'auto'):
+        super().__init__(app)
+        self.use_codec(codec_name)
+
+    def use_codec(self, name: str):
+        self.codec_name, (self._dumps, self._loads) = codec(name)
+
+    def dump_bytes(self, obj: Any) -> bytes:
+        return self._dumps(obj, self.default)
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs:
+            # Explicit json.dumps options (indent, sort_keys, ...) still work
+            return super().dumps(obj, **kwargs)
+        return self.dump_bytes(obj).decode()
+
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return self._loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dump_bytes(obj), mimetype=self.mimetype)
+
+
+def compress(body: bytes, coding: Optional[str], gzip_level: int = 6, zstd_level: int = 3) -> bytes:
+    if coding == 'gzip':
+        return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+    if coding == 'zstd':
+        return zstandard.ZstdCompressor(level=zstd_level).compress(body)
+    return body
+
+
+def _stream_compressor(coding: Optional[str], gzip_level: int, zstd_level: int):
+    """(compress, flush) for a streamed body; each flush ends a decodable block"""
+    if coding == 'gzip':
+        compressor = zlib.compressobj(gzip_level, wbits=31)
+        return compressor.compress, lambda final: compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+    if coding == 'zstd':
+        compressor = zstandard.ZstdCompressor(level=zstd_level).compressobj()
+        return compressor.compress, lambda final: compressor.flush(
+            zstandard.COMPRESSOBJ_FLUSH_FINISH if final else zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+    return (lambda data: data), (lambda final: b'')
+
+
+def _dumper() -> Callable[[Any], bytes]:
+    json_provider = current_app.json
+    if isinstance(json_provider, FastJSONProvider):
+        return json_provider.dump_bytes
+    return lambda obj: json_provider.dumps(obj).encode()
+
+
+class ResponseEncoder:
+    """Negotiates, encodes, compresses and caches response bodies"""
+
+    def __init__(self, enabled: bool = True, min_size: int = 1024, gzip_level: int = 6, zstd_level: int = 3,
+                 cache_size: int = 32):
+        self.enabled = enabled
+        # Bodies smaller than this go out uncompressed
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.zstd_level = zstd_level
+        self.cache_size = cache_size
+        # Streamed bodies are written (and flushed through the compressor) in chunks of about this size
+        self.stream_chunk_size = 64 * 1024
+        # (cache key, media type, requested coding) -> (body, coding used)
+        self._cache: 'OrderedDict[Hashable, Tuple[bytes, Optional[str]]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def codings(self) -> Tuple[str, ...]:
+        """Content codings on offer, best first"""
+        return ('zstd', 'gzip') if zstandard is not None else ('gzip',)
+
+    def media_type(self) -> str:
+        """The body format the current request asks for"""
+        if msgpack is not None:
+            best = request.accept_mimetypes.best_match((JSON_MIMETYPE,) + _MSGPACK_ALIASES)
+            if best in _MSGPACK_ALIASES:
+                return MSGPACK_MIMETYPE
+        return JSON_MIMETYPE
+
+    def wants_ndjson(self) -> bool:
+        """Whether the current request asks for NDJSON (Accept or ?format=ndjson)"""
+        if request.args.get('format') == 'ndjson':
+            return True
+        return request.accept_mimetypes.best_match((JSON_MIMETYPE, NDJSON_MIMETYPE)) == NDJSON_MIMETYPE
+
+    def content_coding(self, size: Optional[int] = None) -> Optional[str]:
+        """The content coding for the current request (None for identity)"""
+        if not self.enabled or (size is not None and size < self.min_size):
+            return None
+        return request.accept_encodings.best_match(self.codings())
+
+    def encode(self, payload: Any, media_type: str) -> bytes:
+        if media_type == MSGPACK_MIMETYPE:
+            return msgpack.packb(payload, default=DefaultJSONProvider.default)
+        return _dumper()(payload)
+
+    def _cached(self, key: Hashable) -> Optional[Tuple[bytes, Optional[str]]]:
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                self.cache_misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            return entry
+
+    def _store(self, key: Hashable, entry: Tuple[bytes, Optional[str]]):
+        with self._lock:
+            self._cache[key] = entry
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def respond(self, payload: Any, cache_key: Optional[Hashable] = None, etag: Optional[str] = None,
+                status: int = 200) -> Response:
+        """A response for `payload` in the negotiated format and coding.
+
+        `payload` may be a callable, only called when the body has to be
+        built. With a `cache_key` (which must change whenever the payload
+        does, e.g. include the catalog version) the finished body is kept
+        per format and coding. With an `etag` a matching If-None-Match gets
+        a bodiless 304; each representation gets its own tag.
+        """
+        media_type = self.media_type()
+        coding = self.content_coding()
+        if etag is not None:
+            etag = f"{etag}{_MEDIA_TAGS[media_type]}{_CODING_TAGS[coding]}"
+            if request.if_none_match.contains(etag):
+                response = Response(status=304)
+                response.set_etag(etag)
+                response.vary.update(('Accept', 'Accept-Encoding'))
+                return response
+
+        key = (cache_key, media_type, coding) if cache_key is not None else None
+        entry = self._cached(key) if key is not None else None
+        if entry is None:
+            body = self.encode(payload() if callable(payload) else payload, media_type)
+            # Small bodies go out (and are cached) uncompressed
+            used_coding = coding if coding and len(body) >= self.min_size else None
+            entry = (compress(body, used_coding, self.gzip_level, self.zstd_level), used_coding)
+            if key is not None:
+                self._store(key, entry)
+        body, used_coding = entry
+
+        response = Response(body, status=status, mimetype=media_type)
+        if used_coding:
+            response.headers['Content-Encoding'] = used_coding
+        response.vary.update(('Accept', 'Accept-Encoding'))
+        if etag is not None:
+            response.set_etag(etag)
+        return response
+
+    def stream(self, items: Iterable[Any], headers: Optional[Dict[str, Any]] = None) -> Response:
+        """An NDJSON response with one item per line, produced as it is sent
+        
+        Items are encoded one at a time and written in chunks of about
+        `stream_chunk_size` bytes, so neither the items nor their encoding
+        are ever held in full.
+        """
+        dump = _dumper()
+        coding = self.content_coding()
+        compress_chunk, flush = _stream_compressor(coding, self.gzip_level, self.zstd_level)
+        chunk_size = self.stream_chunk_size
+
+        def chunks() -> Iterator[bytes]:
+            buffer = []
+            size = 0
+            for item in items:
+                line = dump(item) + b'\n'
+                buffer.append(line)
+                size += len(line)
+                if size >= chunk_size:
+                    yield compress_chunk(b''.join(buffer)) + flush(False)
+                    buffer, size = [], 0
+            tail = compress_chunk(b''.join(buffer)) + flush(True)
+            if tail:
+                yield tail
+
+        response = Response(stream_with_context(chunks()), mimetype=NDJSON_MIMETYPE, headers=headers)
+        if coding:
+            response.headers['Content-Encoding'] = coding
+        response.vary.update(('Accept', 'Accept-Encoding'))
+        return response
+
+    def compress_response(self, response: Response) -> Response:
+        """after_request hook: compress JSON bodies `respond` didn't handle"""
+        if (not self.enabled or response.direct_passthrough or response.is_streamed or response.status_code < 200
+                or response.status_code in (204, 304) or 'Content-Encoding' in response.headers
+                or response.mimetype != JSON_MIMETYPE):
+            return response
+        body = response.get_data()
+        coding = self.content_coding(len(body))
+        response.vary.add('Accept-Encoding')
+        if coding:
+            response.set_data(compress(body, coding, self.gzip_level, self.zstd_level))
+            response.headers['Content-Encoding'] = coding
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'cached_bodies': len(self._cache),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'codings': list(self.codings()),
+            'msgpack': msgpack is not None
+        }
+
+
+# Process-wide encoder used by the API blueprints; configured by create_app
+encoder = ResponseEncoder()
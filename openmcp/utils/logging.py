@@ -1,46 +1,216 @@
+import atexit
+import copy
+import json
 import logging
+import queue
+import random
 import sys
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
+from typing import Dict, Optional
+
+from flask import g, has_request_context
+from flask.logging import default_handler
+
+# Every module logger (openmcp.core.health, openmcp.api.chat_api, ...) propagates here
+package_logger = logging.getLogger('openmcp')
+
+# Structured (one JSON object per line) log of tool calls over SLOW_CALL_THRESHOLD_MS
+slow_call_logger = logging.getLogger('openmcp.slow_calls')
+
+# Attributes every LogRecord has; anything else was passed via `extra=`
+_RESERVED_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+# The single queue/listener pair shared by every app in the process
+_queue_handler: Optional[QueueHandler] = None
+_listener: Optional[QueueListener] = None
+
+
+class JSONFormatter(logging.Formatter):
+    """Render records as one JSON object per line, including `extra` fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'timestamp': self.formatTime(record, '%Y-%m-%dT%H:%M:%S') + f'.{int(record.msecs):03d}',
+            'level': record.levelname,
+            'logger': record.name,
+            'module': record.module,
+            'message': record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        # Records from the queue carry the traceback already formatted
+        exception = record.exc_text or getattr(record, '_traceback', None)
+        if exception:
+            entry['exception'] = exception
+        return json.dumps(entry, default=str)
+
+
+class ConsoleFormatter(logging.Formatter):
+    """'LEVEL: message', followed by the traceback of queued records"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        traceback = getattr(record, '_traceback', None)
+        return f"{text}\n{traceback}" if traceback else text
+
+
+class TracebackQueueHandler(QueueHandler):
+    """A QueueHandler that keeps the traceback apart from the message
+
+    QueueHandler.prepare() folds the traceback into the message and drops
+    `exc_info`, which would leave JSONFormatter's `exception` field empty.
+    The formatted traceback travels in `_traceback` instead.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record._traceback = record.exc_text
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+        record.exc_text = None
+        return record
+
+
+class RequestContextFilter(logging.Filter):
+    """Attach the current request id to records logged inside a request"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, 'request_id') and has_request_context():
+            request_id = g.get('request_id')
+            if request_id:
+                record.request_id = request_id
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of records per level; WARNING and above always pass"""
+
+    def __init__(self, rates: Dict[int, float]):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(record.levelno, 1.0)
+        return rate >= 1.0 or random.random() < rate
+
+
+class _LoggerNameFilter(logging.Filter):
+    """Route records to a handler by logger name"""
+
+    def __init__(self, name: str, include: bool):
+        super().__init__()
+        self.prefix = name
+        self.include = include
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.name.startswith(self.prefix) == self.include
+
+
+def parse_sample_rates(spec: str) -> Dict[int, float]:
+    """Parse 'DEBUG=0.01,INFO=0.5' into {level: rate}"""
+    rates = {}
+    for item in spec.split(','):
+        name, _, rate = item.strip().partition('=')
+        if name and rate:
+            rates[logging.getLevelName(name.strip().upper())] = float(rate)
+    return rates
+
 
 def setup_logging(app):
-    """Configure logging for the Flask application"""
-    
-    # Create logs directory if it doesn't exist
-    log_dir = Path('logs')
-    log_dir.mkdir(exist_ok=True)
-    
-    # Set up formatters
-    file_formatter = logging.Formatter(
-        '[%(asctime)s] %(levelname)s in %(module)s: %(message)s'
-    )
-    console_formatter = logging.Formatter(
-        '%(levelname)s: %(message)s'
-    )
-    
-    # Set up file handler
-    file_handler = RotatingFileHandler(
-        'logs/openmcp.log',
-        maxBytes=10240000,  # 10MB
-        backupCount=10
-    )
-    file_handler.setFormatter(file_formatter)
-    file_handler.setLevel(logging.INFO)
-    
-    # Set up console handler
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setFormatter(console_formatter)
-    console_handler.setLevel(logging.DEBUG if app.debug else logging.INFO)
-    
-    # Configure app logger
-    app.logger.addHandler(file_handler)
-    app.logger.addHandler(console_handler)
-    app.logger.setLevel(logging.DEBUG if app.debug else logging.INFO)
-    
-    # Configure werkzeug logger
-    werkzeug_logger = logging.getLogger('werkzeug')
-    werkzeug_logger.addHandler(file_handler)
-    werkzeug_logger.addHandler(console_handler)
-    werkzeug_logger.setLevel(logging.WARNING)
-    
-    app.logger.info('OpenMCP logging initialized')
\ No newline at end of file
+    """Configure logging for the Flask application.
+
+    Log calls only enqueue the record; a background QueueListener thread does
+    formatting, file I/O and rotation. Safe to call more than once: the queue
+    handler is created once per process and attached to each logger only if
+    it isn't already.
+    """
+    global _queue_handler, _listener
+
+    if _queue_handler is None:
+        # Create logs directory if it doesn't exist
+        log_dir = Path('logs')
+        log_dir.mkdir(exist_ok=True)
+
+        # Set up file handler (structured JSON lines)
+        file_handler = RotatingFileHandler(
+            'logs/openmcp.log',
+            maxBytes=10240000,  # 10MB
+            backupCount=10
+        )
+        file_handler.setFormatter(JSONFormatter())
+        file_handler.setLevel(logging.INFO)
+        file_handler.addFilter(_LoggerNameFilter(slow_call_logger.name, include=False))
+
+        # Set up console handler
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(ConsoleFormatter('%(levelname)s: %(message)s'))
+        console_handler.setLevel(logging.DEBUG if app.debug else logging.INFO)
+        console_handler.addFilter(_LoggerNameFilter(slow_call_logger.name, include=False))
+
+        # Set up slow-call handler (separate file, raw JSON lines)
+        slow_call_handler = RotatingFileHandler(
+            'logs/slow_calls.log',
+            maxBytes=10240000,  # 10MB
+            backupCount=5
+        )
+        slow_call_handler.setFormatter(logging.Formatter('%(message)s'))
+        slow_call_handler.addFilter(_LoggerNameFilter(slow_call_logger.name, include=True))
+
+        # Request threads only pay for enqueueing; filters run on the caller
+        # so request ids are captured and sampled-out records never queue
+        _queue_handler = TracebackQueueHandler(queue.SimpleQueue())
+        _queue_handler.addFilter(RequestContextFilter())
+        _queue_handler.addFilter(SamplingFilter(parse_sample_rates(app.config.get('LOG_SAMPLE_RATES', ''))))
+
+        _listener = QueueListener(
+            _queue_handler.queue, file_handler, console_handler, slow_call_handler,
+            respect_handler_level=True
+        )
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+    # Configure the package (and so every module logger under it), app,
+    # werkzeug and slow-call loggers
+    level = logging.DEBUG if app.debug else logging.INFO
+    for logger, logger_level in [
+        (package_logger, level),
+        (app.logger, level),
+        (logging.getLogger('werkzeug'), logging.WARNING),
+        (slow_call_logger, logging.WARNING)
+    ]:
+        # A logger under the package already reaches the handler through it
+        attach = logger is package_logger or not logger.name.startswith(package_logger.name + '.')
+        if attach and _queue_handler not in logger.handlers:
+            logger.addHandler(_queue_handler)
+        logger.setLevel(logger_level)
+    slow_call_logger.propagate = False
+
+    # Flask's default handler writes to stderr synchronously on the caller
+    app.logger.removeHandler(default_handler)
+
+    app.logger.info('OpenMCP logging initialized')
+
+
+def shutdown_logging():
+    """Flush queued records and detach the queue handler"""
+    global _queue_handler, _listener
+
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+    if _queue_handler is not None:
+        for logger in logging.Logger.manager.loggerDict.values():
+            if isinstance(logger, logging.Logger) and _queue_handler in logger.handlers:
+                logger.removeHandler(_queue_handler)
+    _queue_handler = None
+    _listener = None
@@ -0,0 +1,278 @@
+"""
+Lightweight in-process metrics with Prometheus text exposition.
+
+Recording is lock-free on the hot path: every thread accumulates into its
+own shard and shards are only merged when /metrics is scraped. Shards of
+threads that have exited are folded into a retired total so thread-per-
+connection servers don't grow the shard list without bound.
+"""
+
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Fold dead-thread shards once this many shards are registered
+_SWEEP_THRESHOLD = 64
+
+Key = Tuple[str, Tuple[str, ...]]
+
+
+class MetricsRegistry:
+    """Holds metric definitions and the per-thread value shards"""
+
+    def __init__(self):
+        self.enabled = True
+        self._metrics: Dict[str, '_Metric'] = {}
+        self._local = threading.local()
+        self._shards: List[Tuple[threading.Thread, Dict[Key, List[float]]]] = []
+        self._retired: Dict[Key, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: '_Metric') -> '_Metric':
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> 'Counter':
+        return self.register(Counter(self, name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Tuple[str, ...] = ()) -> 'Gauge':
+        return self.register(Gauge(self, name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> 'Histogram':
+        return self.register(Histogram(self, name, help, labelnames, buckets))
+
+    def _cell(self, key: Key, size: int) -> List[float]:
+        """Return this thread's accumulator for a metric/label combination"""
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._new_shard()
+        cell = shard.get(key)
+        if cell is None:
+            cell = shard[key] = [0.0] * size
+        return cell
+
+    def _new_shard(self) -> Dict[Key, List[float]]:
+        shard: Dict[Key, List[float]] = {}
+        self._local.shard = shard
+        with self._lock:
+            self._shards.append((threading.current_thread(), shard))
+            if len(self._shards) > _SWEEP_THRESHOLD:
+                self._sweep()
+        return shard
+
+    def _sweep(self):
+        """Fold shards of finished threads into the retired totals (lock held)"""
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                _merge_into(self._retired, shard)
+        self._shards = live
+
+    def snapshot(self) -> Dict[Key, List[float]]:
+        """Merge all shards into a single view"""
+        with self._lock:
+            self._sweep()
+            merged = {key: list(values) for key, values in self._retired.items()}
+            for _, shard in self._shards:
+                _merge_into(merged, dict(shard))
+        return merged
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format"""
+        values = self.snapshot()
+        by_metric: Dict[str, List[Tuple[Tuple[str, ...], List[float]]]] = {}
+        for (name, labels), cell in values.items():
+            by_metric.setdefault(name, []).append((labels, cell))
+
+        lines = []
+        for name, metric in self._metrics.items():
+            lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.type}")
+            lines.extend(metric.render(sorted(by_metric.get(name, []))))
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """Drop all recorded values (definitions are kept)"""
+        with self._lock:
+            self._retired = {}
+            for _, shard in self._shards:
+                shard.clear()
+
+
+def _merge_into(target: Dict[Key, List[float]], source: Dict[Key, List[float]]):
+    for key, values in source.items():
+        existing = target.get(key)
+        if existing is None:
+            target[key] = list(values)
+        else:
+            for i, value in enumerate(values):
+                existing[i] += value
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    type = 'untyped'
+
+    def __init__(self, registry: MetricsRegistry, name: str, help: str, labelnames: Tuple[str, ...]):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def render(self, series: List[Tuple[Tuple[str, ...], List[float]]]) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(cell[0])}"
+                for labels, cell in series]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+    type = 'counter'
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        if self.registry.enabled:
+            self.registry._cell((self.name, labels), 1)[0] += amount
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, or be computed at scrape time"""
+    type = 'gauge'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._function: Optional[Callable[[], float]] = None
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        if self.registry.enabled:
+            self.registry._cell((self.name, labels), 1)[0] += amount
+
+    def dec(self, *labels: str, amount: float = 1.0):
+        if self.registry.enabled:
+            self.registry._cell((self.name, labels), 1)[0] -= amount
+
+    def set_function(self, function: Callable[[], float]):
+        """Compute the (unlabelled) value from a callback on each scrape"""
+        self._function = function
+
+    def render(self, series):
+        if self._function is not None:
+            return [f"{self.name} {_format_value(float(self._function()))}"]
+        return super().render(series)
+
+
+class Histogram(_Metric):
+    """Bucketed distribution of observed values"""
+    type = 'histogram'
+
+    def __init__(self, registry, name, help, labelnames, buckets):
+        super().__init__(registry, name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # One slot per bucket, one for +Inf, one for the running sum
+        self._size = len(self.buckets) + 2
+
+    def observe(self, value: float, *labels: str):
+        if self.registry.enabled:
+            cell = self.registry._cell((self.name, labels), self._size)
+            cell[bisect_left(self.buckets, value)] += 1
+            cell[-1] += value
+
+    def render(self, series):
+        lines = []
+        for labels, cell in series:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (float('inf'),), cell[:-1]):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                bucket_labels = _format_labels(self.labelnames, labels, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {_format_value(cumulative)}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {repr(cell[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {_format_value(cumulative)}")
+        return lines
+
+
+# Process-wide registry and the metrics OpenMCP records
+metrics = MetricsRegistry()
+
+HTTP_REQUESTS = metrics.counter(
+    'openmcp_http_requests_total', 'HTTP requests handled', ('endpoint', 'method', 'status'))
+HTTP_ERRORS = metrics.counter(
+    'openmcp_http_request_errors_total', 'HTTP requests answered with a 4xx/5xx status', ('endpoint', 'status'))
+HTTP_LATENCY = metrics.histogram(
+    'openmcp_http_request_duration_seconds', 'HTTP request latency', ('endpoint',))
+HTTP_IN_FLIGHT = metrics.gauge(
+    'openmcp_http_requests_in_flight', 'HTTP requests currently being handled', ('endpoint',))
+
+TOOL_CALLS = metrics.counter(
+    'openmcp_tool_calls_total', 'Tool executions by outcome', ('tool', 'outcome'))
+TOOL_ERRORS = metrics.counter(
+    'openmcp_tool_call_errors_total', 'Tool executions that failed or got an upstream error', ('tool',))
+TOOL_LATENCY = metrics.histogram(
+    'openmcp_tool_call_duration_seconds', 'Tool execution latency including the upstream call', ('tool',))
+TOOL_IN_FLIGHT = metrics.gauge(
+    'openmcp_tool_calls_in_flight', 'Tool executions currently running', ('tool',))
+TOOL_RESULTS_SHAPED = metrics.counter(
+    'openmcp_tool_results_shaped_total', 'Tool results cut down for the model (projected, truncated_arrays, capped)',
+    ('tool', 'how'))
+
+UPSTREAM_LATENCY = metrics.histogram(
+    'openmcp_upstream_request_duration_seconds', 'Upstream API call latency', ('host',))
+
+REGISTRY_SIZE = metrics.gauge('openmcp_registry_tools', 'Number of registered tools')
+CATALOG_VERSION = metrics.gauge('openmcp_catalog_version', 'Tool catalog version, bumped on every change')
+
+SPEC_LOAD_SECONDS = metrics.histogram(
+    'openmcp_spec_load_duration_seconds', 'Time to load an OpenAPI spec', ('source',))
+SPEC_PARSE_SECONDS = metrics.histogram(
+    'openmcp_spec_parse_duration_seconds', 'Time to extract and convert tools from a spec')
+
+
+CHAT_SESSIONS = metrics.gauge('openmcp_chat_sessions', 'Server-side chat sessions held in memory')
+CHAT_SESSION_BYTES = metrics.gauge('openmcp_chat_session_bytes', 'Estimated memory held by chat session histories')
+CHAT_SESSION_EVICTIONS = metrics.counter(
+    'openmcp_chat_session_evictions_total', 'Chat sessions evicted by reason (ttl, lru, memory)', ('reason',))
+
+LLM_CACHE_REQUESTS = metrics.counter(
+    'openmcp_llm_cache_requests_total', 'LLM calls by response cache result (hit, miss, bypass)', ('result',))
+
+OLLAMA_BACKEND_IN_FLIGHT = metrics.gauge(
+    'openmcp_ollama_backend_in_flight', 'LLM requests running on each pooled Ollama host', ('host',))
+OLLAMA_BACKEND_QUEUED = metrics.gauge(
+    'openmcp_ollama_backend_queued', 'LLM requests waiting for a slot on each pooled Ollama host', ('host',))
+OLLAMA_BACKEND_LATENCY = metrics.histogram(
+    'openmcp_ollama_backend_duration_seconds', 'LLM request latency per pooled Ollama host', ('host',))
+OLLAMA_BACKEND_FAILURES = metrics.counter(
+    'openmcp_ollama_backend_failures_total', 'Connection failures per pooled Ollama host', ('host',))
+
+FAST_PATH_REQUESTS = metrics.counter(
+    'openmcp_fast_path_requests_total',
+    'Chat messages seen by the fast-path router by route and result (hit, no_match, ambiguous, ...)',
+    ('route', 'result'))
+FAST_PATH_SECONDS_SAVED = metrics.counter(
+    'openmcp_fast_path_seconds_saved_total', 'Estimated LLM time saved by fast-path answers', ('route',))
+
+UPSTREAM_HEALTH_PROBES = metrics.counter(
+    'openmcp_upstream_health_probes_total', 'Background health probes per upstream by result (up, down)',
+    ('upstream', 'result'))
+UNAVAILABLE_TOOLS = metrics.gauge(
+    'openmcp_unavailable_tools', 'Registered tools hidden from the model because their upstream is down')
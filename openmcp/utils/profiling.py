@@ -0,0 +1,205 @@
+"""
+On-demand profiling for live OpenMCP workers.
+
+Nothing in here is installed unless PROFILING_ENABLED is set, so a disabled
+instance pays no cost at all. When enabled there are two tools:
+
+- `ProfilingMiddleware` runs cProfile around a single request that carries
+  the profile header (and a valid admin token) and writes a .pstats file.
+- `sample_stacks` / `snapshot_allocations` look at the whole process for a
+  bounded time window: a wall-clock stack sampler built on
+  `sys._current_frames()` and a tracemalloc snapshot.
+"""
+
+import cProfile
+import hmac
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+PROFILE_HEADER = 'X-OpenMCP-Profile'
+ADMIN_TOKEN_HEADER = 'X-Admin-Token'
+
+# Only one process-wide sampling/tracemalloc run at a time
+_profile_lock = threading.Lock()
+
+
+def check_admin_token(provided: Optional[str], expected: Optional[str]) -> bool:
+    """Constant-time token check; no configured token means no access"""
+    if not expected or not provided:
+        return False
+    return hmac.compare_digest(provided.encode(), expected.encode())
+
+
+class ProfilingMiddleware:
+    """WSGI middleware that profiles requests carrying the profile header"""
+
+    def __init__(self, wsgi_app, profile_dir: str, admin_token: Optional[str]):
+        self.wsgi_app = wsgi_app
+        self.profile_dir = Path(profile_dir)
+        self.admin_token = admin_token
+        self._environ_header = 'HTTP_' + PROFILE_HEADER.upper().replace('-', '_')
+        self._environ_token = 'HTTP_' + ADMIN_TOKEN_HEADER.upper().replace('-', '_')
+
+    def __call__(self, environ, start_response):
+        if not environ.get(self._environ_header):
+            return self.wsgi_app(environ, start_response)
+        if not check_admin_token(environ.get(self._environ_token), self.admin_token):
+            return self.wsgi_app(environ, start_response)
+
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        path = environ.get('PATH_INFO', '/').strip('/').replace('/', '_') or 'root'
+        method = environ.get('REQUEST_METHOD', 'GET')
+        filename = self.profile_dir / f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}-{method}-{path}.pstats"
+
+        def profiled_start_response(status, headers, exc_info=None):
+            headers.append((PROFILE_HEADER, filename.name))
+            return start_response(status, headers, exc_info)
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            app_iter = self.wsgi_app(environ, profiled_start_response)
+        except BaseException:
+            profiler.disable()
+            profiler.dump_stats(str(filename))
+            raise
+        profiler.disable()
+        return _ProfiledBody(app_iter, profiler, filename)
+
+
+class _ProfiledBody:
+    """Response iterable that profiles producing each chunk and writes the
+    stats on close(), so streamed responses are neither buffered nor left
+    unclosed (werkzeug's call_on_close callbacks run from close())
+    """
+
+    def __init__(self, app_iter, profiler: cProfile.Profile, filename: Path):
+        self.app_iter = app_iter
+        self.profiler = profiler
+        self.filename = filename
+        self._iterator = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        self.profiler.enable()
+        try:
+            if self._iterator is None:
+                self._iterator = iter(self.app_iter)
+            return next(self._iterator)
+        finally:
+            self.profiler.disable()
+
+    def close(self):
+        close = getattr(self.app_iter, 'close', None)
+        try:
+            if close is not None:
+                self.profiler.enable()
+                try:
+                    close()
+                finally:
+                    self.profiler.disable()
+        finally:
+            self.profiler.dump_stats(str(self.filename))
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})"
+
+
+def sample_stacks(seconds: float, interval: float = 0.005, limit: int = 20,
+                  max_depth: int = 50) -> Optional[Dict[str, Any]]:
+    """Sample every thread's stack for `seconds` and return the hottest stacks.
+
+    Returns None if another profiling run is already in progress.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        return None
+    try:
+        own_thread = threading.get_ident()
+        stacks: Counter = Counter()
+        leaves: Counter = Counter()
+        samples = 0
+        deadline = time.monotonic() + seconds
+
+        while time.monotonic() < deadline:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread:
+                    continue
+                labels = []
+                while frame is not None and len(labels) < max_depth:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                if not labels:
+                    continue
+                leaves[labels[0]] += 1
+                stacks[';'.join(reversed(labels))] += 1
+            samples += 1
+            time.sleep(interval)
+
+        total = sum(stacks.values()) or 1
+        return {
+            'duration_seconds': seconds,
+            'interval_seconds': interval,
+            'samples': samples,
+            'top_stacks': [
+                {'stack': stack.split(';'), 'count': count, 'percent': round(100 * count / total, 2)}
+                for stack, count in stacks.most_common(limit)
+            ],
+            'top_functions': [
+                {'function': leaf, 'count': count, 'percent': round(100 * count / total, 2)}
+                for leaf, count in leaves.most_common(limit)
+            ]
+        }
+    finally:
+        _profile_lock.release()
+
+
+def snapshot_allocations(seconds: float, limit: int = 20, frames: int = 10) -> Optional[Dict[str, Any]]:
+    """Trace allocations for `seconds` (or snapshot an existing trace) and
+    return the top allocation sites.
+
+    Returns None if another profiling run is already in progress.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        return None
+    try:
+        started_here = not tracemalloc.is_tracing()
+        if started_here:
+            tracemalloc.start(frames)
+        try:
+            time.sleep(seconds)
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            if started_here:
+                tracemalloc.stop()
+
+        snapshot = snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__)
+        ])
+        return {
+            'duration_seconds': seconds,
+            'traced_current_bytes': current,
+            'traced_peak_bytes': peak,
+            'top_allocations': [
+                {
+                    'site': str(stat.traceback[-1]),
+                    'size_bytes': stat.size,
+                    'count': stat.count,
+                    'traceback': [str(frame) for frame in stat.traceback]
+                }
+                for stat in snapshot.statistics('traceback')[:limit]
+            ]
+        }
+    finally:
+        _profile_lock.release()
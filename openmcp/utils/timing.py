@@ -0,0 +1,114 @@
+"""
+Per-request phase timing.
+
+`PhaseTimer` records named phases with the monotonic `perf_counter` clock and
+renders them as a `Server-Timing` header or a plain dict. `create_timed_session`
+returns a requests session whose connections report how long connect (TCP and
+TLS) took, which is otherwise hidden inside requests/urllib3.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+
+class PhaseTimer:
+    """Collects durations of named request phases"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time the enclosed block as `name`"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name: str, seconds: float):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    @property
+    def total(self) -> float:
+        return time.perf_counter() - self.start
+
+    def as_dict(self) -> Dict[str, float]:
+        """Phase durations in milliseconds, plus the total so far"""
+        timing = {name: round(seconds * 1000, 3) for name, seconds in self.phases.items()}
+        timing['total'] = round(self.total * 1000, 3)
+        return timing
+
+    def as_header(self) -> str:
+        """Render as a Server-Timing header value"""
+        return ', '.join(f'{name};dur={ms:.3f}' for name, ms in self.as_dict().items())
+
+
+# Connect time spent by the current thread since the last reset
+_connect_timing = threading.local()
+
+
+def reset_connect_time():
+    _connect_timing.seconds = 0.0
+
+
+def connect_time() -> float:
+    return getattr(_connect_timing, 'seconds', 0.0)
+
+
+def _record_connect(seconds: float):
+    _connect_timing.seconds = connect_time() + seconds
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _record_connect(time.perf_counter() - start)
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _record_connect(time.perf_counter() - start)
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """HTTP adapter whose connections record their connect duration"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _TimedHTTPConnectionPool,
+            'https': _TimedHTTPSConnectionPool
+        }
+
+
+def create_timed_session() -> requests.Session:
+    """Create a keep-alive session that reports connect time via connect_time()"""
+    session = requests.Session()
+    adapter = TimedHTTPAdapter()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session